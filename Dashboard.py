@@ -2,15 +2,34 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
+import logging
+import os
+import sys
+import threading
 import time
 import warnings
 warnings.filterwarnings('ignore')
 
-# Importer la bibliothèque pour les données réelles
-import yfinance as yf
+logger = logging.getLogger('dashboard')
+
+from alerts import AlertEngine, AlertRule, daily_return_std, default_rules
+from analytics import RollingAnalytics
+from caching import TTLCache
+from crossrates import CrossRates, to_usd_per_unit
+from cards import CardCache, RankedQuotes
+from frames import build_history_frame, build_quote_frame
+from history_store import HistoryStore
+from instrumentation import METRICS, memory_bytes, timed
+from price_matrix import PriceMatrix, instrument_metadata
+from providers import provider_from_env
+from portfolio import DEFAULT_PORTFOLIO, PortfolioEngine, load_positions
+from refresh import RefreshScheduler
+from resampling import ChartData, candlestick_figure, line_figure
+from risk import SCENARIOS, RiskEngine
+from snapshot_service import SnapshotPublisher, SnapshotReader
+from streaming import PollingTickSource, SimulatedTickSource, StreamProducer, TickStore, overlay_ticks
+from universe import Universe
 
 # Configuration de la page
 st.set_page_config(
@@ -98,212 +117,566 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Attente maximale du premier instantané avant le premier affichage (secondes)
+FIRST_PAINT_TIMEOUT = 3
+# Cadence de relecture tant que seul l'instantané préliminaire (cache disque) est publié
+FIRST_PAINT_POLL = 1.0
+# Durée de vie de l'historique en cache ; les cotations suivent le planificateur
+HISTORY_TTL = 4 * 3600
+# Durée de vie des niveaux d'indices : absorbe les rafraîchissements forcés rapprochés
+INDEX_TTL = 30
+# Cadence du rafraîchissement des cotations en arrière-plan
+REFRESH_INTERVAL = 60
+# Cadence à laquelle les sections affichées relisent le dernier instantané
+SNAPSHOT_POLL = 15
+# Flux de prix en continu : '' (désactivé), 'simulation' (générateur local) ou 'poll' (barres du fournisseur)
+STREAM_MODE = os.environ.get('DASHBOARD_STREAM', '')
+# Cadence de relecture des sections abonnées au flux, et ticks gardés par symbole
+STREAM_POLL = 0.5
+STREAM_CAPACITY = 2048
+# Répertoire des instantanés du service (python Dashboard.py --service) ; vide : chaque processus télécharge
+SNAPSHOT_DIR = os.environ.get('DASHBOARD_SNAPSHOT_DIR', '')
+
+
+@st.cache_resource
+def get_universe():
+    """Univers d'instruments lu une fois depuis le fichier de configuration"""
+    return Universe.load()
+
+
+@st.cache_resource
+def get_shared_caches():
+    """Caches partagés par toutes les sessions du processus serveur"""
+    caches = {
+        'historique': TTLCache(HISTORY_TTL, maxsize=8, name='historique'),
+        'indices': TTLCache(INDEX_TTL, maxsize=4, name='indices'),
+        # Résultats des onglets (figures, indicateurs), par version des barres publiées
+        'sections': TTLCache(HISTORY_TTL, maxsize=256, name='sections'),
+    }
+    METRICS.add_collector('caches', lambda: [
+        (measure, {'cache': stats['name']}, stats[field])
+        for stats in (cache.stats() for cache in caches.values())
+        for measure, field in (('cache_hit_ratio', 'hit_rate'), ('cache_entries', 'entries'))])
+    return caches
+
+
+@st.cache_resource
+def get_engine_lock():
+    """Verrou du processus sérialisant la mise à jour des moteurs partagés par l'instantané (réentrant)"""
+    return threading.RLock()
+
+
+@st.cache_resource
+def get_card_cache():
+    """Cartes HTML formatées, partagées par toutes les sessions"""
+    cache = CardCache()
+    METRICS.add_collector('cartes', lambda: [('card_cache_hits', {}, cache.hits), ('card_cache_misses', {}, cache.misses)])
+    return cache
+
+
+@st.cache_resource
+def get_provider():
+    """Fournisseur de données (yfinance, enregistrement ou rejeu selon DASHBOARD_PROVIDER)"""
+    return provider_from_env()
+
+
+@st.cache_resource
+def get_history_store():
+    """Historique persistant partagé : un seul écrivain du manifeste par processus"""
+    provider = get_provider()
+    return HistoryStore(fetcher=provider.history_one, batch_fetcher=provider.history)
+
+
+@st.cache_resource
+def get_refresh_scheduler(_dashboard):
+    """Planificateur unique du processus : interroge les cotations quel que soit le nombre de sessions.
+
+    Avec ``DASHBOARD_SNAPSHOT_DIR``, le processus est une réplique : il relit les
+    instantanés publiés par le service au lieu de télécharger lui-même.
+    """
+    scheduler = SnapshotReader(SNAPSHOT_DIR) if SNAPSHOT_DIR else _dashboard.build_scheduler()
+    METRICS.add_collector('instantane', lambda: [
+        ('dataframe_bytes', {'frame': section}, memory_bytes(value))
+        for section, value in scheduler.snapshot().sections.items()])
+    return scheduler.start()
+
+
+@st.cache_resource
+def get_tick_stream(_dashboard):
+    """Producteur de ticks unique du processus, ou None si le flux est désactivé"""
+    if not STREAM_MODE:
+        return None
+    if STREAM_MODE == 'simulation':
+        source, interval = SimulatedTickSource(_dashboard.stream_references), 0.25
+    elif STREAM_MODE == 'poll':
+        source, interval = PollingTickSource(get_provider(), _dashboard.active_symbols), 5.0
+    else:
+        raise ValueError(f"Mode de flux inconnu : {STREAM_MODE}")
+    store = TickStore(capacity=STREAM_CAPACITY)
+    METRICS.add_collector('ticks', lambda: [('tick_buffer_bytes', {}, store.nbytes), ('tick_version', {}, store.version)])
+    return StreamProducer(source, store, interval).start()
+
+
 class CommodityCurrencyDashboard:
+    @timed('initialisation')
     def __init__(self):
-        # Les données sont maintenant chargées via des méthodes dédiées
+        # Univers configuré : seuls les groupes visibles dans la vue courante sont chargés
+        self.universe = get_universe()
         self.monnaies = self.define_currencies()
         self.commodities = self.define_commodities()
-        # Initialisation avec un message de chargement
-        with st.spinner("Chargement des données historiques... Cela peut prendre un moment."):
-            self.historical_data_forex = self.initialize_forex_historical_data()
-            self.historical_data_commodities = self.initialize_commodities_historical_data()
-        with st.spinner("Chargement des données du marché..."):
-            self.current_data_forex = self.initialize_current_forex_data()
-            self.current_data_commodities = self.initialize_current_commodities_data()
-            self.market_data = self.initialize_market_data()
+        new_symbols = self.universe.touch(list(self.monnaies) + list(self.commodities))
+        # Historique persistant : seule la queue manquante est téléchargée
+        self.history_store = get_history_store()
+        # Table statique des instruments, séparée de l'historique dense
+        self.instruments = instrument_metadata(self.universe.currencies, self.universe.commodities)
+        self._historical_data_forex = None
+        self._historical_data_commodities = None
+        # Historique complet et matrice de prix : chargés au premier onglet qui les lit
+        self._histories = None
+        self._histories_fallback = False
+        self._price_matrix = None
+        # Dernières barres servant aux cotations courantes (complétées par le planificateur)
+        self.quote_histories = {}
+        self.quote_stale = set()
+        # Les données téléchargées sont partagées entre sessions et reruns
+        self.caches = get_shared_caches()
+        self.card_cache = get_card_cache()
+        self.provider = get_provider()
+        # Derniers niveaux d'indices connus, resservis (périmés) si l'appel groupé échoue
+        self.last_index_quotes = {}
+        self.scheduler = get_refresh_scheduler(self)
+        self.snapshot_version = None
+        # Flux de ticks optionnel, superposé aux cotations de l'instantané
+        self.tick_stream = get_tick_stream(self)
+        self.tick_version = None
+        if new_symbols and self.scheduler.snapshot().version:
+            # Groupes affichés pour la première fois : cycle immédiat, sans bloquer la session
+            self.scheduler.wake()
+        # Premier affichage sur le dernier instantané publié, au pire celui du cache disque
+        self.load_current_data(timeout=FIRST_PAINT_TIMEOUT)
         
     def define_currencies(self):
-        """Définit les monnaies avec leurs symboles yfinance"""
-        return {
-            'EUR': {'pays': 'Zone Euro', 'symbole': 'EUR', 'drapeau': '🇪🇺', 'yfinance_symbol': 'EURUSD=X', 'region': 'Europe'},
-            'GBP': {'pays': 'Royaume-Uni', 'symbole': 'GBP', 'drapeau': '🇬🇧', 'yfinance_symbol': 'GBPUSD=X', 'region': 'Europe'},
-            'JPY': {'pays': 'Japon', 'symbole': 'JPY', 'drapeau': '🇯🇵', 'yfinance_symbol': 'JPY=X', 'region': 'Asie'},
-            'CHF': {'pays': 'Suisse', 'symbole': 'CHF', 'drapeau': '🇨🇭', 'yfinance_symbol': 'CHF=X', 'region': 'Europe'},
-            'CAD': {'pays': 'Canada', 'symbole': 'CAD', 'drapeau': '🇨🇦', 'yfinance_symbol': 'CAD=X', 'region': 'Amérique'},
-            'AUD': {'pays': 'Australie', 'symbole': 'AUD', 'drapeau': '🇦🇺', 'yfinance_symbol': 'AUD=X', 'region': 'Océanie'},
-            'CNY': {'pays': 'Chine', 'symbole': 'CNY', 'drapeau': '🇨🇳', 'yfinance_symbol': 'CNY=X', 'region': 'Asie'},
-            'NZD': {'pays': 'Nouvelle-Zélande', 'symbole': 'NZD', 'drapeau': '🇳🇿', 'yfinance_symbol': 'NZD=X', 'region': 'Océanie'},
-            'SEK': {'pays': 'Suède', 'symbole': 'SEK', 'drapeau': '🇸🇪', 'yfinance_symbol': 'SEK=X', 'region': 'Europe'},
-            'NOK': {'pays': 'Norvège', 'symbole': 'NOK', 'drapeau': '🇳🇴', 'yfinance_symbol': 'NOK=X', 'region': 'Europe'},
-            'MXN': {'pays': 'Mexique', 'symbole': 'MXN', 'drapeau': '🇲🇽', 'yfinance_symbol': 'MXN=X', 'region': 'Amérique'},
-            'SGD': {'pays': 'Singapour', 'symbole': 'SGD', 'drapeau': '🇸🇬', 'yfinance_symbol': 'SGD=X', 'region': 'Asie'},
-            'HKD': {'pays': 'Hong Kong', 'symbole': 'HKD', 'drapeau': '🇭🇰', 'yfinance_symbol': 'HKD=X', 'region': 'Asie'},
-            'INR': {'pays': 'Inde', 'symbole': 'INR', 'drapeau': '🇮🇳', 'yfinance_symbol': 'INR=X', 'region': 'Asie'},
-            'ZAR': {'pays': 'Afrique du Sud', 'symbole': 'ZAR', 'drapeau': '🇿🇦', 'yfinance_symbol': 'ZAR=X', 'region': 'Afrique'},
-            'TRY': {'pays': 'Turquie', 'symbole': 'TRY', 'drapeau': '🇹🇷', 'yfinance_symbol': 'TRY=X', 'region': 'Moyen-Orient'},
-            'RUB': {'pays': 'Russie', 'symbole': 'RUB', 'drapeau': '🇷🇺', 'yfinance_symbol': 'RUB=X', 'region': 'Europe'},
-            'BRL': {'pays': 'Brésil', 'symbole': 'BRL', 'drapeau': '🇧🇷', 'yfinance_symbol': 'BRL=X', 'region': 'Amérique'},
-        }
+        """Définit les monnaies visibles (régions choisies dans la sidebar) depuis l'univers configuré"""
+        regions = st.session_state.get('regions_visibles', self.universe.default_regions)
+        return self.universe.select_currencies(regions)
     
     def define_commodities(self):
-        """Définit les commodities avec leurs symboles yfinance"""
-        return {
-            'BRENT': {'nom': 'Pétrole Brent', 'symbole': 'BRENT', 'categorie': 'Énergie', 'unite': 'USD/baril', 'yfinance_symbol': 'BZ=F'},
-            'WTI': {'nom': 'Pétrole WTI', 'symbole': 'WTI', 'categorie': 'Énergie', 'unite': 'USD/baril', 'yfinance_symbol': 'CL=F'},
-            'GAS': {'nom': 'Gaz Naturel', 'symbole': 'GAS', 'categorie': 'Énergie', 'unite': 'USD/MMBtu', 'yfinance_symbol': 'NG=F'},
-            'GOLD': {'nom': 'Or', 'symbole': 'GOLD', 'categorie': 'Métal Précieux', 'unite': 'USD/once', 'yfinance_symbol': 'GC=F'},
-            'SILVER': {'nom': 'Argent', 'symbole': 'SILVER', 'categorie': 'Métal Précieux', 'unite': 'USD/once', 'yfinance_symbol': 'SI=F'},
-            'COPPER': {'nom': 'Cuivre', 'symbole': 'COPPER', 'categorie': 'Métal Industriel', 'unite': 'USD/livre', 'yfinance_symbol': 'HG=F'},
-            'WHEAT': {'nom': 'Blé', 'symbole': 'WHEAT', 'categorie': 'Agricole', 'unite': 'USD/bu', 'yfinance_symbol': 'ZW=F'},
-            'CORN': {'nom': 'Maïs', 'symbole': 'CORN', 'categorie': 'Agricole', 'unite': 'USD/bu', 'yfinance_symbol': 'ZC=F'},
-            'SOYBEANS': {'nom': 'Soja', 'symbole': 'SOYBEANS', 'categorie': 'Agricole', 'unite': 'USD/bu', 'yfinance_symbol': 'ZS=F'},
-            'SUGAR': {'nom': 'Sucre', 'symbole': 'SUGAR', 'categorie': 'Agricole', 'unite': 'USD/livre', 'yfinance_symbol': 'SB=F'},
-            'COFFEE': {'nom': 'Café', 'symbole': 'COFFEE', 'categorie': 'Agricole', 'unite': 'USD/livre', 'yfinance_symbol': 'KC=F'},
-            'BTC': {'nom': 'Bitcoin', 'symbole': 'BTC', 'categorie': 'Crypto', 'unite': 'USD', 'yfinance_symbol': 'BTC-USD'},
-            'ETH': {'nom': 'Ethereum', 'symbole': 'ETH', 'categorie': 'Crypto', 'unite': 'USD', 'yfinance_symbol': 'ETH-USD'},
-        }
+        """Définit les commodities visibles (catégories choisies dans la sidebar) depuis l'univers configuré"""
+        categories = st.session_state.get('categories_visibles', self.universe.default_categories)
+        return self.universe.select_commodities(categories)
+
+    def symbol_set(self):
+        """Symboles yfinance des devises et commodities visibles"""
+        symbols = [info['yfinance_symbol'] for info in self.monnaies.values()]
+        symbols += [info['yfinance_symbol'] for info in self.commodities.values()]
+        return tuple(symbols)
+
+    @timed()
+    def load_histories(self):
+        """Met à jour l'historique des symboles visibles en un téléchargement groupé"""
+        symbols = self.symbol_set()
+        if SNAPSHOT_DIR:
+            # Réplique : le service tient l'historique à jour sur disque, aucun téléchargement ici
+            return self.stored_histories(symbols)
+        end_date = datetime.now().strftime('%Y-%m-%d')
+        histories, _ = self.history_store.update_many(symbols, end=end_date)
+        return histories
+
+    def stored_histories(self, symbols):
+        """Historique déjà présent sur disque, sans téléchargement"""
+        histories = {symbol: self.history_store.load(symbol) for symbol in symbols}
+        return {symbol: data for symbol, data in histories.items() if not data.empty}
+
+    @property
+    def histories(self):
+        """Historique complet des symboles visibles, chargé au premier accès (après l'en-tête et les cotations)"""
+        if self._histories is None:
+            key = ('historique', self.symbol_set())
+            with st.spinner("Chargement des données historiques... Cela peut prendre un moment."):
+                try:
+                    self._histories = self.caches['historique'].get_or_load(key, self.load_histories)
+                except Exception:
+                    # Le cache ne garde pas l'échec : la relance suivante retente le téléchargement
+                    logger.exception("Mise à jour de l'historique impossible, repli sur les partitions locales")
+                    METRICS.count('historique.erreurs')
+                    self._histories = self.stored_histories(self.symbol_set())
+                    self._histories_fallback = True
+            if not self._histories:
+                self.caches['historique'].invalidate(key)
+                self._histories_fallback = True
+        return self._histories
+
+    def shared(self, key, loader):
+        """Objet dérivé de l'historique, partagé entre sessions par le cache d'historique.
+
+        Un objet bâti sur un historique de repli (échec ou résultat vide) n'est
+        pas conservé pour la durée de vie du cache.
+        """
+        value = self.caches['historique'].get_or_load(key, loader)
+        if self._histories_fallback:
+            self.caches['historique'].invalidate(key)
+        return value
+
+    @property
+    def price_matrix(self):
+        """Matrice de prix des symboles visibles, chargée au premier accès"""
+        if self._price_matrix is None:
+            self._price_matrix = self.get_price_matrix()
+            self.report_missing_histories()
+        return self._price_matrix
+
+    @classmethod
+    def snapshot_source(cls):
+        """Instance sans session pour le mode service : seuls les chargeurs du planificateur sont utilisés.
+
+        Le service publie tout l'univers configuré, les répliques ne gardant que
+        leurs instruments visibles.
+        """
+        self = cls.__new__(cls)
+        self.universe = Universe.load(demand_ttl=float('inf'))
+        self.universe.touch(list(self.universe.currencies) + list(self.universe.commodities))
+        self.provider = provider_from_env()
+        self.history_store = HistoryStore(fetcher=self.provider.history_one, batch_fetcher=self.provider.history)
+        self.caches = {'indices': TTLCache(INDEX_TTL, maxsize=4, name='indices')}
+        self.last_index_quotes = {}
+        self.quote_histories = {}
+        self.quote_stale = set()
+        return self
+
+    def build_scheduler(self, on_publish=None):
+        """Planificateur des cotations, indices et barres récentes des instruments actifs"""
+        return RefreshScheduler({
+            'forex': self.initialize_current_forex_data,
+            'commodities': self.initialize_current_commodities_data,
+            'marches': self.initialize_market_data,
+            'barres': self.recent_bars,
+        }, interval=REFRESH_INTERVAL, prepare=self.top_up_histories, preload=self.cached_sections,
+            on_publish=on_publish)
+
+    def wide_closes(self, histories, since=None):
+        """Matrice large des clôtures (dates × instruments), colonnes nommées par symbole du dashboard"""
+        closes = {}
+        for instruments in (self.monnaies, self.commodities):
+            for symbole, info in instruments.items():
+                data = histories.get(info['yfinance_symbol'])
+                if data is not None and not data.empty:
+                    closes[symbole] = data['Close'] if since is None else data['Close'].loc[since:]
+        if not closes:
+            return pd.DataFrame()
+        prices = pd.concat(closes, axis=1)
+        # Calendrier ouvré commun : les week-ends des cryptos fausseraient les corrélations
+        return prices[prices.index.dayofweek < 5]
 
+    @timed()
+    def build_price_matrix(self):
+        """Matrice dense dates × instruments (Close, High, Low) construite depuis l'historique"""
+        symbols = {symbole: info['yfinance_symbol'] for symbole, info in {**self.monnaies, **self.commodities}.items()}
+        return PriceMatrix.from_histories(self.histories, symbols, fields=('Close', 'High', 'Low'))
+
+    def report_missing_histories(self):
+        """Signale dans la sidebar les instruments sans historique"""
+        loaded = set(self.price_matrix.symbols)
+        failed_forex = [symbole for symbole in self.monnaies if symbole not in loaded]
+        failed_commodities = [symbole for symbole in self.commodities if symbole not in loaded]
+        if failed_forex:
+            st.sidebar.error(f"Échec du chargement des devises : {', '.join(failed_forex)}")
+        if failed_commodities:
+            st.sidebar.error(f"Échec du chargement des commodities : {', '.join(failed_commodities)}")
+
+    @timed()
+    def build_analytics(self):
+        """Construit le moteur d'analytique glissante sur tout l'historique"""
+        prices = self.get_price_matrix().to_frame('Close')
+        # Calendrier ouvré commun : les week-ends des cryptos fausseraient les corrélations
+        prices = prices[prices.index.dayofweek < 5]
+        try:
+            return RollingAnalytics(prices)
+        except ValueError:
+            return None
+
+    def get_price_matrix(self):
+        """Matrice de prix partagée entre sessions, reconstruite à l'expiration de l'historique"""
+        return self.shared(('matrice', self.symbol_set()), self.build_price_matrix)
+
+    def get_analytics(self):
+        """Moteur d'analytique partagé entre sessions, complété avec les barres du dernier instantané"""
+        engine = self.shared(('analytique', self.symbol_set()), self.build_analytics)
+        return self._sync_engine(engine)
+
+    def _sync_engine(self, engine, snapshot=None, usd=False):
+        """Complète un moteur partagé avec les barres de l'instantané si leur version a changé.
+
+        Le test de version et la mise à jour se font sous le verrou du processus :
+        deux sessions ne complètent pas le même moteur en même temps. ``usd``
+        convertit les devises en dollars par unité avant la mise à jour.
+        """
+        if engine is None:
+            return None
+        snapshot = snapshot or self.scheduler.snapshot()
+        version = snapshot.section_versions.get('barres')
+        if version is None or version == engine.source_version:
+            return engine
+        with get_engine_lock():
+            if version != engine.source_version:
+                closes = self.wide_closes(snapshot.get('barres'), since=engine.last_date)
+                engine.update(self.usd_prices(closes) if usd else closes, version)
+        return engine
+
+    @timed()
+    def build_cross_rates(self):
+        """Moteur de cours croisés sur tout l'historique des devises visibles"""
+        matrix = self.get_price_matrix()
+        currencies = [symbole for symbole in self.monnaies if symbole in matrix.symbols]
+        if not currencies:
+            return None
+        prices = matrix.to_frame('Close')[currencies]
+        prices = prices[prices.index.dayofweek < 5].dropna(how='all')
+        return CrossRates(prices, {symbole: self.monnaies[symbole]['yfinance_symbol'] for symbole in currencies})
+
+    def get_cross_rates(self):
+        """Cours croisés partagés entre sessions, complétés avec les barres du dernier instantané"""
+        engine = self.shared(('cours_croises', self.symbol_set()), self.build_cross_rates)
+        return self._sync_engine(engine)
+
+    def usd_prices(self, prices):
+        """Clôtures larges avec les devises converties en dollars par unité (valeur d'une position)"""
+        currencies = [symbole for symbole in self.monnaies if symbole in prices.columns]
+        if currencies:
+            prices = prices.copy()
+            prices[currencies] = to_usd_per_unit(
+                prices[currencies], {symbole: self.monnaies[symbole]['yfinance_symbol'] for symbole in currencies})
+        return prices
+
+    @timed()
+    def build_risk_engine(self):
+        """Moteur de risque sur l'historique des instruments visibles"""
+        prices = self.get_price_matrix().to_frame('Close')
+        prices = self.usd_prices(prices[prices.index.dayofweek < 5])
+        groups = {symbole: info['region'] for symbole, info in self.monnaies.items()}
+        groups.update({symbole: info['categorie'] for symbole, info in self.commodities.items()})
+        try:
+            return RiskEngine(prices, groups)
+        except ValueError:
+            return None
+
+    def get_risk_engine(self):
+        """Moteur de risque partagé entre sessions ; une nouvelle barre de l'instantané invalide ses résultats"""
+        engine = self.shared(('risque', self.symbol_set()), self.build_risk_engine)
+        return self._sync_engine(engine, usd=True)
+
+    @timed()
+    def build_portfolio(self):
+        """Moteur de portefeuille sur l'historique des instruments visibles ; None sans fichier de positions"""
+        if not os.path.exists(DEFAULT_PORTFOLIO):
+            return None
+        positions = load_positions(DEFAULT_PORTFOLIO, {**self.universe.currencies, **self.universe.commodities})
+        prices = self.get_price_matrix().to_frame('Close')
+        return PortfolioEngine(positions, self.usd_prices(prices[prices.index.dayofweek < 5]))
+
+    def quote_marks(self, snapshot):
+        """Cours du jour et de la veille des cotations publiées, en dollars par unité : ``(courant, veille)``"""
+        marks = []
+        forex = snapshot.get('forex', pd.DataFrame())
+        if not forex.empty:
+            quotes = forex.set_index('symbole')[['taux_usd', 'cloture_veille']].T
+            tickers = {symbole: self.universe.currencies[symbole]['yfinance_symbol'] for symbole in quotes.columns}
+            marks.append(pd.DataFrame(to_usd_per_unit(quotes, tickers), columns=quotes.columns))
+        commodities = snapshot.get('commodities', pd.DataFrame())
+        if not commodities.empty:
+            marks.append(commodities.set_index('symbole')[['prix', 'cloture_veille']].T.reset_index(drop=True))
+        marks = pd.concat(marks, axis=1) if marks else pd.DataFrame(index=[0, 1], dtype='float64')
+        return marks.iloc[0], marks.iloc[1]
+
+    def get_portfolio(self):
+        """Portefeuille partagé entre sessions, revalorisé à l'arrivée des barres et des cotations de l'instantané"""
+        stamp = os.path.getmtime(DEFAULT_PORTFOLIO) if os.path.exists(DEFAULT_PORTFOLIO) else None
+        engine = self.shared(('portefeuille', self.symbol_set(), stamp), self.build_portfolio)
+        if engine is None:
+            return None
+        snapshot = self.scheduler.snapshot()
+        with get_engine_lock():
+            self._sync_engine(engine, snapshot, usd=True)
+            quote_version = (snapshot.section_versions.get('forex'), snapshot.section_versions.get('commodities'))
+            if quote_version != engine.quote_version:
+                engine.mark(*self.quote_marks(snapshot), quote_version)
+        return engine
+
+    def get_chart_data(self):
+        """Pyramides OHLC partagées entre sessions, complétées avec les barres du dernier instantané"""
+        charts = self.shared(('graphiques', self.symbol_set()),
+                             lambda: ChartData(self.histories))
+        snapshot = self.scheduler.snapshot()
+        version = snapshot.section_versions.get('barres')
+        if version is not None and version != charts.source_version:
+            charts.update(snapshot.get('barres'), version)
+        return charts
+
+    def memoized(self, name, compute, *params):
+        """Résultat d'une section d'onglet partagé entre sessions, calculé au plus une fois par version des barres.
+
+        Les moteurs sous-jacents sont complétés avec les mêmes barres : une
+        nouvelle version de l'instantané donne une nouvelle clé.
+        """
+        version = self.scheduler.snapshot().section_versions.get('barres')
+        return self.caches['sections'].get_or_load((name, self.symbol_set(), version) + params, compute)
+
+    @property
+    def historical_data_forex(self):
+        """Historique Forex au format long, construit seulement s'il est demandé"""
+        if self._historical_data_forex is None:
+            self._historical_data_forex = self.initialize_forex_historical_data()
+        return self._historical_data_forex
+
+    @property
+    def historical_data_commodities(self):
+        """Historique des commodities au format long, construit seulement s'il est demandé"""
+        if self._historical_data_commodities is None:
+            self._historical_data_commodities = self.initialize_commodities_historical_data()
+        return self._historical_data_commodities
+
+    @timed()
     def initialize_forex_historical_data(self):
-        """Récupère les données historiques Forex via yfinance"""
-        all_data = []
-        failed_symbols = []
-        for symbole, info in self.monnaies.items():
-            try:
-                end_date = datetime.now().strftime('%Y-%m-%d')
-                data = yf.download(info['yfinance_symbol'], start='2020-01-01', end=end_date, progress=False)
-                
-                if isinstance(data, pd.DataFrame) and not data.empty and 'Close' in data.columns and not data['Close'].isnull().all():
-                    data = data.reset_index()
-                    for _, row in data.iterrows():
-                        close_price = row['Close']
-                        if pd.notna(close_price):
-                            all_data.append({
-                                'date': row['Date'],
-                                'symbole': symbole,
-                                'pays': info['pays'],
-                                'region': info['region'],
-                                'taux_usd': close_price,
-                                'volatilite_jour': ((row['High'] - row['Low']) / close_price) * 100 if close_price != 0 else 0
-                            })
-                else:
-                    failed_symbols.append(symbole)
-            except Exception:
-                failed_symbols.append(symbole)
-        
-        if failed_symbols:
-            st.sidebar.error(f"Échec du chargement des devises : {', '.join(failed_symbols)}")
-            
-        return pd.DataFrame(all_data)
+        """Construit les données historiques Forex à partir de l'historique téléchargé"""
+        data, _ = build_history_frame(self.histories, self.monnaies, 'taux_usd', ['pays', 'region'])
+        return data
 
+    @timed()
     def initialize_commodities_historical_data(self):
-        """Récupère les données historiques des commodities via yfinance"""
-        all_data = []
-        failed_symbols = []
-        for symbole, info in self.commodities.items():
-            try:
-                end_date = datetime.now().strftime('%Y-%m-%d')
-                data = yf.download(info['yfinance_symbol'], start='2020-01-01', end=end_date, progress=False)
-                
-                if isinstance(data, pd.DataFrame) and not data.empty and 'Close' in data.columns and not data['Close'].isnull().all():
-                    data = data.reset_index()
-                    for _, row in data.iterrows():
-                        close_price = row['Close']
-                        if pd.notna(close_price):
-                            all_data.append({
-                                'date': row['Date'],
-                                'symbole': symbole,
-                                'nom': info['nom'],
-                                'categorie': info['categorie'],
-                                'prix': close_price,
-                                'volatilite_jour': ((row['High'] - row['Low']) / close_price) * 100 if close_price != 0 else 0
-                            })
-                else:
-                    failed_symbols.append(symbole)
-            except Exception:
-                failed_symbols.append(symbole)
+        """Construit les données historiques des commodities à partir de l'historique téléchargé"""
+        data, _ = build_history_frame(self.histories, self.commodities, 'prix', ['nom', 'categorie'])
+        return data
+
+    @timed()
+    def top_up_histories(self):
+        """Complète l'historique des instruments affichés par au moins une session, en un appel groupé.
+
+        Seules les barres depuis la dernière date stockée sont redemandées ; la
+        fenêtre de correction de plusieurs jours reste au rafraîchissement horaire.
+        """
+        end_date = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+        self.quote_histories, _ = self.history_store.update_many(self.active_symbols(), end=end_date, max_age=0,
+                                                                 overlap_days=0)
+        self.quote_stale = set(self.history_store.not_refreshed)
+
+    @timed()
+    def cached_sections(self):
+        """Cotations reconstituées depuis l'historique sur disque, sans réseau, pour l'instantané préliminaire"""
+        self.quote_histories = {symbol: self.history_store.load(symbol) for symbol in self.active_symbols()}
+        # Toutes les cotations sont la dernière valeur connue jusqu'au premier cycle complet
+        self.quote_stale = set(self.quote_histories)
+        return {'forex': self.initialize_current_forex_data(),
+                'commodities': self.initialize_current_commodities_data()}
 
-        if failed_symbols:
-            st.sidebar.error(f"Échec du chargement des commodities : {', '.join(failed_symbols)}")
+    def active_symbols(self):
+        """Symboles yfinance des instruments demandés récemment par au moins une session"""
+        monnaies, commodities = self.universe.active()
+        return [info['yfinance_symbol'] for info in {**monnaies, **commodities}.values()]
 
-        return pd.DataFrame(all_data)
+    def stream_references(self):
+        """Dernière clôture des instruments actifs, point de départ du générateur de ticks simulé"""
+        return {symbol: data['Close'].iloc[-1] for symbol, data in self.quote_histories.items() if not data.empty}
 
+    def recent_bars(self):
+        """Dernières barres de chaque instrument actif, publiées pour compléter l'analytique"""
+        return {symbol: data.iloc[-5:] for symbol, data in self.quote_histories.items()}
+
+    @timed()
     def initialize_current_forex_data(self):
-        """Récupère les données Forex courantes via yfinance"""
-        current_data = []
-        for symbole, info in self.monnaies.items():
-            try:
-                ticker = yf.Ticker(info['yfinance_symbol'])
-                hist = ticker.history(period="5d")
-                if len(hist) >= 2:
-                    last_close = hist['Close'].iloc[-1]
-                    prev_close = hist['Close'].iloc[-2]
-                    change_pct = ((last_close - prev_close) / prev_close) * 100 if prev_close != 0 else 0
-                    volume = hist['Volume'].iloc[-1]
-
-                    current_data.append({
-                        'symbole': symbole,
-                        'pays': info['pays'],
-                        'drapeau': info['drapeau'],
-                        'region': info['region'],
-                        'taux_usd': last_close,
-                        'change_pct': change_pct,
-                        'volatilite': hist['Close'].pct_change().std() * 100,
-                        'volume_jour': volume
-                    })
-            except Exception:
-                pass # On ignore silencieusement les erreurs pour les données courantes
-        return pd.DataFrame(current_data)
+        """Calcule les données Forex courantes (devises actives) à partir de l'historique complété"""
+        monnaies, _ = self.universe.active()
+        return build_quote_frame(self.quote_histories, monnaies, 'taux_usd',
+                                 ['pays', 'drapeau', 'region'], self.quote_stale)
 
+    @timed()
     def initialize_current_commodities_data(self):
-        """Récupère les données commodities courantes via yfinance"""
-        current_data = []
-        for symbole, info in self.commodities.items():
-            try:
-                ticker = yf.Ticker(info['yfinance_symbol'])
-                hist = ticker.history(period="5d")
-                if len(hist) >= 2:
-                    last_close = hist['Close'].iloc[-1]
-                    prev_close = hist['Close'].iloc[-2]
-                    change_pct = ((last_close - prev_close) / prev_close) * 100 if prev_close != 0 else 0
-                    volume = hist['Volume'].iloc[-1]
-
-                    current_data.append({
-                        'symbole': symbole,
-                        'nom': info['nom'],
-                        'categorie': info['categorie'],
-                        'unite': info['unite'],
-                        'prix': last_close,
-                        'change_pct': change_pct,
-                        'volatilite': hist['Close'].pct_change().std() * 100,
-                        'volume_jour': volume
-                    })
-            except Exception:
-                pass # On ignore silencieusement les erreurs pour les données courantes
-        return pd.DataFrame(current_data)
+        """Calcule les données commodities courantes (commodities actives) à partir de l'historique complété"""
+        _, commodities = self.universe.active()
+        return build_quote_frame(self.quote_histories, commodities, 'prix',
+                                 ['nom', 'categorie', 'unite'], self.quote_stale)
     
+    @timed()
     def initialize_market_data(self):
-        """Récupère les données de marché via yfinance"""
-        indices_symbols = {
-            'S&P 500': '^GSPC', 'NASDAQ': '^IXIC', 'DJIA': '^DJI',
-            'FTSE 100': '^FTSE', 'DAX': '^GDAXI', 'CAC 40': '^FCHI',
-            'Nikkei 225': '^N225', 'Shanghai': '000001.SS', 'Hang Seng': '^HSI'
-        }
-        indices = {}
+        """Niveaux et variations du jour des indices, en un appel groupé sur les barres récentes"""
+        indices_symbols = self.universe.indices
+        symbols = tuple(indices_symbols.values())
+        try:
+            quotes = self.caches['indices'].get_or_load(('indices', symbols), lambda: self.provider.index_quotes(symbols))
+        except Exception:
+            quotes = {}
+        stale = [name for name, symbol in indices_symbols.items()
+                 if symbol not in quotes and symbol in self.last_index_quotes]
+        self.last_index_quotes.update(quotes)
+        
+        indices, variations = {}, {}
         for name, symbol in indices_symbols.items():
-            try:
-                ticker = yf.Ticker(symbol)
-                price = ticker.info.get('regularMarketPrice')
-                if price is None:
-                    price = ticker.history(period='1d')['Close'].iloc[-1]
-                indices[name] = price
-            except Exception:
-                indices[name] = "N/A"
+            quote = self.last_index_quotes.get(symbol)
+            indices[name] = quote['last'] if quote else "N/A"
+            if quote and quote['previous_close']:
+                variations[name] = (quote['last'] - quote['previous_close']) / quote['previous_close'] * 100
         
         taux_interet = {
             'Fed': 5.5, 'ECB': 4.5, 'BOE': 5.25, 'BOJ': -0.1
         }
         
-        return {'indices': indices, 'taux_interet': taux_interet}
+        return {'indices': indices, 'variations': variations, 'taux_interet': taux_interet, 'stale': stale}
     
+    @timed()
+    def load_current_data(self, timeout=30):
+        """Lit les cotations courantes et les indices dans le dernier instantané publié"""
+        snapshot = self.scheduler.snapshot(timeout=timeout)
+        self.snapshot_version = snapshot.version
+        # Instantané préliminaire (cache disque) ou encore absent : les sections relisent plus souvent
+        self.preliminary = snapshot.preliminary or not snapshot.version
+        self.section_versions = snapshot.section_versions
+        # Le planificateur publie tous les instruments actifs ; la session ne garde que les siens
+        self.current_data_forex = self.visible_rows(snapshot.get('forex', pd.DataFrame()), self.monnaies)
+        self.current_data_commodities = self.visible_rows(snapshot.get('commodities', pd.DataFrame()), self.commodities)
+        self.market_data = snapshot.get('marches', {'indices': {}, 'variations': {}, 'taux_interet': {}, 'stale': []})
+        if self.tick_stream is not None:
+            self.apply_ticks()
+
+    def apply_ticks(self):
+        """Superpose les derniers ticks du flux aux cotations de l'instantané"""
+        store = self.tick_stream.store
+        self.tick_version = store.version
+        latest = store.latest()
+        self.current_data_forex = overlay_ticks(self.current_data_forex, self.monnaies, 'taux_usd', latest)
+        self.current_data_commodities = overlay_ticks(self.current_data_commodities, self.commodities, 'prix', latest)
+
+    @staticmethod
+    def visible_rows(data, instruments):
+        return data[data['symbole'].isin(list(instruments))] if not data.empty else data
+
+    def refresh_from_snapshot(self):
+        """Recharge les données si le planificateur a publié un nouvel instantané ou si des ticks sont arrivés"""
+        if self.scheduler.snapshot().version != self.snapshot_version:
+            preliminary = self.preliminary
+            self.load_current_data()
+            if preliminary and not self.preliminary:
+                # Premier instantané complet : toute la page est redessinée et les fragments reprennent leur cadence
+                st.rerun()
+        elif self.tick_stream is not None and self.tick_stream.store.version != self.tick_version:
+            self.apply_ticks()
+
+    def stale_quotes(self):
+        """Instruments dont la cotation affichée est la dernière valeur connue"""
+        stale = []
+        for data in (self.current_data_forex, self.current_data_commodities):
+            if not data.empty:
+                stale += data.loc[data['stale'], 'symbole'].tolist()
+        return stale + self.market_data.get('stale', [])
+
     def update_live_data(self):
         """Met à jour les données en temps réel en re-téléchargeant les dernières infos"""
         st.info("Mise à jour des données en temps réel...")
-        self.current_data_forex = self.initialize_current_forex_data()
-        self.current_data_commodities = self.initialize_current_commodities_data()
-        self.market_data = self.initialize_market_data()
+        for cache in self.caches.values():
+            cache.invalidate()
+        self.scheduler.refresh_now()
+        self.load_current_data()
         st.success("Données mises à jour!")
         time.sleep(2)
     
+    @timed()
     def display_header(self):
         """Affiche l'en-tête du dashboard"""
         st.markdown(
@@ -322,68 +695,47 @@ class CommodityCurrencyDashboard:
                 unsafe_allow_html=True
             )
     
+    @staticmethod
+    def top_rows(section, data, n=10):
+        """Lignes des ``n`` plus fortes hausses, via le classement incrémental de la session"""
+        rankings = st.session_state.setdefault('classements', {})
+        return rankings.setdefault(section, RankedQuotes()).top_rows(data, n)
+
+    @timed()
     def display_top_currencies(self):
         """Affiche les monnaies les plus performantes"""
         st.markdown('<h3 class="section-header">💰 TOP 10 MONNAIES MONDIALES</h3>', unsafe_allow_html=True)
         
         if not self.current_data_forex.empty:
-            top_currencies = self.current_data_forex.nlargest(10, 'change_pct')
             cols = st.columns(5)
             
-            for idx, (_, currency) in enumerate(top_currencies.iterrows()):
+            top_currencies = self.top_rows('forex', self.current_data_forex)
+            for idx, card in enumerate(self.card_cache.cards(top_currencies, 'devise')):
                 with cols[idx % 5]:
-                    change_class = "positive" if currency['change_pct'] > 0 else "negative" if currency['change_pct'] < 0 else "neutral"
-                    
-                    st.markdown(f"""
-                    <div class="currency-card">
-                        <div style="display: flex; align-items: center; margin-bottom: 0.5rem;">
-                            <span style="font-size: 1.5rem; margin-right: 0.5rem;">{currency['drapeau']}</span>
-                            <div>
-                                <h4 style="margin: 0; font-size: 1.1rem;">{currency['symbole']}</h4>
-                                <p style="margin: 0; opacity: 0.9; font-size: 0.8rem;">{currency['pays']}</p>
-                            </div>
-                        </div>
-                        <div class="price-value">${currency['taux_usd']:.4f}</div>
-                        <div class="price-change {change_class}">
-                            {currency['change_pct']:+.2f}%
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
+                    st.markdown(card, unsafe_allow_html=True)
+        elif self.preliminary:
+            st.info("⏳ Chargement des cotations…")
         else:
             st.warning("Aucune donnée de devise disponible.")
 
+    @timed()
     def display_top_commodities(self):
         """Affiche les commodities les plus performantes"""
         st.markdown('<h3 class="section-header">🛢️ TOP 10 COMMODITIES</h3>', unsafe_allow_html=True)
         
         if not self.current_data_commodities.empty:
-            top_commodities = self.current_data_commodities.nlargest(10, 'change_pct')
             cols = st.columns(5)
             
-            for idx, (_, commodity) in enumerate(top_commodities.iterrows()):
+            top_commodities = self.top_rows('commodities', self.current_data_commodities)
+            for idx, card in enumerate(self.card_cache.cards(top_commodities, 'commodity')):
                 with cols[idx % 5]:
-                    change_class = "positive" if commodity['change_pct'] > 0 else "negative" if commodity['change_pct'] < 0 else "neutral"
-                    card_class = "commodity-card"
-                    if commodity['categorie'] == 'Métal Précieux':
-                        card_class = "metal-card"
-                    elif commodity['categorie'] == 'Énergie':
-                        card_class = "energy-card"
-                    elif commodity['categorie'] == 'Crypto':
-                        card_class = "crypto-card"
-                    
-                    st.markdown(f"""
-                    <div class="{card_class}">
-                        <h4 style="margin: 0; font-size: 1.1rem;">{commodity['symbole']}</h4>
-                        <p style="margin: 0; opacity: 0.9; font-size: 0.8rem;">{commodity['nom']}</p>
-                        <div class="price-value">${commodity['prix']:.2f}</div>
-                        <div class="price-change {change_class}">
-                            {commodity['change_pct']:+.2f}%
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
+                    st.markdown(card, unsafe_allow_html=True)
+        elif self.preliminary:
+            st.info("⏳ Chargement des cotations…")
         else:
             st.warning("Aucune donnée de commodity disponible.")
 
+    @timed()
     def display_key_metrics(self):
         """Affiche les métriques clés"""
         st.markdown('<h3 class="section-header">📊 INDICATEURS MARCHÉ</h3>', unsafe_allow_html=True)
@@ -407,110 +759,342 @@ class CommodityCurrencyDashboard:
             
             with col4:
                 st.metric("Volume Commodities Total", f"{total_volume_commodities/1e6:.0f}M", "sur 5j")
+        elif self.preliminary:
+            st.info("⏳ Chargement des cotations…")
         else:
             st.warning("Impossible de calculer les métriques clés.")
     
+    @timed()
     def create_macro_analysis(self):
         """Analyse macroéconomique"""
         st.markdown('<h3 class="section-header">🌍 ANALYSE MACROÉCONOMIQUE</h3>', unsafe_allow_html=True)
         
-        tab1, tab2, tab3 = st.tabs(["Indices Mondiaux", "Taux d'Intérêt", "Indicateurs Économiques"])
+        tab1, tab2, tab3 = st.tabs(["Indices Mondiaux", "Taux d'Intérêt", "Indicateurs Économiques"],
+                                   key='onglet_macro', on_change='rerun')
         
-        with tab1:
-            st.subheader("Performances des Indices Boursiers")
-            cols = st.columns(3)
-            indices = self.market_data['indices']
+        if tab1.open:
+            with tab1:
+                st.subheader("Performances des Indices Boursiers")
+                cols = st.columns(3)
+                indices = self.market_data['indices']
+                variations = self.market_data.get('variations', {})
             
-            for i, (indice, valeur) in enumerate(indices.items()):
-                with cols[i % 3]:
-                    if isinstance(valeur, (int, float)):
-                        change = np.random.uniform(-2, 2)
-                        st.metric(indice, f"{valeur:,.0f}", f"{change:+.2f}%")
-                    else:
-                        st.metric(indice, "N/A", "Donnée non disponible")
-
-        with tab2:
-            st.subheader("Taux Directeurs des Banques Centrales")
-            st.info("Ces taux sont mis à jour manuellement et ne reflètent pas les changements en temps réel.")
-            cols = st.columns(2)
-            taux = self.market_data['taux_interet']
+                for i, (indice, valeur) in enumerate(indices.items()):
+                    with cols[i % 3]:
+                        if isinstance(valeur, (int, float)):
+                            change = variations.get(indice)
+                            st.metric(indice, f"{valeur:,.0f}", f"{change:+.2f}%" if change is not None else None)
+                        else:
+                            st.metric(indice, "N/A", "Donnée non disponible")
+
+        if tab2.open:
+            with tab2:
+                st.subheader("Taux Directeurs des Banques Centrales")
+                st.info("Ces taux sont mis à jour manuellement et ne reflètent pas les changements en temps réel.")
+                cols = st.columns(2)
+                taux = self.market_data['taux_interet']
             
-            with cols[0]:
-                for banque, taux_val in list(taux.items())[:2]:
-                    st.metric(f"{banque}", f"{taux_val}%", "Dernière mise à jour connue")
+                with cols[0]:
+                    for banque, taux_val in list(taux.items())[:2]:
+                        st.metric(f"{banque}", f"{taux_val}%", "Dernière mise à jour connue")
             
-            with cols[1]:
-                for banque, taux_val in list(taux.items())[2:]:
-                    st.metric(f"{banque}", f"{taux_val}%", "Dernière mise à jour connue")
+                with cols[1]:
+                    for banque, taux_val in list(taux.items())[2:]:
+                        st.metric(f"{banque}", f"{taux_val}%", "Dernière mise à jour connue")
         
-        with tab3:
-            col1, col2 = st.columns(2)
+        if tab3.open:
+            with tab3:
+                col1, col2 = st.columns(2)
             
-            with col1:
-                st.markdown("""
-                ### 📊 Indicateurs Économiques
+                with col1:
+                    st.markdown("""
+                    ### 📊 Indicateurs Économiques
                 
-                **🇺🇸 États-Unis:**
-                - Inflation: 3.2%
-                - Croissance PIB: 2.1%
-                - Chômage: 3.8%
+                    **🇺🇸 États-Unis:**
+                    - Inflation: 3.2%
+                    - Croissance PIB: 2.1%
+                    - Chômage: 3.8%
                 
-                **🇪🇺 Zone Euro:**
-                - Inflation: 2.4%
-                - Croissance PIB: 0.5%
-                - Chômage: 6.5%
-                """)
+                    **🇪🇺 Zone Euro:**
+                    - Inflation: 2.4%
+                    - Croissance PIB: 0.5%
+                    - Chômage: 6.5%
+                    """)
             
-            with col2:
-                st.markdown("""
-                ### 🌍 Tendances Mondiales
+                with col2:
+                    st.markdown("""
+                    ### 🌍 Tendances Mondiales
                 
-                **🛢️ Énergie:**
-                - Demande pétrolière: 102M barils/jour
-                - Stocks US: 450M barils
+                    **🛢️ Énergie:**
+                    - Demande pétrolière: 102M barils/jour
+                    - Stocks US: 450M barils
                 
-                **🏭 Production:**
-                - PMI Mondial: 50.8
-                - PMI Manufacturing: 49.2
-                """)
+                    **🏭 Production:**
+                    - PMI Mondial: 50.8
+                    - PMI Manufacturing: 49.2
+                    """)
     
+    @timed()
+    def create_analytics_tab(self):
+        """Analytique glissante sur l'historique réel"""
+        # Plotly Express n'est importé qu'au premier rendu d'un onglet qui dessine avec lui
+        import plotly.express as px
+        st.markdown('<h3 class="section-header">📈 ANALYTIQUE HISTORIQUE</h3>', unsafe_allow_html=True)
+        
+        engine = self.get_analytics()
+        if engine is None:
+            st.warning("Historique insuffisant pour calculer l'analytique.")
+            return
+        
+        periods = {'3 mois': 3, '1 an': 12, '3 ans': 36, 'Depuis 2020': None}
+        col1, col2 = st.columns([1, 3])
+        with col1:
+            period = st.selectbox("Période affichée", list(periods), index=1)
+        with col2:
+            defaults = [s for s in ['EUR', 'JPY', 'GBP', 'GOLD', 'BRENT', 'BTC'] if s in engine.symbols]
+            selection = st.multiselect("Instruments", engine.symbols, default=defaults)
+        start = None if periods[period] is None else engine.last_date - pd.DateOffset(months=periods[period])
+        # Figures partagées entre sessions pour une même version des barres, période et sélection
+        shown = tuple(selection)
+        
+        tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["Volatilité", "Rendements glissants", "Drawdowns", "Corrélations",
+                                                      "Cours", "Cours croisés"], key='onglet_analytique', on_change='rerun')
+        
+        # Courbes réduites par LTTB : quelques centaines de points par série quelle que soit la période
+        if tab1.open:
+            with tab1:
+                st.subheader(f"Volatilité réalisée annualisée ({engine.window} jours)")
+                fig = self.memoized('volatilite', lambda: line_figure(engine.rolling_volatility(start)[selection]),
+                                    start, shown)
+                st.plotly_chart(fig, use_container_width=True)
+        
+        if tab2.open:
+            with tab2:
+                st.subheader(f"Rendement glissant sur {engine.window} jours")
+                fig = self.memoized('rendements', lambda: line_figure(engine.rolling_returns(start)[selection]),
+                                    start, shown)
+                st.plotly_chart(fig, use_container_width=True)
+        
+        if tab3.open:
+            with tab3:
+                st.subheader("Drawdown depuis le plus haut")
+                fig = self.memoized('drawdowns', lambda: line_figure(engine.drawdowns(start)[selection]), start, shown)
+                st.plotly_chart(fig, use_container_width=True)
+        
+        if tab4.open:
+            with tab4:
+                st.subheader(f"Corrélation devises / commodities ({engine.corr_window} jours)")
+                currencies = [s for s in self.monnaies if s in engine.symbols]
+                commodities = [s for s in self.commodities if s in engine.symbols]
+                fig = self.memoized('correlations', lambda: px.imshow(
+                    engine.correlation(currencies, commodities), zmin=-1, zmax=1, color_continuous_scale='RdBu',
+                    text_auto='.2f', aspect='auto'))
+                st.plotly_chart(fig, use_container_width=True)
+        
+        if tab5.open:
+            with tab5:
+                instruments = {**self.monnaies, **self.commodities}
+                charts = self.get_chart_data()
+                available = [s for s in engine.symbols if instruments[s]['yfinance_symbol'] in charts.pyramids]
+                if available:
+                    symbole = st.selectbox("Instrument", available, key='instrument_cours')
+                    def candlesticks():
+                        level, bars = charts.bars(instruments[symbole]['yfinance_symbol'], start)
+                        return level, candlestick_figure(bars, symbole)
+                    level, fig = self.memoized('chandeliers', candlesticks, symbole, start)
+                    st.subheader(f"{symbole} : barres par {level}")
+                    st.plotly_chart(fig, use_container_width=True)
+        
+        if tab6.open:
+            with tab6:
+                cross_rates = self.get_cross_rates()
+                if cross_rates is None:
+                    st.warning("Aucune devise avec historique.")
+                else:
+                    st.subheader(f"Cours croisés au {cross_rates.last_date:%d/%m/%Y} (unités de la colonne pour 1 unité de la ligne)")
+                    st.dataframe(cross_rates.matrix().style.format('{:.4g}'), use_container_width=True)
+                    st.subheader("Variation du jour (%)")
+                    fig = self.memoized('variations_croisees', lambda: px.imshow(
+                        cross_rates.change_matrix(), color_continuous_scale='RdYlGn', zmin=-2, zmax=2, text_auto='.2f',
+                        aspect='auto'))
+                    st.plotly_chart(fig, use_container_width=True)
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        base = st.selectbox("Devise de base", cross_rates.currencies, index=min(1, len(cross_rates.currencies) - 1))
+                    with col2:
+                        quote = st.selectbox("Devise de cotation", cross_rates.currencies)
+                    fig = self.memoized('paire', lambda: line_figure(cross_rates.pair(base, quote, start).to_frame(),
+                                                                     y_title=quote), base, quote, start)
+                    st.plotly_chart(fig, use_container_width=True)
+
+    @timed()
     def create_risk_analysis(self):
-        """Analyse des risques"""
+        """Analyse des risques sur l'historique réel : VaR / CVaR et stress tests Monte Carlo"""
+        # Plotly Express n'est importé qu'au premier rendu d'un onglet qui dessine avec lui
+        import plotly.express as px
         st.markdown('<h3 class="section-header">⚠️ ANALYSE DES RISQUES MARCHÉ</h3>', unsafe_allow_html=True)
         
-        st.info("Cette section utilise des données simulées pour illustrer les scénarios de risque.")
-        
-        tab1, tab2, tab3 = st.tabs(["Risques Géopolitiques", "Stress Tests", "Indicateurs de Stress"])
-        
-        with tab1:
-            st.subheader("Carte des Risques Géopolitiques")
-            risk_data = []
-            regions = ['Moyen-Orient', 'Europe', 'Asie', 'Amérique', 'Afrique', 'Océanie']
-            for region in regions:
-                risk_score = np.random.randint(20, 85)
-                risk_level = "FAIBLE" if risk_score < 33 else "MOYEN" if risk_score < 66 else "ÉLEVÉ"
-                risk_data.append({'Région': region, 'Score Risque': risk_score, 'Niveau': risk_level})
-            risk_df = pd.DataFrame(risk_data)
-            st.dataframe(risk_df, use_container_width=True)
-        
-        with tab2:
-            st.markdown("""
-            ### 📉 Scénario de Récession
-            **Impacts potentiels sur les devises et commodities.**
-            """)
-            st.markdown("""
-            ### 📈 Scénario de Reprise
-            **Impacts potentiels sur les devises et commodities.**
-            """)
-        
-        with tab3:
-            st.subheader("Indicateurs de Stress Financier")
-            stress_indicators = {'VIX': 18.5, 'Spread de Crédit': 1.2, 'Indice USD': 104.2}
-            cols = st.columns(3)
-            for i, (indicator, data) in enumerate(stress_indicators.items()):
-                with cols[i]:
-                    st.metric(indicator, f"{data}", "Normal")
+        engine = self.get_risk_engine()
+        if engine is None:
+            st.warning("Historique insuffisant pour calculer les mesures de risque.")
+            return
+        
+        st.info(f"Mesures calculées sur les {engine.lookback} dernières séances (au {engine.last_date:%d/%m/%Y}), "
+                "positions exprimées en dollars.")
+        col1, col2 = st.columns(2)
+        with col1:
+            level = st.select_slider("Niveau de confiance", options=[0.90, 0.95, 0.99], value=0.95,
+                                     format_func=lambda value: f"{value:.0%}")
+        with col2:
+            horizon = st.select_slider("Horizon (jours)", options=[1, 5, 10, 20], value=1)
+        
+        tab1, tab2, tab3 = st.tabs(["VaR / CVaR", "Stress Tests", "Indicateurs de Stress"],
+                                   key='onglet_risques', on_change='rerun')
+        
+        if tab1.open:
+            with tab1:
+                st.subheader("Par région et catégorie (paniers équipondérés)")
+                st.dataframe(engine.group_var_table(level, horizon).style.format('{:.2f}%'), use_container_width=True)
+                st.subheader("Par instrument")
+                st.dataframe(engine.var_table(level, horizon).style.format('{:.2f}%', subset=pd.IndexSlice[:, [
+                    'var_historique', 'cvar_historique', 'var_parametrique', 'cvar_parametrique']]), use_container_width=True)
+        
+        if tab2.open:
+            with tab2:
+                st.markdown(f"""
+                Simulations Monte Carlo corrélées sur **{horizon} jour(s)** : scénario de base (loi historique),
+                puis chocs de récession et de reprise par région et catégorie ({', '.join(SCENARIOS)}).
+                """)
+                paths = st.select_slider("Trajectoires simulées", options=[1_000, 10_000, 100_000], value=10_000)
+                results = engine.stress_tests(paths, horizon, level)
+                portfolio = pd.DataFrame({name: table.loc['Portefeuille'] for name, table in results.items()}).T
+                st.subheader("Portefeuille équipondéré")
+                st.dataframe(portfolio.style.format('{:.2f}%'), use_container_width=True)
+                scenario = st.selectbox("Détail du scénario", list(results))
+                fig = self.memoized('stress', lambda: px.bar(
+                    results[scenario].drop('Portefeuille').sort_values('rendement_moyen'), y='rendement_moyen',
+                    labels={'rendement_moyen': 'Rendement moyen (%)', 'symbole': 'Instrument'}),
+                    scenario, paths, horizon, level)
+                st.plotly_chart(fig, use_container_width=True)
+                st.dataframe(results[scenario].style.format('{:.2f}%'), use_container_width=True)
+        
+        if tab3.open:
+            with tab3:
+                st.subheader("Indicateurs de Stress Financier")
+                analytics = self.get_analytics()
+                if analytics is None:
+                    st.warning("Historique insuffisant pour les indicateurs de stress.")
+                else:
+                    stress = self.memoized('indicateurs_stress', lambda: self.stress_indicators(analytics))
+                    cols = st.columns(3)
+                    with cols[0]:
+                        st.metric("Volatilité médiane", f"{stress['volatilite']:.1f}%",
+                                  f"{stress['volatilite_vs_1an']:+.1f} pts vs 1 an", delta_color='inverse')
+                    with cols[1]:
+                        st.metric(f"Corrélation moyenne ({analytics.corr_window} j)", f"{stress['correlation']:.2f}")
+                    with cols[2]:
+                        st.metric("Instruments à -10% du plus haut", f"{stress['sous_10']} / {stress['instruments']}")
+
+    @staticmethod
+    def stress_indicators(analytics):
+        """Volatilité médiane, corrélation moyenne et nombre d'instruments en drawdown de plus de 10 %"""
+        volatility = analytics.rolling_volatility().median(axis=1)
+        correlation = analytics.correlation().to_numpy()
+        off_diagonal = correlation[~np.eye(len(correlation), dtype=bool)]
+        drawdowns = analytics.drawdowns().iloc[-1]
+        return {'volatilite': volatility.iloc[-1], 'volatilite_vs_1an': volatility.iloc[-1] - volatility.iloc[-252:].median(),
+                'correlation': np.nanmean(off_diagonal), 'sous_10': int((drawdowns < -10).sum()),
+                'instruments': len(drawdowns)}
+
+    @timed()
+    def create_portfolio_tab(self):
+        """Valorisation et P&L du portefeuille de positions dans la devise de référence choisie"""
+        st.markdown('<h3 class="section-header">💼 PORTEFEUILLE</h3>', unsafe_allow_html=True)
+        
+        try:
+            engine = self.get_portfolio()
+        except ValueError as exc:
+            st.error(f"Fichier de positions invalide : {exc}")
+            return
+        if engine is None:
+            st.info(f"Aucun fichier de positions ({DEFAULT_PORTFOLIO}) : le désigner avec DASHBOARD_PORTFOLIO "
+                    "(CSV ou JSON, colonnes symbole et quantite).")
+            return
+        if not engine.excluded.empty:
+            st.warning(f"{len(engine.excluded)} position(s) hors des régions et catégories affichées, non valorisées : "
+                       f"{', '.join(sorted(set(engine.excluded['symbole'])))}")
+        
+        periods = {'1 mois': 1, '3 mois': 3, '1 an': 12, 'Depuis 2020': None}
+        col1, col2 = st.columns(2)
+        with col1:
+            currencies = ['USD'] + [symbole for symbole in self.monnaies if symbole in engine.symbols]
+            base = st.selectbox("Devise de référence", currencies)
+        with col2:
+            period = st.selectbox("Période du P&L", list(periods), index=2)
+        start = None if periods[period] is None else engine.last_date - pd.DateOffset(months=periods[period])
+        
+        summary = engine.summary(base)
+        history = engine.history(base, start)
+        cols = st.columns(4)
+        with cols[0]:
+            st.metric(f"Valeur ({base})", f"{summary['valeur']:,.0f}")
+        with cols[1]:
+            st.metric("P&L du jour", f"{summary['pnl_jour']:+,.0f}", f"{summary['pnl_jour_pct']:+.2f}%")
+        with cols[2]:
+            st.metric(f"P&L {period.lower()}", f"{history['pnl_cumule'].iloc[-1]:+,.0f}")
+        with cols[3]:
+            st.metric("Positions", f"{len(engine.positions):,}")
+        
+        # La courbe suit aussi les cotations : la version du moteur complète celle des barres
+        fig = self.memoized('portefeuille', lambda: line_figure(history[['valeur']], y_title=base, legend_title=''),
+                            base, start, engine.version)
+        st.plotly_chart(fig, use_container_width=True)
+        
+        st.subheader("Par instrument")
+        st.dataframe(engine.by_instrument(base).sort_values('valeur', ascending=False).style.format('{:,.2f}'),
+                     use_container_width=True)
+        st.subheader("Par position")
+        amount = st.column_config.NumberColumn(format='%.2f')
+        st.dataframe(engine.positions_table(base), hide_index=True, use_container_width=True,
+                     column_config={'valeur': amount, 'pnl_jour': amount, 'cours_usd': st.column_config.NumberColumn(format='%.6g'),
+                                    'poids': st.column_config.NumberColumn(format='%.2f%%')})
 
+    def create_performance_tab(self):
+        """Onglet caché : spans, latences par symbole, caches et mémoire (mesures du processus)"""
+        st.markdown('<h3 class="section-header">⏱️ PERFORMANCE</h3>', unsafe_allow_html=True)
+        
+        if not METRICS.enabled:
+            st.info("Collecte désactivée : relancer avec DASHBOARD_METRICS=1 (ou =log pour des lignes JSON).")
+            return
+        
+        histograms = pd.DataFrame(METRICS.histograms())
+        gauges = pd.DataFrame(METRICS.gauges())
+        if histograms.empty:
+            st.info("Aucune mesure enregistrée pour l'instant.")
+        else:
+            spans = histograms[histograms['mesure'] == 'span_seconds'].dropna(axis=1, how='all')
+            st.subheader("Temps par étape")
+            st.dataframe(spans.drop(columns='mesure').sort_values('total_s', ascending=False),
+                         use_container_width=True, hide_index=True)
+            fetches = histograms[histograms['mesure'] == 'fetch_seconds'].dropna(axis=1, how='all')
+            if not fetches.empty:
+                st.subheader("Latence des requêtes par symbole")
+                st.dataframe(fetches.drop(columns='mesure').sort_values('p95_ms', ascending=False),
+                             use_container_width=True, hide_index=True)
+        if not gauges.empty:
+            st.subheader("Caches et mémoire")
+            st.dataframe(gauges, use_container_width=True, hide_index=True)
+        counters = pd.DataFrame(METRICS.counters())
+        if not counters.empty:
+            st.subheader("Erreurs")
+            st.dataframe(counters, use_container_width=True, hide_index=True)
+        
+        export = METRICS.prometheus()
+        st.download_button("Exporter (format Prometheus)", export, file_name='dashboard_metrics.prom', mime='text/plain')
+        with st.expander("Export texte"):
+            st.code(export, language='text')
+
+    @timed()
     def create_sidebar(self):
         """Crée la sidebar"""
         st.sidebar.markdown("## 🎛️ CONTRÔLES D'ANALYSE")
@@ -519,6 +1103,12 @@ class CommodityCurrencyDashboard:
         auto_refresh = st.sidebar.checkbox("Rafraîchissement automatique (toutes les 60s)", value=True)
         alert_threshold = st.sidebar.slider("Seuil d'alerte (%)", 1.0, 10.0, 3.0)
         
+        st.sidebar.markdown("### 🗂️ Univers")
+        st.sidebar.multiselect("Régions (devises)", self.universe.regions(),
+                               default=self.universe.default_regions, key='regions_visibles')
+        st.sidebar.multiselect("Catégories (commodities)", self.universe.categories(),
+                               default=self.universe.default_categories, key='categories_visibles')
+        
         if st.sidebar.button("🔄 Rafraîchir les données maintenant"):
             self.update_live_data()
             st.rerun()
@@ -526,18 +1116,94 @@ class CommodityCurrencyDashboard:
         st.sidebar.markdown("---")
         st.sidebar.markdown("### 🔔 ALERTES EN TEMPS RÉEL")
         
-        if not self.current_data_forex.empty:
-            alert_forex = self.current_data_forex[abs(self.current_data_forex['change_pct']) > alert_threshold]
-            for _, alert in alert_forex.iterrows():
-                st.sidebar.warning(f"{alert['drapeau']} {alert['symbole']}: {alert['change_pct']:+.2f}%")
+        # Le premier chargement se termine même sans rafraîchissement automatique
+        run_every = self.poll_interval() if auto_refresh or self.preliminary else None
+        with st.sidebar:
+            self.live_fragment('alertes', lambda: self.display_alerts(alert_threshold), run_every)
         
-        if not self.current_data_commodities.empty:
-            alert_comm = self.current_data_commodities[abs(self.current_data_commodities['change_pct']) > alert_threshold]
-            for _, alert in alert_comm.iterrows():
-                st.sidebar.error(f"🛢️ {alert['symbole']}: {alert['change_pct']:+.2f}%")
+        with st.sidebar.expander("📦 Cache des données"):
+            for cache in self.caches.values():
+                stats = cache.stats()
+                st.caption(f"{stats['name']} : {stats['hits']} hits / {stats['misses']} misses "
+                           f"({stats['hit_rate']:.0%}), {stats['entries']} entrées")
         
         return {'auto_refresh': auto_refresh, 'alert_threshold': alert_threshold}
 
+    def get_alert_engine(self, alert_threshold):
+        """Moteur d'alertes de la session : son état (déclenchements, cooldown) survit aux reruns"""
+        engine = st.session_state.get('moteur_alertes')
+        if engine is None:
+            engine = st.session_state['moteur_alertes'] = AlertEngine(default_rules(alert_threshold))
+        elif engine.rules['variation'].threshold != alert_threshold:
+            engine.add_rule(AlertRule('variation', 'variation', alert_threshold))
+        return engine
+
+    def alert_measures(self):
+        """Mesures évaluées par le moteur : variation, volatilité 5 jours et z-score de la variation"""
+        frames = [data[['symbole', 'change_pct', 'volatilite']]
+                  for data in (self.current_data_forex, self.current_data_commodities) if not data.empty]
+        if not frames:
+            return pd.DataFrame(columns=['symbole', 'change_pct', 'volatilite', 'zscore'])
+        measures = pd.concat(frames, ignore_index=True)
+        key = ('ecart_type', self.symbol_set())
+        std = self.caches['historique'].peek(key)
+        if std is None and self._price_matrix is not None:
+            std = self.shared(key, lambda: daily_return_std(self.price_matrix.to_frame('Close')))
+        # Sans historique chargé (premier affichage), le z-score attend la relance suivante
+        std = pd.Series(dtype='float64') if std is None else std
+        measures['zscore'] = measures['change_pct'] / measures['symbole'].map(std).replace(0, np.nan)
+        return measures
+
+    @timed()
+    def display_alerts(self, alert_threshold):
+        """Affiche les alertes actives du moteur (appelée dans le conteneur de la sidebar)"""
+        stale = self.stale_quotes()
+        if stale:
+            st.info(f"⏳ Cotations en retard (dernière valeur connue) : {', '.join(stale)}")
+        error = self.scheduler.last_error
+        if error is not None:
+            since = time.strftime('%H:%M:%S', time.localtime(error['at']))
+            st.warning(f"⚠️ Rafraîchissement en échec ({error['stage']}, {since}) : données périmées. {error['message']}")
+        
+        measures = self.alert_measures()
+        engine = self.get_alert_engine(alert_threshold)
+        engine.evaluate(measures)
+        changes = dict(zip(measures['symbole'], measures['change_pct'])) if not measures.empty else {}
+        for alert in engine.active():
+            symbole = alert['symbol']
+            since = time.strftime('%H:%M:%S', time.localtime(alert['first_triggered']))
+            if alert['kind'] == 'variation':
+                label = f"{changes.get(symbole, alert['value']):+.2f}%"
+            elif alert['kind'] == 'volatilite':
+                label = f"volatilité {alert['value']:.2f}%"
+            else:
+                label = f"z-score {alert['value']:.1f}"
+            if symbole in self.monnaies:
+                st.warning(f"{self.monnaies[symbole]['drapeau']} {symbole}: {label} (depuis {since})")
+            elif symbole in self.commodities:
+                st.error(f"🛢️ {symbole}: {label} (depuis {since})")
+
+    def poll_interval(self):
+        """Cadence de relance des fragments : sous la seconde quand le flux de ticks est actif,
+        à la seconde tant que le premier instantané complet n'est pas publié"""
+        if self.tick_stream is not None:
+            return STREAM_POLL
+        return FIRST_PAINT_POLL if self.preliminary else SNAPSHOT_POLL
+
+    def live_fragment(self, key, render, run_every):
+        """Affiche une section dans un fragment relancé seul, sans rerun de la page.
+
+        À chaque relance, le fragment relit l'instantané du planificateur et les
+        derniers ticks du flux : aucun téléchargement n'a lieu dans le thread de
+        la session.
+        """
+        @st.fragment(run_every=run_every, key=key)
+        def fragment():
+            self.refresh_from_snapshot()
+            render()
+        fragment()
+
+    @timed()
     def run_dashboard(self):
         """Exécute le dashboard complet"""
         # Sidebar
@@ -546,59 +1212,84 @@ class CommodityCurrencyDashboard:
         # Header
         self.display_header()
         
-        # Top performers
-        self.display_top_currencies()
-        self.display_top_commodities()
+        # Top performers et métriques clés : relus périodiquement depuis l'instantané
+        run_every = self.poll_interval() if controls['auto_refresh'] or self.preliminary else None
+        self.live_fragment('top_monnaies', self.display_top_currencies, run_every)
+        self.live_fragment('top_commodities', self.display_top_commodities, run_every)
         
         # Métriques clés
-        self.display_key_metrics()
+        self.live_fragment('metriques', self.display_key_metrics, run_every)
+        
+        # Navigation par onglets (l'onglet Performance n'apparaît qu'avec ?perf=1 dans l'URL)
+        labels = ["🌍 Macro", "📈 Analytique", "⚠️ Risques", "💼 Portefeuille", "💡 Insights", "ℹ️ À Propos"]
+        show_performance = st.query_params.get('perf') == '1'
+        # Seul l'onglet affiché est exécuté : changer d'onglet relance le script
+        tabs = st.tabs(labels + ["⏱️ Performance"] if show_performance else labels, key='onglet', on_change='rerun')
+        tab1, tab_analytics, tab2, tab_portfolio, tab3, tab4 = tabs[:6]
+        
+        if show_performance and tabs[6].open:
+            with tabs[6]:
+                self.create_performance_tab()
+        
+        if tab1.open:
+            with tab1:
+                self.create_macro_analysis()
         
-        # Navigation par onglets
-        tab1, tab2, tab3, tab4 = st.tabs([
-            "🌍 Macro", "⚠️ Risques", "💡 Insights", "ℹ️ À Propos"
-        ])
+        if tab_analytics.open:
+            with tab_analytics:
+                self.create_analytics_tab()
         
-        with tab1:
-            self.create_macro_analysis()
+        if tab2.open:
+            with tab2:
+                self.create_risk_analysis()
         
-        with tab2:
-            self.create_risk_analysis()
+        if tab_portfolio.open:
+            with tab_portfolio:
+                self.create_portfolio_tab()
         
-        with tab3:
-            st.markdown("## 💡 INSIGHTS STRATÉGIQUES")
-            st.info("Les insights ci-dessous sont des exemples et doivent être adaptés en fonction des données réelles du marché.")
-            st.markdown("""
-            ### 🚨 RECOMMANDATIONS STRATÉGIQUES
+        if tab3.open:
+            with tab3:
+                st.markdown("## 💡 INSIGHTS STRATÉGIQUES")
+                st.info("Les insights ci-dessous sont des exemples et doivent être adaptés en fonction des données réelles du marché.")
+                st.markdown("""
+                ### 🚨 RECOMMANDATIONS STRATÉGIQUES
             
-            1. **Diversification:** Portefeuille équilibré entre devises et commodities
-            2. **Couverture:** Utiliser l'or et le CHF comme actifs refuges
-            3. **Exposition Sectorielle:** Ponderer selon les cycles économiques
-            4. **Surveillance Géopolitique:** Attention aux risques régionaux
-            5. **Horizon Temporel:** Adapter la stratégie au profil d'investissement
-            """)
-        
-        with tab4:
-            st.markdown("## 📋 À Propos")
-            st.markdown("""
-            **Dashboard Commodities & Monnaies Mondiales - Analyse en Temps Réel**
+                1. **Diversification:** Portefeuille équilibré entre devises et commodities
+                2. **Couverture:** Utiliser l'or et le CHF comme actifs refuges
+                3. **Exposition Sectorielle:** Ponderer selon les cycles économiques
+                4. **Surveillance Géopolitique:** Attention aux risques régionaux
+                5. **Horizon Temporel:** Adapter la stratégie au profil d'investissement
+                """)
+        
+        if tab4.open:
+            with tab4:
+                st.markdown("## 📋 À Propos")
+                st.markdown("""
+                **Dashboard Commodities & Monnaies Mondiales - Analyse en Temps Réel**
             
-            **Source des Données:**
-            - **Devises, Commodities, Indices :** Yahoo Finance via la bibliothèque `yfinance`.
-            - **Taux d'intérêt :** Données de référence, mises à jour manuellement.
+                **Source des Données:**
+                - **Devises, Commodities, Indices :** Yahoo Finance via la bibliothèque `yfinance`.
+                - **Taux d'intérêt :** Données de référence, mises à jour manuellement.
             
-            **Avertissement:**
-            - Les données sont fournies "en l'état" et peuvent comporter des retards.
-            - Ce dashboard est un outil de démonstration et de visualisation.
-            - **Il ne constitue pas un conseil en investissement.**
-            - Faites vos propres recherches avant de prendre toute décision financière.
-            """)
-        
-        # Rafraîchissement automatique
-        if controls['auto_refresh']:
-            time.sleep(60)
-            st.rerun()
+                **Avertissement:**
+                - Les données sont fournies "en l'état" et peuvent comporter des retards.
+                - Ce dashboard est un outil de démonstration et de visualisation.
+                - **Il ne constitue pas un conseil en investissement.**
+                - Faites vos propres recherches avant de prendre toute décision financière.
+                """)
+
+
+def run_snapshot_service():
+    """Mode service : télécharge pour toutes les répliques et publie les instantanés dans DASHBOARD_SNAPSHOT_DIR"""
+    if not SNAPSHOT_DIR:
+        raise ValueError("DASHBOARD_SNAPSHOT_DIR doit désigner le répertoire des instantanés")
+    publisher = SnapshotPublisher(SNAPSHOT_DIR)
+    CommodityCurrencyDashboard.snapshot_source().build_scheduler(on_publish=publisher.publish).run()
 
-# Lancement du dashboard
+# Lancement du dashboard (python Dashboard.py --service pour le service d'instantanés)
 if __name__ == "__main__":
-    dashboard = CommodityCurrencyDashboard()
-    dashboard.run_dashboard()
+    if '--service' in sys.argv[1:]:
+        run_snapshot_service()
+    else:
+        dashboard = CommodityCurrencyDashboard()
+        dashboard.run_dashboard()
@@ -0,0 +1,189 @@
+# alerts.py
+"""Moteur d'alertes incrémental : règles indexées, état par symbole, hystérésis et cooldown.
+
+Trois types de règles comparent une mesure à un seuil :
+
+- ``variation`` : variation du jour en valeur absolue (%, colonne ``change_pct``) ;
+- ``volatilite`` : écart-type des variations sur 5 jours (%, colonne ``volatilite``) ;
+- ``zscore`` : variation du jour rapportée à l'écart-type historique des
+  variations journalières, en valeur absolue (colonne ``zscore``).
+
+Seuls les symboles dont une mesure a changé sont réévalués. Les règles sans
+restriction de symboles sont triées par seuil : celles qui se déclenchent pour
+une valeur sont un préfixe trouvé par bissection. Une alerte active ne retombe
+que sous ``seuil × (1 - hysteresis)`` et n'est renotifiée qu'après ``cooldown``
+secondes.
+"""
+import math
+import time
+from bisect import bisect_left, bisect_right
+
+KINDS = {
+    'variation': 'change_pct',
+    'volatilite': 'volatilite',
+    'zscore': 'zscore',
+}
+ABSOLUTE_KINDS = {'variation', 'zscore'}
+
+
+class AlertRule:
+    """Seuil sur une mesure, pour tous les symboles ou pour ``symbols`` seulement"""
+
+    def __init__(self, rule_id, kind, threshold, symbols=None, hysteresis=0.2, cooldown=300.0):
+        if kind not in KINDS:
+            raise ValueError(f"Type de règle inconnu : {kind}")
+        self.rule_id = rule_id
+        self.kind = kind
+        self.threshold = threshold
+        self.symbols = None if symbols is None else frozenset(symbols)
+        self.hysteresis = hysteresis
+        self.cooldown = cooldown
+        self.clear_threshold = threshold * (1 - hysteresis)
+
+
+class AlertState:
+    """État d'une règle pour un symbole"""
+
+    __slots__ = ('rule', 'symbol', 'value', 'active', 'first_triggered', 'last_fired')
+
+    def __init__(self, rule, symbol):
+        self.rule = rule
+        self.symbol = symbol
+        self.value = None
+        self.active = False
+        self.first_triggered = None
+        self.last_fired = None
+
+    def as_dict(self):
+        return {'rule': self.rule.rule_id, 'kind': self.rule.kind, 'symbol': self.symbol, 'value': self.value,
+                'threshold': self.rule.threshold, 'first_triggered': self.first_triggered,
+                'last_fired': self.last_fired}
+
+
+class AlertEngine:
+    """Évalue les règles au fil des cotations et garde l'état de chaque couple (règle, symbole)"""
+
+    def __init__(self, rules=(), clock=time.time):
+        self.clock = clock
+        self.evaluations = 0  # couples (type, symbole) réévalués
+        self._rules = {}
+        self._thresholds = {kind: [] for kind in KINDS}  # seuils triés des règles globales
+        self._global_ids = {kind: [] for kind in KINDS}  # identifiants dans le même ordre
+        self._by_symbol = {kind: {} for kind in KINDS}  # symbole -> règles restreintes
+        self._values = {}  # (type, symbole) -> dernière mesure évaluée
+        self._states = {}  # (règle, symbole) -> AlertState
+        self._active = {}  # (type, symbole) -> règles actives
+        for rule in rules:
+            self.add_rule(rule)
+
+    @property
+    def rules(self):
+        return dict(self._rules)
+
+    def add_rule(self, rule):
+        """Ajoute une règle (remplace celle de même identifiant) ; le type est réévalué à la prochaine cotation"""
+        if rule.rule_id in self._rules:
+            self.remove_rule(rule.rule_id)
+        self._rules[rule.rule_id] = rule
+        if rule.symbols is None:
+            position = bisect_right(self._thresholds[rule.kind], rule.threshold)
+            self._thresholds[rule.kind].insert(position, rule.threshold)
+            self._global_ids[rule.kind].insert(position, rule.rule_id)
+        else:
+            for symbol in rule.symbols:
+                self._by_symbol[rule.kind].setdefault(symbol, []).append(rule.rule_id)
+        self._values = {key: value for key, value in self._values.items() if key[0] != rule.kind}
+
+    def remove_rule(self, rule_id):
+        """Retire une règle et son état"""
+        rule = self._rules.pop(rule_id)
+        if rule.symbols is None:
+            position = self._global_ids[rule.kind].index(rule_id)
+            del self._thresholds[rule.kind][position]
+            del self._global_ids[rule.kind][position]
+        else:
+            for symbol in rule.symbols:
+                self._by_symbol[rule.kind][symbol].remove(rule_id)
+        for key in [key for key in self._states if key[0] == rule_id]:
+            del self._states[key]
+        for active in self._active.values():
+            active.discard(rule_id)
+
+    def evaluate(self, measures):
+        """Intègre un tableau de mesures (colonne ``symbole`` et colonnes de KINDS).
+
+        Renvoie les alertes nouvellement déclenchées hors cooldown.
+        """
+        if measures.empty:
+            return []
+        now = self.clock()
+        fired = []
+        symbols = measures['symbole'].tolist()
+        for kind, column in KINDS.items():
+            if column not in measures or not (self._global_ids[kind] or self._by_symbol[kind]):
+                continue
+            for symbol, value in zip(symbols, measures[column].tolist()):
+                if value is None or math.isnan(value):
+                    continue
+                if kind in ABSOLUTE_KINDS:
+                    value = abs(value)
+                key = (kind, symbol)
+                if self._values.get(key) == value:
+                    continue
+                self._values[key] = value
+                fired.extend(self._evaluate_symbol(kind, symbol, value, now))
+        return fired
+
+    def _state(self, rule_id, symbol):
+        state = self._states.get((rule_id, symbol))
+        if state is None:
+            state = self._states[(rule_id, symbol)] = AlertState(self._rules[rule_id], symbol)
+        return state
+
+    def _evaluate_symbol(self, kind, symbol, value, now):
+        self.evaluations += 1
+        active = self._active.setdefault((kind, symbol), set())
+        # Les règles actives restent actives tant que la mesure dépasse leur seuil de retour
+        for rule_id in list(active):
+            state = self._states[(rule_id, symbol)]
+            state.value = value
+            if value <= state.rule.clear_threshold:
+                state.active = False
+                active.discard(rule_id)
+
+        triggered = self._global_ids[kind][:bisect_left(self._thresholds[kind], value)]
+        triggered += [rule_id for rule_id in self._by_symbol[kind].get(symbol, ())
+                      if self._rules[rule_id].threshold < value]
+        fired = []
+        for rule_id in triggered:
+            if rule_id in active:
+                continue
+            state = self._state(rule_id, symbol)
+            state.value = value
+            state.active = True
+            state.first_triggered = now
+            active.add(rule_id)
+            if state.last_fired is None or now - state.last_fired >= state.rule.cooldown:
+                state.last_fired = now
+                fired.append(state.as_dict())
+        return fired
+
+    def active(self):
+        """Alertes actives, par type puis mesure décroissante"""
+        alerts = [state.as_dict() for state in self._states.values() if state.active]
+        order = list(KINDS)
+        return sorted(alerts, key=lambda alert: (order.index(alert['kind']), -alert['value']))
+
+
+def default_rules(variation_threshold, volatility_threshold=3.0, zscore_threshold=3.0):
+    """Règles du dashboard : seuil de variation choisi dans la sidebar, pics de volatilité, z-scores"""
+    return [
+        AlertRule('variation', 'variation', variation_threshold),
+        AlertRule('volatilite', 'volatilite', volatility_threshold),
+        AlertRule('zscore', 'zscore', zscore_threshold),
+    ]
+
+
+def daily_return_std(prices, window=60):
+    """Écart-type (%) des variations journalières sur les ``window`` dernières barres, par colonne"""
+    return prices.iloc[-(window + 1):].pct_change().std() * 100
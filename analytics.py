@@ -0,0 +1,212 @@
+# analytics.py
+"""Analytique glissante sur l'historique : rendements, volatilité, drawdowns, corrélations.
+
+Le moteur garde un état par fenêtre (sommes glissantes, produits croisés,
+plus hauts) pour qu'une nouvelle barre coûte O(N) (O(N²) pour la matrice de
+corrélation) au lieu d'un recalcul complet depuis 2020.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+
+
+class GrowingArray:
+    """Tableau 2D à lignes ajoutées en O(1) amorti (capacité doublée)"""
+
+    def __init__(self, data):
+        data = np.asarray(data, dtype='float64')
+        self._data = np.empty((max(16, 2 * len(data)), data.shape[1]))
+        self._data[:len(data)] = data
+        self._size = len(data)
+
+    def __len__(self):
+        return self._size
+
+    def append(self, row):
+        if self._size == len(self._data):
+            grown = np.empty((2 * len(self._data), self._data.shape[1]))
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size] = row
+        self._size += 1
+
+    def extend(self, rows):
+        rows = np.asarray(rows, dtype='float64')
+        size = self._size + len(rows)
+        if size > len(self._data):
+            grown = np.empty((max(2 * len(self._data), size), self._data.shape[1]))
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:size] = rows
+        self._size = size
+
+    def pop(self):
+        self._size -= 1
+        return self._data[self._size].copy()
+
+    def truncate(self, size):
+        """Retire les lignes à partir de ``size`` (remplacement de la queue sur place avec ``extend``)"""
+        self._size = min(size, self._size)
+
+    def view(self):
+        return self._data[:self._size]
+
+
+def rolling_sum(values, window):
+    """Somme glissante par colonne via somme cumulée (NaN pour les premières lignes)"""
+    cumsum = np.cumsum(values, axis=0)
+    out = np.full(values.shape, np.nan)
+    out[window - 1] = cumsum[window - 1]
+    out[window:] = cumsum[window:] - cumsum[:-window]
+    return out
+
+
+class RollingAnalytics:
+    """Moteur d'analytique glissante sur une matrice de prix dates × symboles.
+
+    ``prices`` est un DataFrame large (index de dates, une colonne par symbole).
+    Les rendements sont logarithmiques ; les prix manquants sont prolongés
+    (ffill), ce qui donne un rendement nul ce jour-là.
+    """
+
+    def __init__(self, prices, window=20, corr_window=60, resync_every=1000):
+        if len(prices) <= max(window, corr_window):
+            raise ValueError("Historique trop court pour les fenêtres demandées")
+        self.window = window
+        self.corr_window = corr_window
+        # Les sommes glissantes sont recalculées exactement à cette fréquence pour borner la dérive
+        self.resync_every = resync_every
+        self.symbols = list(prices.columns)
+        # Version de la source (instantané) des dernières barres intégrées
+        self.source_version = None
+        self._lock = threading.Lock()
+
+        prices = prices.sort_index().ffill()
+        values = prices.to_numpy(dtype='float64')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.diff(np.log(values), axis=0, prepend=np.nan)
+        returns = np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+        peak = np.fmax.accumulate(values, axis=0)
+
+        self._dates = list(prices.index)
+        self._prices = GrowingArray(values)
+        self._returns = GrowingArray(returns)
+        self._peak = GrowingArray(peak)
+
+        # Séries dérivées complètes, calculées une fois de façon vectorisée
+        sum_r = rolling_sum(returns, window)
+        sum_r2 = rolling_sum(returns ** 2, window)
+        self._rolling_return = GrowingArray(np.expm1(sum_r) * 100)
+        self._rolling_vol = GrowingArray(self._volatility(sum_r, sum_r2))
+        self._drawdown = GrowingArray((values / peak - 1) * 100)
+        self._resync()
+
+    def _volatility(self, sum_r, sum_r2):
+        var = (sum_r2 - sum_r ** 2 / self.window) / (self.window - 1)
+        return np.sqrt(np.clip(var, 0, None) * TRADING_DAYS) * 100
+
+    def _resync(self):
+        """Recalcule exactement l'état des fenêtres à partir des rendements stockés"""
+        returns = self._returns.view()
+        recent = returns[-self.window:]
+        self._sum_r = recent.sum(axis=0)
+        self._sum_r2 = (recent ** 2).sum(axis=0)
+        corr_recent = returns[-self.corr_window:]
+        self._corr_sum = corr_recent.sum(axis=0)
+        self._corr_cross = corr_recent.T @ corr_recent
+        self._since_resync = 0
+
+    def _apply(self, r, sign):
+        """Ajoute (sign=1) ou retire (sign=-1) la contribution d'un rendement en fin de fenêtre"""
+        returns = self._returns.view()
+        n = len(returns)
+        # Rendements qui sortent de chaque fenêtre (ou y reviennent quand on retire la dernière barre)
+        leaving = returns[n - self.window - 1]
+        corr_leaving = returns[n - self.corr_window - 1]
+        self._sum_r += sign * (r - leaving)
+        self._sum_r2 += sign * (r ** 2 - leaving ** 2)
+        self._corr_sum += sign * (r - corr_leaving)
+        self._corr_cross += sign * (np.outer(r, r) - np.outer(corr_leaving, corr_leaving))
+
+    def _append_row(self, date, row):
+        last = self._prices.view()[-1]
+        row = np.where(np.isnan(row), last, row)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r = np.nan_to_num(np.log(row / last), nan=0.0, posinf=0.0, neginf=0.0)
+        peak = np.fmax(self._peak.view()[-1], row)
+        self._dates.append(date)
+        self._prices.append(row)
+        self._returns.append(r)
+        self._peak.append(peak)
+        self._apply(r, 1)
+        self._rolling_return.append(np.expm1(self._sum_r) * 100)
+        self._rolling_vol.append(self._volatility(self._sum_r, self._sum_r2))
+        self._drawdown.append((row / peak - 1) * 100)
+        self._since_resync += 1
+        if self._since_resync >= self.resync_every:
+            self._resync()
+
+    def _pop_row(self):
+        r = self._returns.view()[-1].copy()
+        self._apply(r, -1)
+        for array in (self._prices, self._returns, self._peak, self._rolling_return, self._rolling_vol, self._drawdown):
+            array.pop()
+        return self._dates.pop()
+
+    def update(self, prices, source_version=None):
+        """Intègre les nouvelles barres d'un DataFrame large (mêmes colonnes).
+
+        Les dates postérieures à la dernière date connue sont ajoutées ; une
+        barre à la dernière date connue remplace celle-ci (correction ou barre
+        du jour encore en cours). Renvoie le nombre de barres intégrées.
+        """
+        prices = prices.reindex(columns=self.symbols).sort_index()
+        with self._lock:
+            if source_version is not None:
+                self.source_version = source_version
+            last_date = self._dates[-1]
+            prices = prices[prices.index >= last_date]
+            applied = 0
+            for date, row in zip(prices.index, prices.to_numpy(dtype='float64')):
+                if date == last_date:
+                    if np.allclose(row, self._prices.view()[-1], equal_nan=True):
+                        continue
+                    self._pop_row()
+                self._append_row(date, row)
+                applied += 1
+            return applied
+
+    def _frame(self, array, start=None):
+        with self._lock:
+            frame = pd.DataFrame(array.view().copy(), index=pd.DatetimeIndex(self._dates, name='date'), columns=self.symbols)
+        return frame if start is None else frame[frame.index >= pd.Timestamp(start)]
+
+    def rolling_returns(self, start=None):
+        """Rendement cumulé sur la fenêtre, en %"""
+        return self._frame(self._rolling_return, start)
+
+    def rolling_volatility(self, start=None):
+        """Volatilité réalisée annualisée sur la fenêtre, en %"""
+        return self._frame(self._rolling_vol, start)
+
+    def drawdowns(self, start=None):
+        """Écart au plus haut historique, en %"""
+        return self._frame(self._drawdown, start)
+
+    def correlation(self, rows=None, columns=None):
+        """Matrice de corrélation des rendements sur ``corr_window`` barres (bloc rows × columns)"""
+        with self._lock:
+            n = self.corr_window
+            cov = (self._corr_cross - np.outer(self._corr_sum, self._corr_sum) / n) / (n - 1)
+        std = np.sqrt(np.clip(np.diag(cov), 0, None))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = cov / np.outer(std, std)
+        matrix = pd.DataFrame(np.clip(corr, -1, 1), index=self.symbols, columns=self.symbols)
+        return matrix.loc[rows or self.symbols, columns or self.symbols]
+
+    @property
+    def last_date(self):
+        return self._dates[-1]
@@ -0,0 +1,1313 @@
+# benchmarks.py
+"""Benchmarks des chemins de données du dashboard, sans accès réseau.
+
+Usage : python benchmarks.py <benchmark> [options]
+Les résultats sont imprimés en JSON sur la sortie standard.
+"""
+import argparse
+import ast
+import json
+import multiprocessing
+import os
+import pickle
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from alerts import ABSOLUTE_KINDS, KINDS, AlertEngine, AlertRule
+from analytics import RollingAnalytics
+from caching import TTLCache
+from crossrates import CrossRates, usd_per_unit
+from cards import CATEGORY_CARD_CLASSES, CardCache, RankedQuotes, currency_cards
+from fetching import ConcurrentFetcher, normalize_ohlc
+from frames import build_history_frame, build_quote_frame, derive_quote
+from history_store import HistoryStore
+from instrumentation import Metrics
+from portfolio import PortfolioEngine
+from price_matrix import PriceMatrix
+from providers import ReplayProvider
+from resampling import ChartData, candlestick_figure, line_figure
+from refresh import Snapshot
+from risk import RiskEngine
+from snapshot_service import SnapshotPublisher, SnapshotReader
+from streaming import SimulatedTickSource, TickStore, overlay_ticks
+from universe import Universe
+
+DASHBOARD_SYMBOLS = [
+    'EURUSD=X', 'GBPUSD=X', 'JPY=X', 'CHF=X', 'CAD=X', 'AUD=X', 'CNY=X', 'NZD=X', 'SEK=X',
+    'NOK=X', 'MXN=X', 'SGD=X', 'HKD=X', 'INR=X', 'ZAR=X', 'TRY=X', 'RUB=X', 'BRL=X',
+    'BZ=F', 'CL=F', 'NG=F', 'GC=F', 'SI=F', 'HG=F', 'ZW=F', 'ZC=F', 'ZS=F', 'SB=F', 'KC=F',
+    'BTC-USD', 'ETH-USD',
+]
+
+
+def synthetic_ohlc(symbol, start='2020-01-01', end=None, seed=None):
+    """Génère une série OHLC journalière plausible (marche aléatoire géométrique)"""
+    end = end or pd.Timestamp.today().strftime('%Y-%m-%d')
+    dates = pd.bdate_range(start, end, inclusive='left', name='Date')
+    rng = np.random.default_rng(seed if seed is not None else zlib.crc32(symbol.encode()))
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates))))
+    spread = np.abs(rng.normal(0, 0.005, len(dates))) * close
+    return pd.DataFrame({
+        'Open': close * (1 + rng.normal(0, 0.002, len(dates))),
+        'High': close + spread,
+        'Low': close - spread,
+        'Close': close,
+        'Volume': rng.integers(0, 1_000_000, len(dates)).astype('float64'),
+    }, index=dates)
+
+
+class LazyFixture(dict):
+    """Fixture synthétique généré à la première demande de chaque symbole"""
+
+    def __missing__(self, symbol):
+        self[symbol] = synthetic_ohlc(symbol)
+        return self[symbol]
+
+
+def load_fixture(symbols, fixture_dir=None):
+    """Charge un fixture enregistré (répertoire d'un HistoryStore) ou en génère un synthétique"""
+    if fixture_dir:
+        store = HistoryStore(fixture_dir, fetcher=lambda *args: None)
+        return {symbol: store.load(symbol) for symbol in symbols}
+    return {symbol: synthetic_ohlc(symbol) for symbol in symbols}
+
+
+class FixtureSource:
+    """Fausse source servant un fixture avec latence, erreurs et symboles lents simulés"""
+
+    def __init__(self, fixture, round_trip=0.25, per_symbol=0.005, error_rate=0.0, slow_symbols=(), slow_latency=30.0, seed=0):
+        self.fixture = fixture
+        self.round_trip = round_trip
+        self.per_symbol = per_symbol
+        self.error_rate = error_rate
+        self.slow_symbols = set(slow_symbols)
+        self.slow_latency = slow_latency
+        self.calls = 0
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+
+    def _slice(self, symbol, start, end):
+        try:
+            data = self.fixture[symbol]
+        except KeyError:
+            return None
+        return data.loc[(data.index >= pd.Timestamp(start)) & (data.index < pd.Timestamp(end))]
+
+    def fetch(self, symbol, start, end):
+        self.calls += 1
+        time.sleep(self.round_trip + self.per_symbol)
+        return self._slice(symbol, start, end)
+
+    def fetch_quote(self, symbol, timeout):
+        """Équivalent de Ticker.history(period='5d')"""
+        with self._lock:
+            self.calls += 1
+            jitter = self._rng.exponential(self.round_trip)
+            failing = self._rng.random() < self.error_rate
+        # Un symbole lent bloque vraiment : seul le timeout du fetcher libère le worker
+        time.sleep(self.slow_latency if symbol in self.slow_symbols else jitter)
+        if failing:
+            raise ConnectionError(f'{symbol} : erreur simulée')
+        return self.fixture[symbol].iloc[-5:]
+
+    def fetch_batch(self, symbols, start, end):
+        self.calls += 1
+        time.sleep(self.round_trip + self.per_symbol * len(symbols))
+        frames = {symbol: self._slice(symbol, start, end) for symbol in symbols}
+        frames = {symbol: data for symbol, data in frames.items() if data is not None}
+        return pd.concat(frames, axis=1)  # colonnes (Ticker, Price) comme group_by='ticker'
+
+
+def bench_batch_download(args):
+    """Démarrage à froid : boucle symbole par symbole contre téléchargement groupé"""
+    fixture = load_fixture(DASHBOARD_SYMBOLS, args.fixture)
+    end = pd.Timestamp.today().strftime('%Y-%m-%d')
+    results = {}
+    for mode in ('per_symbol', 'batched'):
+        source = FixtureSource(fixture, args.round_trip, args.per_symbol)
+        with tempfile.TemporaryDirectory() as root:
+            if mode == 'batched':
+                store = HistoryStore(root, fetcher=source.fetch, batch_fetcher=source.fetch_batch)
+            else:
+                store = HistoryStore(root, fetcher=source.fetch)
+            t0 = time.perf_counter()
+            frames, failed = store.update_many(DASHBOARD_SYMBOLS, end=end)
+            elapsed = time.perf_counter() - t0
+        results[mode] = {'seconds': round(elapsed, 4), 'calls': source.calls,
+                         'symbols': len(frames) - len(failed), 'failed': failed}
+    results['speedup'] = round(results['per_symbol']['seconds'] / results['batched']['seconds'], 2)
+    return results
+
+
+def synthetic_universe(n_symbols, years):
+    """Univers synthétique : instruments au format define_currencies et historiques OHLC"""
+    start = (pd.Timestamp.today() - pd.DateOffset(years=years)).strftime('%Y-%m-%d')
+    regions = ['Europe', 'Asie', 'Amérique', 'Océanie', 'Afrique', 'Moyen-Orient']
+    instruments, histories = {}, {}
+    for i in range(n_symbols):
+        symbol = f'SYM{i:04d}=X'
+        instruments[f'SYM{i:04d}'] = {'pays': f'Pays {i}', 'symbole': f'SYM{i:04d}',
+                                      'region': regions[i % len(regions)], 'yfinance_symbol': symbol}
+        histories[symbol] = synthetic_ohlc(symbol, start=start, seed=i)
+    return instruments, histories
+
+
+def legacy_history_frame(histories, instruments):
+    """Reproduction de l'ancien chargeur : iterrows() et un dict par barre"""
+    all_data = []
+    for symbole, info in instruments.items():
+        data = histories[info['yfinance_symbol']].reset_index()
+        for _, row in data.iterrows():
+            close_price = row['Close']
+            if pd.notna(close_price):
+                all_data.append({
+                    'date': row['Date'],
+                    'symbole': symbole,
+                    'pays': info['pays'],
+                    'region': info['region'],
+                    'taux_usd': close_price,
+                    'volatilite_jour': ((row['High'] - row['Low']) / close_price) * 100 if close_price != 0 else 0
+                })
+    return pd.DataFrame(all_data)
+
+
+def _measure_in_child(queue, builder, histories, instruments):
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    frame = builder(histories, instruments)
+    elapsed = time.perf_counter() - t0
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put({'seconds': round(elapsed, 3), 'rows': len(frame),
+               'frame_mb': round(frame.memory_usage(deep=True).sum() / 2**20, 1),
+               'peak_rss_growth_mb': round((rss_after - rss_before) / 1024, 1)})
+
+
+def bench_history_frames(args):
+    """Construction de l'historique long : iterrows() contre pipeline vectorisé (temps et RSS)"""
+    instruments, histories = synthetic_universe(args.symbols, args.years)
+    builders = {
+        'iterrows': legacy_history_frame,
+        'vectorized': lambda h, i: build_history_frame(h, i, 'taux_usd', ['pays', 'region'])[0],
+    }
+    results = {'symbols': args.symbols, 'years': args.years}
+    context = multiprocessing.get_context('fork')
+    for name, builder in builders.items():
+        # Chaque variante tourne dans un processus neuf pour isoler son pic de RSS
+        queue = context.Queue()
+        process = context.Process(target=_measure_in_child, args=(queue, builder, histories, instruments))
+        process.start()
+        results[name] = queue.get()
+        process.join()
+    results['speedup'] = round(results['iterrows']['seconds'] / results['vectorized']['seconds'], 1)
+    return results
+
+
+def bench_cache_concurrency(args):
+    """N sessions concurrentes demandent les mêmes cotations : un seul appel amont attendu"""
+    cache = TTLCache(ttl=30, maxsize=32, name='cotations')
+    upstream_calls = []
+
+    def loader():
+        upstream_calls.append(time.perf_counter())
+        time.sleep(args.round_trip)
+        return pd.DataFrame({'change_pct': np.zeros(len(DASHBOARD_SYMBOLS))})
+
+    barrier = threading.Barrier(args.viewers)
+
+    def viewer():
+        barrier.wait()
+        cache.get_or_load(('forex', tuple(DASHBOARD_SYMBOLS)), loader)
+
+    threads = [threading.Thread(target=viewer) for _ in range(args.viewers)]
+    t0 = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {'viewers': args.viewers, 'upstream_calls': len(upstream_calls),
+            'seconds': round(time.perf_counter() - t0, 4), 'cache': cache.stats()}
+
+
+def bench_concurrent_quotes(args):
+    """Cotations courantes : boucle série contre pool de threads, avec erreurs et un symbole bloqué"""
+    fixture = load_fixture(DASHBOARD_SYMBOLS, args.fixture)
+    results = {}
+    for name, workers in (('serial', 1), ('concurrent', 8)):
+        source = FixtureSource(fixture, args.round_trip, error_rate=0.1, slow_symbols=['RUB=X'])
+        fetcher = ConcurrentFetcher(source.fetch_quote, max_workers=workers, timeout=1.0, deadline=5.0,
+                                    retries=2, backoff=0.05)
+        t0 = time.perf_counter()
+        report = fetcher.fetch_all(DASHBOARD_SYMBOLS)
+        results[name] = {'seconds': round(time.perf_counter() - t0, 3), 'calls': source.calls,
+                         'ok': len(report['results']), 'stale': report['stale'], 'failed': report['failed']}
+    return results
+
+
+def legacy_current_quote(hist):
+    """Reproduction de l'ancien calcul de initialize_current_forex_data sur Ticker.history(period="5d")"""
+    last_close = hist['Close'].iloc[-1]
+    prev_close = hist['Close'].iloc[-2]
+    return {
+        'last_close': last_close,
+        'change_pct': ((last_close - prev_close) / prev_close) * 100 if prev_close != 0 else 0,
+        'volatilite': hist['Close'].pct_change().std() * 100,
+        'volume_jour': hist['Volume'].iloc[-1],
+    }
+
+
+def bench_quote_consistency(args):
+    """Vérifie que les cotations dérivées de l'historique égalent l'ancien calcul sur 5 jours (code de sortie 1 sinon)"""
+    fixture = load_fixture(DASHBOARD_SYMBOLS, args.fixture)
+    end = pd.Timestamp.today().strftime('%Y-%m-%d')
+    # Le fixture sans sa dernière barre joue l'historique de la veille, la dernière barre arrive au top-up
+    source = FixtureSource({s: data.iloc[:-1] for s, data in fixture.items()}, round_trip=0, per_symbol=0)
+    with tempfile.TemporaryDirectory() as root:
+        store = HistoryStore(root, fetcher=source.fetch, batch_fetcher=source.fetch_batch)
+        store.update_many(DASHBOARD_SYMBOLS, end=end)
+        source.fixture = fixture
+        t0 = time.perf_counter()
+        histories, _ = store.update_many(DASHBOARD_SYMBOLS, end=end, max_age=0, overlap_days=0)
+        top_up_seconds = time.perf_counter() - t0
+
+    max_diff, mismatches = {}, {}
+    for symbol in DASHBOARD_SYMBOLS:
+        legacy = legacy_current_quote(fixture[symbol].iloc[-5:])
+        derived = derive_quote(histories[symbol])
+        for field, value in legacy.items():
+            diff = abs(float(value) - float(derived[field])) if derived else float('inf')
+            max_diff[field] = max(max_diff.get(field, 0.0), diff)
+            if not diff <= 1e-9:
+                mismatches.setdefault(symbol, []).append(field)
+    return {'symbols': len(DASHBOARD_SYMBOLS), 'top_up_seconds': round(top_up_seconds, 4),
+            'max_abs_diff': max_diff, 'mismatches': mismatches, 'match': not mismatches}
+
+
+def bench_manifest_recovery(args):
+    """Manifeste supprimé : update_many reconstruit les entrées au premier appel et repart à chaud (code 1 sinon)"""
+    fixture = load_fixture(DASHBOARD_SYMBOLS, args.fixture)
+    end = (pd.Timestamp.today() + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+    source = FixtureSource(fixture, round_trip=0, per_symbol=0)
+    with tempfile.TemporaryDirectory() as root:
+        HistoryStore(root, fetcher=source.fetch, batch_fetcher=source.fetch_batch).update_many(DASHBOARD_SYMBOLS, end=end)
+        os.remove(os.path.join(root, HistoryStore.MANIFEST))
+        # Nouveau processus : le manifeste est relu (absent), les partitions restent sur disque
+        store = HistoryStore(root, fetcher=source.fetch, batch_fetcher=source.fetch_batch)
+        calls, errors, frames = [], [], {}
+        for _ in range(2):
+            calls_before = source.calls
+            try:
+                frames, _ = store.update_many(DASHBOARD_SYMBOLS, end=end, max_age=0)
+            except Exception as exc:
+                errors.append(f'{type(exc).__name__}: {exc}')
+            calls.append(source.calls - calls_before)
+        rebuilt = HistoryStore(root, fetcher=source.fetch)._manifest
+    mismatches = [symbol for symbol in DASHBOARD_SYMBOLS
+                  if symbol not in rebuilt or symbol not in frames or not frames[symbol].equals(normalize_ohlc(fixture[symbol]))]
+    return {'symbols': len(DASHBOARD_SYMBOLS), 'appels_fournisseur': calls, 'erreurs': errors,
+            'entrees_reconstruites': len(rebuilt), 'mismatches': mismatches, 'match': not errors and not mismatches}
+
+
+def synthetic_closes(n_series, start='2020-01-01'):
+    """Matrice large de clôtures synthétiques (jours ouvrés × séries)"""
+    dates = pd.bdate_range(start, pd.Timestamp.today(), inclusive='left', name='date')
+    rng = np.random.default_rng(n_series)
+    values = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (len(dates), n_series)), axis=0))
+    return pd.DataFrame(values, index=dates, columns=[f'S{i:04d}' for i in range(n_series)])
+
+
+def full_recompute(prices, window=20, corr_window=60):
+    """Recalcul complet pandas de l'analytique, référence non incrémentale"""
+    returns = np.log(prices).diff()
+    volatility = returns.rolling(window).std() * np.sqrt(252) * 100
+    rolling_return = np.expm1(returns.rolling(window).sum()) * 100
+    drawdown = (prices / prices.cummax() - 1) * 100
+    corr = returns.iloc[-corr_window:].corr()
+    return volatility, rolling_return, drawdown, corr
+
+
+def bench_rolling_analytics(args):
+    """Analytique glissante : construction, ajout incrémental d'une barre et recalcul complet"""
+    results = {}
+    for n_series in (31, 1000):
+        prices = synthetic_closes(n_series)
+        history, new_bars = prices.iloc[:-args.bars], prices.iloc[-args.bars:]
+        t0 = time.perf_counter()
+        engine = RollingAnalytics(history)
+        build = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for i in range(args.bars):
+            engine.update(new_bars.iloc[i:i + 1])
+            engine.correlation()
+        incremental = (time.perf_counter() - t0) / args.bars
+        t0 = time.perf_counter()
+        full_recompute(prices)
+        recompute = time.perf_counter() - t0
+        results[n_series] = {'bars': len(prices), 'build_seconds': round(build, 4),
+                             'append_bar_ms': round(incremental * 1000, 3),
+                             'full_recompute_ms': round(recompute * 1000, 3),
+                             'speedup_per_bar': round(recompute / incremental, 1)}
+    return results
+
+
+def bench_price_matrix(args):
+    """Mémoire et accès : historique long (objets, catégoriel) contre matrice dense"""
+    results = {}
+    for n_symbols in (31, 2000):
+        instruments, histories = synthetic_universe(n_symbols, args.years)
+        symbols = {key: info['yfinance_symbol'] for key, info in instruments.items()}
+        long_frame, _ = build_history_frame(histories, instruments, 'taux_usd', ['pays', 'region'])
+        long_object = long_frame.astype({'symbole': object, 'pays': object, 'region': object})
+        matrix = PriceMatrix.from_histories(histories, symbols, fields=('Close', 'High', 'Low'))
+        matrix32 = PriceMatrix.from_histories(histories, symbols, fields=('Close', 'High', 'Low'), dtype='float32')
+        key, date = next(iter(instruments)), matrix.dates[len(matrix.dates) // 2]
+
+        t0 = time.perf_counter()
+        long_frame.loc[long_frame['symbole'] == key, 'taux_usd'].to_numpy()
+        long_frame.loc[long_frame['date'] == date, 'taux_usd'].to_numpy()
+        long_access = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        matrix.series(key)
+        matrix.cross_section(date)
+        matrix_access = time.perf_counter() - t0
+
+        results[n_symbols] = {
+            'rows': len(long_frame),
+            'long_object_mb': round(long_object.memory_usage(deep=True).sum() / 2**20, 1),
+            'long_categorical_mb': round(long_frame.memory_usage(deep=True).sum() / 2**20, 1),
+            'matrix_float64_mb': round(matrix.nbytes / 2**20, 1),
+            'matrix_float32_mb': round(matrix32.nbytes / 2**20, 1),
+            'series_and_cross_section_us': {'long': round(long_access * 1e6, 1), 'matrix': round(matrix_access * 1e6, 1)},
+        }
+    results['note'] = 'Matrices avec Close, High et Low ; le format long ne garde que Close et la volatilité'
+    return results
+
+
+def synthetic_universe_config(n_instruments, group_size=15):
+    """Configuration d'univers : moitié devises, moitié commodities, groupes de ``group_size``"""
+    half = n_instruments // 2
+    devises = {f'C{i:04d}': {'pays': f'Pays {i}', 'drapeau': '🏳️', 'yfinance_symbol': f'C{i:04d}=X',
+                             'region': f'Région {i // group_size}'} for i in range(half)}
+    commodities = {f'M{i:04d}': {'nom': f'Contrat {i}', 'categorie': f'Catégorie {i // group_size}', 'unite': 'USD',
+                                 'yfinance_symbol': f'M{i:04d}=F'} for i in range(n_instruments - half)}
+    return {'devises': devises, 'commodities': commodities, 'indices': {},
+            'defauts': {'regions': ['Région 0'], 'categories': ['Catégorie 0']}}
+
+
+def bench_universe_startup(args):
+    """Démarrage à froid selon la taille de l'univers : chargement paresseux des groupes visibles"""
+    end = pd.Timestamp.today().strftime('%Y-%m-%d')
+    results = {}
+    for size in (31, 250, 1000, 2000):
+        config = synthetic_universe_config(size)
+        source = FixtureSource(LazyFixture(), args.round_trip, args.per_symbol)
+        with tempfile.TemporaryDirectory() as root:
+            store = HistoryStore(root, fetcher=source.fetch, batch_fetcher=source.fetch_batch)
+            t0 = time.perf_counter()
+            universe = Universe(config)
+            visible = {**universe.select_currencies(universe.default_regions),
+                       **universe.select_commodities(universe.default_categories)}
+            universe.touch(list(visible))
+            frames, failed = store.update_many([info['yfinance_symbol'] for info in visible.values()], end=end)
+            elapsed = time.perf_counter() - t0
+        results[size] = {'visible': len(visible), 'seconds': round(elapsed, 4), 'calls': source.calls}
+    return results
+
+
+def record_fixture(root, histories, levels):
+    """Écrit un enregistrement au format de RecordingProvider (historique + niveaux d'indices)"""
+    store = HistoryStore(os.path.join(root, 'historique'), fetcher=lambda *args: None)
+    for symbol, data in histories.items():
+        store.write(symbol, data, save_manifest=False)
+    store._write_manifest()
+    with open(os.path.join(root, 'indices.json'), 'w', encoding='utf-8') as f:
+        json.dump(levels, f)
+
+
+def _timed(function, repeat=1):
+    """Exécute ``function`` ``repeat`` fois ; renvoie (dernier résultat, durée médiane en s)"""
+    durations = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = function()
+        durations.append(time.perf_counter() - t0)
+    return result, round(float(np.median(durations)), 6)
+
+
+DASHBOARD_TABS = ("🌍 Macro", "📈 Analytique", "⚠️ Risques", "💼 Portefeuille", "💡 Insights", "ℹ️ À Propos")
+
+
+def _dashboard_stages_child(queue, regions, categories, timeout):
+    """Session AppTest instrumentée : un run par onglet, durées relevées par les spans ``timed()`` du dashboard"""
+    from instrumentation import METRICS
+    from streamlit.testing.v1 import AppTest
+
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Dashboard.py')
+    session = AppTest.from_file(path, default_timeout=timeout)
+    session.session_state['regions_visibles'] = regions
+    session.session_state['categories_visibles'] = categories
+    runs, errors = {}, []
+    for tab in DASHBOARD_TABS:
+        session.session_state['onglet'] = tab
+        t0 = time.perf_counter()
+        session.run()
+        runs[tab] = round(time.perf_counter() - t0, 4)
+        errors.extend(str(exception.value) for exception in session.exception)
+    spans = {row['span']: {'appels': row['appels'], 'total_s': round(row['total_s'], 4),
+                           'p50_ms': round(row['p50_ms'], 2), 'max_ms': round(row['max_ms'], 2)}
+             for row in METRICS.histograms() if row['mesure'] == 'span_seconds'}
+    queue.put({'runs_seconds': runs, 'spans': dict(sorted(spans.items())), 'errors': errors[:5]})
+
+
+def bench_dashboard_stages(args):
+    """Durée des méthodes du dashboard selon la taille de l'univers : une session AppTest par taille,
+    spans ``timed()`` collectés avec ``DASHBOARD_METRICS=1`` contre un fournisseur rejoué"""
+    end = (pd.Timestamp.today() + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+    indices = Universe.load().indices
+    results = {}
+    for size in args.sizes:
+        config = {**synthetic_universe_config(size), 'indices': indices}
+        universe = Universe(config)
+        tickers = [info['yfinance_symbol'] for info in {**universe.currencies, **universe.commodities}.values()]
+        with tempfile.TemporaryDirectory() as root:
+            recording = os.path.join(root, 'enregistrement')
+            record_fixture(recording, {ticker: synthetic_ohlc(ticker, end=end)
+                                       for ticker in tickers + list(indices.values())},
+                           {ticker: 1000.0 for ticker in indices.values()})
+            with open(os.path.join(root, 'univers.json'), 'w', encoding='utf-8') as f:
+                json.dump(config, f, ensure_ascii=False)
+            environment = {'DASHBOARD_PROVIDER': f'replay:{recording}',
+                           'DASHBOARD_REPLAY_LATENCY': str(args.round_trip),
+                           'DASHBOARD_DATA_DIR': os.path.join(root, 'cache'),
+                           'DASHBOARD_UNIVERSE': os.path.join(root, 'univers.json'),
+                           'DASHBOARD_METRICS': '1'}
+            saved = {key: os.environ.get(key) for key in environment}
+            os.environ.update(environment)
+            try:
+                # Processus neuf par taille : mesures, caches Streamlit et cache disque vides
+                context = multiprocessing.get_context('spawn')
+                queue = context.Queue()
+                process = context.Process(target=_dashboard_stages_child,
+                                          args=(queue, universe.regions(), universe.categories(), 300))
+                process.start()
+                results[size] = queue.get()
+                process.join()
+            finally:
+                for key, value in saved.items():
+                    if value is None:
+                        os.environ.pop(key, None)
+                    else:
+                        os.environ[key] = value
+    return {'round_trip': args.round_trip, 'sizes': results}
+
+
+def _percentiles(values):
+    values = np.asarray(values)
+    if not len(values):
+        return {}
+    return {'p50': round(float(np.percentile(values, 50)), 4), 'p95': round(float(np.percentile(values, 95)), 4),
+            'max': round(float(values.max()), 4)}
+
+
+def _load_test_child(queue, viewers, reruns, timeout):
+    """Sessions AppTest concurrentes dans un même processus serveur (caches partagés)"""
+    import providers
+    from streamlit.testing.v1 import AppTest
+
+    created = []
+    provider_from_env = providers.provider_from_env
+
+    def capturing_provider_from_env(spec=None):
+        created.append(provider_from_env(spec))
+        return created[-1]
+    providers.provider_from_env = capturing_provider_from_env
+
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Dashboard.py')
+    barrier = threading.Barrier(viewers)
+    first_runs, reruns_seconds, errors = [], [], []
+
+    def viewer():
+        session = AppTest.from_file(path, default_timeout=timeout)
+        barrier.wait()
+        for i in range(reruns + 1):
+            t0 = time.perf_counter()
+            try:
+                session.run()
+            except Exception as exc:
+                errors.append(repr(exc))
+                return
+            (first_runs if i == 0 else reruns_seconds).append(time.perf_counter() - t0)
+            errors.extend(str(exception.value) for exception in session.exception)
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=viewer) for _ in range(viewers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    queue.put({
+        'wall_seconds': round(time.perf_counter() - t0, 3),
+        'first_run': _percentiles(first_runs),
+        'rerun': _percentiles(reruns_seconds),
+        'runs': len(first_runs) + len(reruns_seconds),
+        'errors': errors[:10],
+        'error_count': len(errors),
+        'provider_calls': sum(provider.calls for provider in created if hasattr(provider, 'calls')),
+    })
+
+
+def bench_load_test(args):
+    """Test de charge : N sessions headless qui relancent le script contre un fournisseur rejoué"""
+    universe = Universe.load()
+    tickers = [info['yfinance_symbol'] for info in {**universe.currencies, **universe.commodities}.values()]
+    end = (pd.Timestamp.today() + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+    with tempfile.TemporaryDirectory() as root:
+        recording = os.path.join(root, 'enregistrement')
+        if args.fixture:
+            recording = args.fixture
+        else:
+            record_fixture(recording, {ticker: synthetic_ohlc(ticker, end=end)
+                                       for ticker in tickers + list(universe.indices.values())},
+                           {ticker: 1000.0 for ticker in universe.indices.values()})
+        environment = {'DASHBOARD_PROVIDER': f'replay:{recording}',
+                       'DASHBOARD_REPLAY_LATENCY': str(args.round_trip),
+                       'DASHBOARD_DATA_DIR': os.path.join(root, 'cache')}
+        saved = {key: os.environ.get(key) for key in environment}
+        os.environ.update(environment)
+        try:
+            # Processus neuf : caches Streamlit vides et répertoire de cache isolé
+            context = multiprocessing.get_context('spawn')
+            queue = context.Queue()
+            process = context.Process(target=_load_test_child, args=(queue, args.viewers, args.reruns, 120))
+            process.start()
+            result = queue.get()
+            process.join()
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+    return {'viewers': args.viewers, 'reruns': args.reruns, 'round_trip': args.round_trip, **result}
+
+
+def bench_instrumentation_overhead(args):
+    """Coût par appel d'une méthode décorée : sans instrumentation, collecte désactivée, activée"""
+    calls = 200_000
+
+    def method(x):
+        return x + 1
+    results = {'calls': calls}
+    variants = {'nue': method,
+                'desactivee': Metrics(enabled=False).timed()(method),
+                'activee': Metrics(enabled=True).timed()(method)}
+    for name, function in variants.items():
+        t0 = time.perf_counter()
+        for i in range(calls):
+            function(i)
+        results[f'{name}_ns_par_appel'] = round((time.perf_counter() - t0) / calls * 1e9, 1)
+    results['surcout_desactivee_ns'] = round(results['desactivee_ns_par_appel'] - results['nue_ns_par_appel'], 1)
+    return results
+
+
+def bench_index_quotes(args):
+    """Indices : appels .info par indice (séquentiels, puis concurrents) contre un appel groupé"""
+    indices = Universe.load().indices
+    symbols = list(indices.values())
+    end = (pd.Timestamp.today() + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+    with tempfile.TemporaryDirectory() as root:
+        recording = args.fixture
+        if not recording:
+            recording = os.path.join(root, 'enregistrement')
+            record_fixture(recording, {symbol: synthetic_ohlc(symbol, end=end) for symbol in symbols},
+                           {symbol: float(synthetic_ohlc(symbol, end=end)['Close'].iloc[-1]) for symbol in symbols})
+        results = {'indices': len(symbols), 'round_trip': args.round_trip}
+        variants = {
+            'info_sequentiel': lambda provider: {symbol: provider.index_level(symbol, 5.0) for symbol in symbols},
+            'info_concurrent': lambda provider: ConcurrentFetcher(
+                fetch=provider.index_level, max_workers=9, timeout=5.0, deadline=10.0).fetch_all(symbols)['results'],
+            'groupe': lambda provider: provider.index_quotes(symbols),
+        }
+        for name, fetch in variants.items():
+            provider = ReplayProvider(recording, latency=args.round_trip, jitter=args.round_trip / 4, seed=1)
+            # Barres lues d'avance : le chemin .info rejoue ses niveaux depuis indices.json, sans lecture
+            # de partition ; seul l'aller-retour simulé et le traitement de la réponse sont mesurés
+            for symbol in symbols:
+                provider._frame(symbol)
+            quotes, seconds = _timed(lambda: fetch(provider), args.repeat)
+            results[name] = {'seconds': seconds, 'calls': provider.calls // args.repeat, 'indices': len(quotes)}
+        # Le chemin groupé fournit aussi la clôture précédente, donc la variation du jour
+        results['variations'] = sum(quote['previous_close'] is not None for quote in quotes.values())
+        results['speedup_vs_sequentiel'] = round(results['info_sequentiel']['seconds'] / results['groupe']['seconds'], 1)
+        results['speedup_vs_concurrent'] = round(results['info_concurrent']['seconds'] / results['groupe']['seconds'], 1)
+    return results
+
+
+def bench_streaming(args):
+    """Flux de ticks : débit du producteur, délai jusqu'à l'abonné, mémoire bornée, coût de superposition"""
+    references = {f'SYM{i:04d}=X': 100.0 + i for i in range(args.symbols)}
+    store = TickStore(capacity=1024)
+    source = SimulatedTickSource(lambda: references, activity=1.0)
+    delays, stop = [], threading.Event()
+
+    def subscriber():
+        version = store.version
+        while not stop.is_set():
+            current = store.wait(version, timeout=0.5)
+            if current != version:
+                delays.append(time.time() - max(tick[0] for tick in store.latest().values()))
+            version = current
+
+    thread = threading.Thread(target=subscriber)
+    thread.start()
+    batches, t0 = 0, time.perf_counter()
+    while time.perf_counter() - t0 < 2.0:
+        store.publish(source())
+        batches += 1
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    thread.join()
+    ticks = sum(len(store.ticks(symbol)[0]) for symbol in references)
+
+    instruments = {symbol[:-2]: {'yfinance_symbol': symbol} for symbol in references}
+    quotes = pd.DataFrame({'symbole': list(instruments), 'taux_usd': list(references.values()),
+                           'cloture_veille': list(references.values()), 'change_pct': 0.0})
+    _, overlay_seconds = _timed(lambda: overlay_ticks(quotes, instruments, 'taux_usd', store.latest()), args.repeat)
+    return {
+        'symbols': args.symbols,
+        'ticks_per_second': round(batches * args.symbols / elapsed),
+        'subscriber_delay_ms': {key: round(value * 1000, 2) for key, value in _percentiles(delays).items()},
+        'buffered_ticks': ticks,
+        'buffer_mb': round(store.nbytes / 2**20, 2),
+        'buffer_bound_mb': round(args.symbols * 1024 * 24 / 2**20, 2),
+        'overlay_seconds': overlay_seconds,
+    }
+
+
+def bench_alert_engine(args):
+    """Moteur d'alertes : débit d'évaluation incrémentale contre un rebalayage complet par règle"""
+    rng = np.random.default_rng(0)
+    n_symbols, n_rules, rounds = args.symbols, 2 * args.symbols, 50
+    symbols = [f'SYM{i:05d}' for i in range(n_symbols)]
+    rules = []
+    for i in range(n_rules):
+        # Quelques règles globales, le reste porte sur un symbole (alertes individuelles)
+        kind = ('variation', 'volatilite', 'zscore')[i % 3]
+        scope = None if i % 100 == 0 else [symbols[rng.integers(n_symbols)]]
+        rules.append(AlertRule(f'r{i}', kind, float(rng.uniform(2.0, 6.0)), symbols=scope, hysteresis=0.0))
+    measures = pd.DataFrame({'symbole': symbols, 'change_pct': rng.normal(0, 1.5, n_symbols),
+                             'volatilite': np.abs(rng.normal(1, 0.8, n_symbols)),
+                             'zscore': rng.normal(0, 1.5, n_symbols)})
+    updates = []
+    for _ in range(rounds):
+        # ~10 % des symboles reçoivent une nouvelle cotation à chaque tour
+        moved = rng.random(n_symbols) < 0.1
+        measures = measures.copy()
+        for column in ('change_pct', 'volatilite', 'zscore'):
+            measures.loc[moved, column] += rng.normal(0, 0.3, moved.sum())
+        updates.append(measures)
+
+    engine = AlertEngine(rules)
+    engine.evaluate(updates[0])
+    t0 = time.perf_counter()
+    for measures in updates[1:]:
+        engine.evaluate(measures)
+    incremental = time.perf_counter() - t0
+
+    def rescan(measures):
+        active = set()
+        positions = {symbol: i for i, symbol in enumerate(measures['symbole'])}
+        for rule in rules:
+            values = measures[KINDS[rule.kind]].to_numpy()
+            if rule.kind in ABSOLUTE_KINDS:
+                values = np.abs(values)
+            if rule.symbols is None:
+                hits = np.flatnonzero(values > rule.threshold)
+                active.update((rule.rule_id, symbols[i]) for i in hits)
+            else:
+                active.update((rule.rule_id, s) for s in rule.symbols if values[positions[s]] > rule.threshold)
+        return active
+
+    t0 = time.perf_counter()
+    for measures in updates[1:]:
+        expected = rescan(measures)
+    full = time.perf_counter() - t0
+    found = {(alert['rule'], alert['symbol']) for alert in engine.active()}
+    return {
+        'symbols': n_symbols, 'rules': n_rules, 'rounds': rounds - 1,
+        'incremental': {'seconds': round(incremental, 4),
+                        'symbol_updates_per_second': round(engine.evaluations / incremental)},
+        'rescan': {'seconds': round(full, 4),
+                   'rule_checks_per_second': round(sum(len(rule.symbols or symbols) for rule in rules)
+                                                   * (rounds - 1) / full)},
+        'speedup': round(full / incremental, 1),
+        'active_alerts': len(found),
+        'match': found == expected,
+    }
+
+
+def legacy_top_cards(data, kind, n=10):
+    """Ancien rendu : nlargest, iterrows() et une f-string par carte"""
+    cards = []
+    for _, row in data.nlargest(n, 'change_pct').iterrows():
+        change_class = "positive" if row['change_pct'] > 0 else "negative" if row['change_pct'] < 0 else "neutral"
+        if kind == 'devise':
+            cards.append(f"""
+                    <div class="currency-card">
+                        <div style="display: flex; align-items: center; margin-bottom: 0.5rem;">
+                            <span style="font-size: 1.5rem; margin-right: 0.5rem;">{row['drapeau']}</span>
+                            <div>
+                                <h4 style="margin: 0; font-size: 1.1rem;">{row['symbole']}</h4>
+                                <p style="margin: 0; opacity: 0.9; font-size: 0.8rem;">{row['pays']}</p>
+                            </div>
+                        </div>
+                        <div class="price-value">${row['taux_usd']:.4f}</div>
+                        <div class="price-change {change_class}">
+                            {row['change_pct']:+.2f}%
+                        </div>
+                    </div>
+                    """)
+        else:
+            card_class = CATEGORY_CARD_CLASSES.get(row['categorie'], 'commodity-card')
+            cards.append(f"""
+                    <div class="{card_class}">
+                        <h4 style="margin: 0; font-size: 1.1rem;">{row['symbole']}</h4>
+                        <p style="margin: 0; opacity: 0.9; font-size: 0.8rem;">{row['nom']}</p>
+                        <div class="price-value">${row['prix']:.2f}</div>
+                        <div class="price-change {change_class}">
+                            {row['change_pct']:+.2f}%
+                        </div>
+                    </div>
+                    """)
+    return cards
+
+
+def render_top_cards(data, kind, rankings, cache, n=10):
+    """Nouveau rendu : classement incrémental de la session puis cartes du cache partagé"""
+    return cache.cards(rankings[kind].top_rows(data, n), kind)
+
+
+def bench_card_rendering(args):
+    """Cartes top 10 : ancien rendu contre classement incrémental + cache, sur des reruns de sessions.
+
+    Chaque session relance ``--reruns`` fois ses fragments entre deux instantanés,
+    où ~5 % des cotations bougent.
+    """
+    rng = np.random.default_rng(0)
+    results = {}
+    for size in args.sizes:
+        forex = pd.DataFrame({'symbole': [f'C{i:04d}' for i in range(size)], 'pays': [f'Pays {i}' for i in range(size)],
+                              'drapeau': '🏳️', 'taux_usd': rng.uniform(0.5, 150, size),
+                              'change_pct': rng.normal(0, 1, size)})
+        frames = [forex]
+        for _ in range(args.repeat):
+            moved = rng.random(size) < 0.05
+            forex = forex.copy()
+            forex.loc[moved, 'change_pct'] += rng.normal(0, 0.2, moved.sum())
+            forex.loc[moved, 'taux_usd'] *= 1 + rng.normal(0, 0.001, moved.sum())
+            frames.append(forex)
+
+        t0 = time.perf_counter()
+        legacy = [legacy_top_cards(frame, 'devise') for frame in frames for _ in range(args.viewers * args.reruns)]
+        legacy_seconds = time.perf_counter() - t0
+        cache = CardCache()
+        sessions = [{'devise': RankedQuotes()} for _ in range(args.viewers)]
+        t0 = time.perf_counter()
+        rendered = [render_top_cards(frame, 'devise', rankings, cache)
+                    for frame in frames for rankings in sessions for _ in range(args.reruns)]
+        cached_seconds = time.perf_counter() - t0
+        _, vectorized_all = _timed(lambda: currency_cards(forex), 3)
+        _, per_row_all = _timed(lambda: legacy_top_cards(forex, 'devise', n=size), 3)
+        renders = len(frames) * args.viewers * args.reruns
+        results[size] = {
+            'renders': renders,
+            'ancien_ms_par_rendu': round(legacy_seconds / renders * 1000, 3),
+            'cache_ms_par_rendu': round(cached_seconds / renders * 1000, 3),
+            'speedup': round(legacy_seconds / cached_seconds, 1),
+            'cache_hit_rate': round(cache.hits / (cache.hits + cache.misses), 3),
+            'toutes_cartes_iterrows_s': per_row_all,
+            'toutes_cartes_vectorise_s': vectorized_all,
+            'identiques': legacy == rendered,
+        }
+    return results
+
+
+def _pyramid_updates(histories, n_bars):
+    """Pyramides construites sans les ``n_bars`` dernières barres, puis complétées barre par barre"""
+    history = {symbol: data.iloc[:-n_bars] for symbol, data in histories.items()}
+    new_bars = {symbol: data.iloc[-n_bars:] for symbol, data in histories.items()}
+    charts, build_seconds = _timed(lambda: ChartData(history))
+    # Comme l'instantané : les 5 dernières barres, dont celle du jour
+    snapshots = [{symbol: data.iloc[max(0, i - 4):i + 1] for symbol, data in new_bars.items()} for i in range(n_bars)]
+    t0 = time.perf_counter()
+    for i, snapshot in enumerate(snapshots):
+        charts.update(snapshot, i)
+    update_seconds = (time.perf_counter() - t0) / n_bars
+    rebuilt, rebuild_seconds = _timed(lambda: ChartData(histories))
+    return charts, build_seconds, update_seconds, rebuilt, rebuild_seconds
+
+
+def bench_chart_payload(args):
+    """Graphiques depuis 2020 : payload JSON et temps de construction, complet contre LTTB / pyramide OHLC"""
+    import plotly.express as px
+    results = {'courbes': {}}
+    for n_series in (6, 31, 100):
+        frame = synthetic_closes(n_series)
+        full, full_seconds = _timed(
+            lambda: px.line(frame, labels={'value': '%', 'variable': 'Instrument'}).to_json(), 3)
+        reduced, reduced_seconds = _timed(lambda: line_figure(frame).to_json(), 3)
+        results['courbes'][n_series] = {
+            'points_par_serie': len(frame), 'payload_complet_ko': round(len(full) / 1024, 1),
+            'payload_lttb_ko': round(len(reduced) / 1024, 1), 'rendu_complet_ms': round(full_seconds * 1000, 1),
+            'rendu_lttb_ms': round(reduced_seconds * 1000, 1)}
+
+    histories = {symbol: synthetic_ohlc(symbol) for symbol in DASHBOARD_SYMBOLS}
+    charts, build_seconds, update_seconds, rebuilt, rebuild_seconds = _pyramid_updates(histories, args.bars)
+    # Historique 5 fois plus long : la mise à jour ne doit pas en dépendre, la reconstruction si
+    long_histories = {symbol: synthetic_ohlc(symbol, start='1996-01-01') for symbol in DASHBOARD_SYMBOLS}
+    _, _, long_update_seconds, _, long_rebuild_seconds = _pyramid_updates(long_histories, args.bars)
+    daily = histories['GC=F']
+    full, full_seconds = _timed(lambda: candlestick_figure(daily).to_json(), 3)
+    (level, bars), select_seconds = _timed(lambda: charts.bars('GC=F'), 3)
+    reduced, reduced_seconds = _timed(lambda: candlestick_figure(bars).to_json(), 3)
+    results['chandeliers'] = {
+        'barres_jour': len(daily), 'niveau_depuis_2020': level, 'barres_affichees': len(bars),
+        'payload_complet_ko': round(len(full) / 1024, 1), 'payload_pyramide_ko': round(len(reduced) / 1024, 1),
+        'rendu_complet_ms': round(full_seconds * 1000, 1),
+        'rendu_pyramide_ms': round((select_seconds + reduced_seconds) * 1000, 1),
+        'construction_pyramides_s': round(build_seconds, 4),
+        'mise_a_jour_par_barre_ms': round(update_seconds * 1000, 3),
+        'reconstruction_ms': round(rebuild_seconds * 1000, 3),
+        'mise_a_jour_par_barre_depuis_1996_ms': round(long_update_seconds * 1000, 3),
+        'reconstruction_depuis_1996_ms': round(long_rebuild_seconds * 1000, 3),
+        'identique_reconstruction': all(
+            np.array_equal(charts.pyramids[symbol].values[level], rebuilt.pyramids[symbol].values[level], equal_nan=True)
+            and np.array_equal(charts.pyramids[symbol].dates[level], rebuilt.pyramids[symbol].dates[level])
+            for symbol in histories for level in rebuilt.pyramids[symbol].dates),
+        'memoire_pyramides_ko': round(charts.nbytes / 1024, 1)}
+    return results
+
+
+def naive_cross_rates(quotes, tickers):
+    """Ancienne approche : une boucle Python par couple de devises, pour une date"""
+    usd = {'USD': 1.0}
+    for symbol, quote in quotes.items():
+        usd[symbol] = quote if usd_per_unit(tickers[symbol]) else 1.0 / quote
+    return [[usd[base] / usd[quote] for quote in usd] for base in usd]
+
+
+def bench_cross_rates(args):
+    """Matrice des cours croisés : broadcast sur tout l'historique contre boucle par couple et par date"""
+    results = {}
+    for n_currencies in (18, 150):
+        prices = synthetic_closes(n_currencies)
+        # Un tiers coté en dollars par unité (EURUSD=X), le reste en unités par dollar (JPY=X)
+        tickers = {symbol: f'{symbol}USD=X' if i % 3 == 0 else f'{symbol}=X' for i, symbol in enumerate(prices.columns)}
+        history, new_bars = prices.iloc[:-args.bars], prices.iloc[-args.bars:]
+        engine, build_seconds = _timed(lambda: CrossRates(history, tickers))
+        t0 = time.perf_counter()
+        for i in range(args.bars):
+            engine.update(new_bars.iloc[i:i + 1], i)
+            engine.change_matrix()
+        update_seconds = (time.perf_counter() - t0) / args.bars
+        (dates, cross, change), tensor_seconds = _timed(lambda: engine.tensors(), 1)
+        sample = np.linspace(0, len(prices) - 1, min(args.repeat, len(prices))).astype(int)
+        t0 = time.perf_counter()
+        naive = [naive_cross_rates(prices.iloc[i].to_dict(), tickers) for i in sample]
+        naive_per_date = (time.perf_counter() - t0) / len(sample)
+        results[n_currencies] = {
+            'dates': len(dates), 'devises': len(engine.currencies),
+            'tenseurs_historique_s': tensor_seconds,
+            'tenseurs_mo': round((cross.nbytes + change.nbytes) / 2**20, 1),
+            'broadcast_par_date_ms': round(tensor_seconds / len(dates) * 1000, 4),
+            'boucle_par_date_ms': round(naive_per_date * 1000, 4),
+            'speedup': round(naive_per_date * len(dates) / tensor_seconds, 1),
+            'construction_s': build_seconds,
+            'barre_incrementale_ms': round(update_seconds * 1000, 3),
+            'identiques': all(np.allclose(cross[i], matrix) for i, matrix in zip(sample, naive)),
+        }
+        del cross, change
+    return results
+
+
+def bench_risk_engine(args):
+    """Moteur de risque : VaR / CVaR, stress tests Monte Carlo (--paths trajectoires) et résultats mémorisés"""
+    prices = synthetic_closes(31)
+    groups = {symbol: ('Énergie', 'Europe', 'Asie', 'Crypto')[i % 4] for i, symbol in enumerate(prices.columns)}
+    engine, build_seconds = _timed(lambda: RiskEngine(prices.iloc[:-1], groups))
+    _, var_seconds = _timed(lambda: (engine.var_table(0.99, 10), engine.group_var_table(0.99, 10)))
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results, stress_seconds = _timed(lambda: engine.stress_tests(args.paths, horizon=20, level=0.99))
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    _, memo_seconds = _timed(lambda: engine.stress_tests(args.paths, horizon=20, level=0.99), args.repeat)
+    engine.update(prices.iloc[-1:])
+    _, invalidated_seconds = _timed(lambda: engine.var_table(0.99, 10))
+    return {
+        'instruments': len(engine.symbols), 'trajectoires': args.paths, 'horizon_jours': 20,
+        'scenarios': list(results),
+        'construction_s': build_seconds,
+        'var_cvar_s': var_seconds,
+        'stress_tests_s': stress_seconds,
+        'par_scenario_s': round(stress_seconds / len(results), 3),
+        'memoire_supplementaire_mo': round((rss_after - rss_before) / 1024, 1),
+        'resultat_memorise_ms': round(memo_seconds * 1000, 4),
+        'apres_nouvelle_barre_s': invalidated_seconds,
+        'portefeuille_recession_var_pct': round(float(results['Récession'].loc['Portefeuille', 'var']), 2),
+    }
+
+
+def dashboard_imports():
+    """Modules importés au chargement de Dashboard.py (imports de niveau module uniquement)"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Dashboard.py')
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def import_seconds(modules, repeat=5):
+    """Durée médiane d'import de ``modules`` dans un interpréteur neuf"""
+    code = ('import time; t0 = time.perf_counter()\n' + ''.join(f'import {module}\n' for module in modules)
+            + 'print(time.perf_counter() - t0)')
+    root = os.path.dirname(os.path.abspath(__file__))
+    durations = [float(subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True,
+                                      check=True).stdout) for _ in range(repeat)]
+    return round(float(np.median(durations)), 3)
+
+
+def _cold_start_child(queue, timeout):
+    """Premier run d'une session AppTest : instant où l'en-tête et les cotations sont émis"""
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    marks = {}
+    t0 = time.perf_counter()
+
+    def marking(name, element):
+        def wrapper(*args, **kwargs):
+            marks.setdefault(name, time.perf_counter() - t0)
+            return element(*args, **kwargs)
+        return wrapper
+    # Les métriques clés sont la dernière section au-dessus des onglets ; le message de chargement les remplace
+    st.metric = marking('cotations', st.metric)
+    st.info = marking('chargement', st.info)
+    st.tabs = marking('onglets', st.tabs)
+
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Dashboard.py')
+    session = AppTest.from_file(path, default_timeout=timeout)
+    t0 = time.perf_counter()
+    session.run()
+    total = time.perf_counter() - t0
+    header = any('DASHBOARD COMMODITIES' in element.value for element in session.markdown)
+    queue.put({
+        'premier_affichage': round(min(marks.get('cotations', total), marks.get('onglets', total)), 3),
+        'cotations_affichees': 'cotations' in marks and marks['cotations'] <= marks.get('onglets', total),
+        'premier_run': round(total, 3),
+        'en_tete': header,
+        'erreurs': [str(exception.value) for exception in session.exception][:5],
+    })
+
+
+def bench_cold_start(args):
+    """Import des modules du dashboard (plotly différé ou non) et délai avant le premier affichage"""
+    lazy = dashboard_imports()
+    result = {'import_seconds': {
+        'dashboard': import_seconds(lazy),
+        'dashboard_plotly_au_chargement': import_seconds(lazy + ['plotly.express', 'plotly.graph_objects']),
+    }}
+    universe = Universe.load()
+    tickers = [info['yfinance_symbol'] for info in {**universe.currencies, **universe.commodities}.values()]
+    end = (pd.Timestamp.today() + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+    with tempfile.TemporaryDirectory() as root:
+        recording = os.path.join(root, 'enregistrement')
+        if args.fixture:
+            recording = args.fixture
+        else:
+            record_fixture(recording, {ticker: synthetic_ohlc(ticker, end=end)
+                                       for ticker in tickers + list(universe.indices.values())},
+                           {ticker: 1000.0 for ticker in universe.indices.values()})
+        environment = {'DASHBOARD_PROVIDER': f'replay:{recording}',
+                       'DASHBOARD_REPLAY_LATENCY': str(args.round_trip),
+                       'DASHBOARD_DATA_DIR': os.path.join(root, 'cache')}
+        saved = {key: os.environ.get(key) for key in environment}
+        os.environ.update(environment)
+        try:
+            # Deux processus neufs : cache disque vide, puis cache disque laissé par le premier
+            context = multiprocessing.get_context('spawn')
+            cache = os.path.join(root, 'cache', 'historique')
+            for name in ('cache_vide', 'cache_disque'):
+                if name == 'cache_disque':
+                    # Le premier processus s'arrête avant que son planificateur n'écrive l'historique :
+                    # le cache est rempli ici, de façon synchrone, avant le second démarrage
+                    provider = ReplayProvider(recording)
+                    HistoryStore(cache, fetcher=provider.history_one, batch_fetcher=provider.history).update_many(
+                        tickers, end=end)
+                    if not any(filename.endswith('.parquet') for filename in os.listdir(cache)):
+                        raise RuntimeError(f"Cache disque vide avant le démarrage à chaud : {cache}")
+                queue = context.Queue()
+                process = context.Process(target=_cold_start_child, args=(queue, 300))
+                process.start()
+                result[name] = queue.get()
+                process.join()
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+    return {'round_trip': args.round_trip, **result}
+
+
+def snapshot_sections(n_instruments):
+    """Sections publiées par le planificateur pour un univers synthétique (cotations, indices, barres récentes)"""
+    universe = Universe(synthetic_universe_config(n_instruments))
+    start = (pd.Timestamp.today() - pd.DateOffset(months=3)).strftime('%Y-%m-%d')
+    histories = {info['yfinance_symbol']: synthetic_ohlc(info['yfinance_symbol'], start=start)
+                 for info in {**universe.currencies, **universe.commodities}.values()}
+    indices = {f'Indice {i}': 1000.0 + i for i in range(9)}
+    return {
+        'forex': build_quote_frame(histories, universe.currencies, 'taux_usd', ['pays', 'drapeau', 'region']),
+        'commodities': build_quote_frame(histories, universe.commodities, 'prix', ['nom', 'categorie', 'unite']),
+        'marches': {'indices': indices, 'variations': dict.fromkeys(indices, 0.5), 'taux_interet': {'Fed': 5.5},
+                    'stale': []},
+        'barres': {symbol: data.iloc[-5:] for symbol, data in histories.items()},
+    }
+
+
+def _snapshot_reader_child(queue, barrier, root, duration):
+    """Réplique : relit l'instantané en boucle, comme les fragments des sessions"""
+    reader = SnapshotReader(root)
+    calls, versions, reloads = 0, set(), []
+    version = None
+    barrier.wait()
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        snapshot = reader.snapshot()
+        if snapshot.version != version:
+            reloads.append(time.perf_counter() - t0)
+            version = snapshot.version
+        versions.add(version)
+        calls += 1
+    queue.put({'calls': calls, 'versions': len(versions), 'reloads': reloads, 'section_loads': reader.loads})
+
+
+def bench_snapshot_readers(args, duration=5.0, publish_interval=0.1):
+    """Débit des répliques lisant les instantanés du service pendant des publications continues"""
+    sections = snapshot_sections(args.symbols)
+    with tempfile.TemporaryDirectory() as root:
+        publisher = SnapshotPublisher(root)
+        versions = dict.fromkeys(sections, 1)
+        publisher.publish(Snapshot(1, sections, versions, time.time()))
+        arrow_bytes = sum(os.path.getsize(os.path.join(root, name)) for name in os.listdir(root))
+        _, cold_read = _timed(lambda: SnapshotReader(root).snapshot(), args.repeat)
+        payload = pickle.dumps(sections)
+        _, pickle_read = _timed(lambda: pickle.loads(payload), args.repeat)
+
+        context = multiprocessing.get_context('spawn')
+        queue, barrier = context.Queue(), context.Barrier(args.readers + 1)
+        processes = [context.Process(target=_snapshot_reader_child, args=(queue, barrier, root, duration))
+                     for _ in range(args.readers)]
+        for process in processes:
+            process.start()
+        barrier.wait()
+        # Les cotations changent à chaque cycle ; les barres et les indices une fois sur cinq
+        publish_seconds, version = [], 1
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            version += 1
+            for name in ('forex', 'commodities') if version % 5 else sections:
+                versions[name] += 1
+            t0 = time.perf_counter()
+            publisher.publish(Snapshot(version, sections, dict(versions), time.time()))
+            publish_seconds.append(time.perf_counter() - t0)
+            time.sleep(publish_interval)
+        readers = [queue.get() for _ in processes]
+        for process in processes:
+            process.join()
+    calls = sum(reader['calls'] for reader in readers)
+    return {
+        'instruments': args.symbols,
+        'readers': args.readers,
+        'publications': publisher.publications,
+        'arrow_bytes': arrow_bytes,
+        'pickle_bytes': len(payload),
+        'cold_read_seconds': cold_read,
+        'pickle_read_seconds': pickle_read,
+        'publish_seconds': _percentiles(publish_seconds),
+        'reads_per_second': round(calls / duration),
+        'reload_seconds': _percentiles([value for reader in readers for value in reader['reloads']]),
+        'versions_seen': [reader['versions'] for reader in readers],
+        'section_loads': [reader['section_loads'] for reader in readers],
+    }
+
+
+def _analytical_tabs_app(n_tabs, mode):
+    """Script Streamlit à ``n_tabs`` onglets analytiques (exécuté par AppTest, imports locaux)"""
+    import streamlit as st
+    from analytics import RollingAnalytics
+    from benchmarks import synthetic_closes
+    from caching import TTLCache
+    from resampling import line_figure
+
+    @st.cache_resource
+    def shared():
+        return RollingAnalytics(synthetic_closes(60)), TTLCache(3600, maxsize=64, name='sections')
+
+    engine, sections = shared()
+    measures = (engine.rolling_volatility, engine.rolling_returns, engine.drawdowns)
+
+    def figure(i):
+        columns = engine.symbols[(i * 6) % 60:(i * 6) % 60 + 6]
+        return line_figure(measures[i % 3]()[columns])
+
+    tabs = st.tabs([f'Analyse {i}' for i in range(n_tabs)], key='onglet',
+                   on_change='ignore' if mode == 'eager' else 'rerun')
+    for i, tab in enumerate(tabs):
+        # Sans suivi d'état, ``open`` vaut None : tous les onglets sont exécutés
+        if tab.open is False:
+            continue
+        with tab:
+            if mode == 'lazy_memo':
+                st.plotly_chart(sections.get_or_load(('analyse', i, engine.last_date), lambda: figure(i)))
+            else:
+                st.plotly_chart(figure(i))
+
+
+def bench_lazy_tabs(args, tab_counts=(1, 2, 4, 8, 16)):
+    """Coût d'un rerun selon le nombre d'onglets analytiques : tous exécutés, onglet affiché seul, ou mémorisé"""
+    from streamlit.testing.v1 import AppTest
+
+    results = {}
+    for mode in ('eager', 'lazy', 'lazy_memo'):
+        results[mode] = {}
+        for n_tabs in tab_counts:
+            session = AppTest.from_function(_analytical_tabs_app, args=(n_tabs, mode), default_timeout=300)
+            session.run()
+            durations = []
+            for _ in range(args.reruns):
+                t0 = time.perf_counter()
+                session.run()
+                durations.append(time.perf_counter() - t0)
+            results[mode][n_tabs] = {'rerun_seconds': round(float(np.median(durations)), 4),
+                                     'charts': len(session.get('plotly_chart')), 'errors': len(session.exception)}
+    return results
+
+
+def naive_revaluation(positions, usd, base):
+    """Ancienne approche : une boucle Python par position pour le cours du jour et de la veille"""
+    rows = []
+    for symbol, quantity in zip(positions['symbole'], positions['quantite']):
+        previous = quantity * usd[0][symbol] / usd[0][base]
+        current = quantity * usd[1][symbol] / usd[1][base]
+        rows.append((current, current - previous))
+    return rows
+
+
+def bench_portfolio(args):
+    """Portefeuille de --positions positions : revalorisation à chaque cotation, nouvelle barre et boucle naïve"""
+    prices = synthetic_closes(31)
+    rng = np.random.default_rng(args.positions)
+    positions = pd.DataFrame({'compte': rng.integers(0, 50, args.positions).astype(str),
+                              'symbole': rng.choice(prices.columns, args.positions),
+                              'quantite': rng.normal(0, 1e5, args.positions).round()})
+    base = prices.columns[1]
+    engine, build_seconds = _timed(lambda: PortfolioEngine(positions, prices.iloc[:-1]))
+    start = prices.index[-1] - pd.DateOffset(years=1)
+    durations = []
+    for i in range(args.repeat):
+        # Cotation publiée : le dernier cours bouge, tout est revalorisé (résultats mémorisés invalidés)
+        current = prices.iloc[-2] * np.exp(rng.normal(0, 0.001, prices.shape[1]))
+        t0 = time.perf_counter()
+        engine.mark(current, prices.iloc[-3], i)
+        engine.positions_table(base), engine.by_instrument(base), engine.summary(base), engine.history(base, start)
+        durations.append(time.perf_counter() - t0)
+    _, memo_seconds = _timed(lambda: engine.positions_table(base), args.repeat)
+    _, bar_seconds = _timed(lambda: (engine.update(prices.iloc[-1:], 1), engine.positions_table(base),
+                                     engine.summary(base), engine.history(base, start)))
+    engine.mark(current, prices.iloc[-3], args.repeat)
+    usd = (pd.concat([prices.iloc[-3], pd.Series({'USD': 1.0})]), pd.concat([current, pd.Series({'USD': 1.0})]))
+    naive, naive_seconds = _timed(lambda: naive_revaluation(positions, usd, base))
+    table = engine.positions_table(base)
+    return {
+        'positions': len(engine.positions), 'instruments': len(engine.symbols), 'dates': len(engine.history(base)),
+        'construction_s': build_seconds,
+        'revalorisation_cotation_s': round(float(np.median(durations)), 4),
+        'revalorisation_max_s': round(max(durations), 4),
+        'nouvelle_barre_s': bar_seconds,
+        'resultat_memorise_ms': round(memo_seconds * 1000, 4),
+        'boucle_par_position_s': naive_seconds,
+        'speedup': round(naive_seconds / float(np.median(durations)), 1),
+        'memoire_mo': round(engine.nbytes / 2**20, 2),
+        'identiques': bool(np.allclose(table[['valeur', 'pnl_jour']].to_numpy(), np.array(naive))),
+    }
+
+
+BENCHMARKS = {
+    'batch_download': bench_batch_download,
+    'history_frames': bench_history_frames,
+    'cache_concurrency': bench_cache_concurrency,
+    'concurrent_quotes': bench_concurrent_quotes,
+    'quote_consistency': bench_quote_consistency,
+    'manifest_recovery': bench_manifest_recovery,
+    'rolling_analytics': bench_rolling_analytics,
+    'price_matrix': bench_price_matrix,
+    'universe_startup': bench_universe_startup,
+    'dashboard_stages': bench_dashboard_stages,
+    'load_test': bench_load_test,
+    'instrumentation_overhead': bench_instrumentation_overhead,
+    'index_quotes': bench_index_quotes,
+    'streaming': bench_streaming,
+    'alert_engine': bench_alert_engine,
+    'card_rendering': bench_card_rendering,
+    'chart_payload': bench_chart_payload,
+    'cross_rates': bench_cross_rates,
+    'risk_engine': bench_risk_engine,
+    'cold_start': bench_cold_start,
+    'snapshot_readers': bench_snapshot_readers,
+    'lazy_tabs': bench_lazy_tabs,
+    'portfolio': bench_portfolio,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--fixture', help="Répertoire d'un HistoryStore enregistré (sinon données synthétiques)")
+    parser.add_argument('--round-trip', type=float, default=0.25, help='Latence simulée par appel (s)')
+    parser.add_argument('--per-symbol', type=float, default=0.005, help='Coût simulé par symbole (s)')
+    parser.add_argument('--symbols', type=int, default=500, help="Taille de l'univers synthétique")
+    parser.add_argument('--viewers', type=int, default=50, help='Nombre de sessions simulées')
+    parser.add_argument('--bars', type=int, default=20, help='Nombre de barres ajoutées une à une')
+    parser.add_argument('--years', type=int, default=10, help="Profondeur d'historique synthétique (années)")
+    parser.add_argument('--sizes', type=lambda value: [int(size) for size in value.split(',')],
+                        default=[31, 250, 1000, 2000], help="Tailles d'univers, séparées par des virgules")
+    parser.add_argument('--repeat', type=int, default=20, help='Répétitions des étapes rapides (médiane)')
+    parser.add_argument('--paths', type=int, default=100_000, help='Trajectoires Monte Carlo par scénario')
+    parser.add_argument('--reruns', type=int, default=3, help='Reruns par session du test de charge')
+    parser.add_argument('--readers', type=int, default=4, help="Répliques lisant les instantanés du service")
+    parser.add_argument('--positions', type=int, default=10_000, help='Positions du portefeuille synthétique')
+    args = parser.parse_args()
+    result = BENCHMARKS[args.benchmark](args)
+    print(json.dumps({'benchmark': args.benchmark, 'result': result}, indent=2, default=str, ensure_ascii=False))
+    # Les benchmarks de vérification échouent (code 1) quand les résultats divergent
+    if isinstance(result, dict) and result.get('match') is False:
+        print(f"Écarts sur : {', '.join(result.get('mismatches', []))}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+# caching.py
+"""Cache mémoire partagé entre les sessions du serveur Streamlit."""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Cache LRU borné avec expiration alignée sur des tranches de ``ttl`` secondes.
+
+    Toutes les entrées chargées dans une même tranche expirent ensemble, si bien
+    que les sessions voient les mêmes données. Un seul chargement est lancé par
+    clé manquante : les appels concurrents attendent son résultat et comptent
+    comme des hits.
+    """
+
+    def __init__(self, ttl, maxsize=128, name=''):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # clé -> (expire_a, valeur)
+        self._pending = {}  # clé -> threading.Event du chargement en cours
+        self._lock = threading.Lock()
+
+    def _expiry(self, now):
+        return (now // self.ttl + 1) * self.ttl
+
+    def get_or_load(self, key, loader):
+        """Renvoie la valeur en cache ou l'obtient via ``loader()`` une seule fois"""
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                now = time.time()
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                if entry is not None:
+                    del self._entries[key]
+                event = self._pending.get(key)
+                if event is None:
+                    event = self._pending[key] = threading.Event()
+                    self.misses += 1
+                    break
+            # Un autre thread charge déjà cette clé : on attend puis on relit
+            event.wait()
+
+        try:
+            value = loader()
+        except BaseException:
+            with self._lock:
+                self._pending.pop(key).set()
+            raise
+        with self._lock:
+            self._entries[key] = (self._expiry(now), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._pending.pop(key).set()
+        return value
+
+    def peek(self, key, default=None):
+        """Valeur en cache si elle est présente et valide, sans chargement ni comptage"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[1] if entry is not None and entry[0] > time.time() else default
+
+    def invalidate(self, key=None):
+        """Supprime une clé, ou toutes les entrées si ``key`` est None"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        """Compteurs du cache"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'name': self.name,
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
@@ -0,0 +1,197 @@
+# cards.py
+"""HTML des cartes « top performers », sans dépendance à Streamlit.
+
+Les cartes sont formatées colonne par colonne pour toutes les lignes à la fois,
+gardées dans un cache partagé indexé par la version de la cotation affichée
+(couple prix, variation), et choisies via un classement repositionné symbole
+par symbole quand le tableau de cotations change, plutôt que re-trié à chaque
+rerun.
+"""
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+import numpy as np
+
+CATEGORY_CARD_CLASSES = {
+    'Métal Précieux': 'metal-card',
+    'Énergie': 'energy-card',
+    'Crypto': 'crypto-card',
+}
+
+CURRENCY_CARD = """
+                    <div class="currency-card">
+                        <div style="display: flex; align-items: center; margin-bottom: 0.5rem;">
+                            <span style="font-size: 1.5rem; margin-right: 0.5rem;">{drapeau}</span>
+                            <div>
+                                <h4 style="margin: 0; font-size: 1.1rem;">{symbole}</h4>
+                                <p style="margin: 0; opacity: 0.9; font-size: 0.8rem;">{pays}</p>
+                            </div>
+                        </div>
+                        <div class="price-value">${prix}</div>
+                        <div class="price-change {classe}">
+                            {variation}%
+                        </div>
+                    </div>
+                    """
+
+COMMODITY_CARD = """
+                    <div class="{carte}">
+                        <h4 style="margin: 0; font-size: 1.1rem;">{symbole}</h4>
+                        <p style="margin: 0; opacity: 0.9; font-size: 0.8rem;">{nom}</p>
+                        <div class="price-value">${prix}</div>
+                        <div class="price-change {classe}">
+                            {variation}%
+                        </div>
+                    </div>
+                    """
+
+
+def change_classes(changes):
+    """Classes CSS des pastilles de variation"""
+    return np.where(changes > 0, 'positive', np.where(changes < 0, 'negative', 'neutral'))
+
+
+def currency_cards(data):
+    """Cartes HTML de toutes les lignes de current_data_forex"""
+    changes = data['change_pct'].to_numpy(dtype='float64')
+    prices = np.char.mod('%.4f', data['taux_usd'].to_numpy(dtype='float64'))
+    variations = np.char.mod('%+.2f', changes)
+    return [CURRENCY_CARD.format(drapeau=drapeau, symbole=symbole, pays=pays, prix=prix, classe=classe,
+                                 variation=variation)
+            for drapeau, symbole, pays, prix, classe, variation
+            in zip(data['drapeau'], data['symbole'], data['pays'], prices, change_classes(changes), variations)]
+
+
+def commodity_cards(data):
+    """Cartes HTML de toutes les lignes de current_data_commodities"""
+    changes = data['change_pct'].to_numpy(dtype='float64')
+    prices = np.char.mod('%.2f', data['prix'].to_numpy(dtype='float64'))
+    variations = np.char.mod('%+.2f', changes)
+    card_classes = [CATEGORY_CARD_CLASSES.get(categorie, 'commodity-card') for categorie in data['categorie']]
+    return [COMMODITY_CARD.format(carte=carte, symbole=symbole, nom=nom, prix=prix, classe=classe,
+                                  variation=variation)
+            for carte, symbole, nom, prix, classe, variation
+            in zip(card_classes, data['symbole'], data['nom'], prices, change_classes(changes), variations)]
+
+
+CARD_FORMATS = {
+    'devise': (currency_cards, 'taux_usd'),
+    'commodity': (commodity_cards, 'prix'),
+}
+
+
+class CardCache:
+    """Cartes déjà formatées, indexées par (type, symbole, prix, variation).
+
+    Seules les lignes dont la cotation a changé sont reformatées ; le cache est
+    partagé par les sessions et borné à ``maxsize`` cartes (LRU).
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cards(self, data, kind):
+        """Cartes HTML des lignes de ``data``, dans leur ordre"""
+        if data.empty:
+            return []
+        formatter, value_column = CARD_FORMATS[kind]
+        keys = list(zip(data['symbole'], data[value_column].tolist(), data['change_pct'].tolist()))
+        with self._lock:
+            cards = [self._entries.get((kind,) + key) for key in keys]
+        missing = [i for i, card in enumerate(cards) if card is None]
+        if missing:
+            for i, card in zip(missing, formatter(data.iloc[missing])):
+                cards[i] = card
+        with self._lock:
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+            for i in missing:
+                self._entries[(kind,) + keys[i]] = cards[i]
+            for key in keys:
+                self._entries.move_to_end((kind,) + key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return cards
+
+
+class TopN:
+    """Classement par variation décroissante, repositionné symbole par symbole.
+
+    ``update`` ne déplace que les symboles dont la variation a changé (comparaison
+    vectorisée quand l'ordre des symboles est inchangé, puis bissection dans une
+    liste triée) ; ``top`` lit le début du classement.
+    """
+
+    def __init__(self):
+        self._ranking = []  # (-variation, symbole), trié
+        self._values = {}
+        self._symbols = []
+        self._changes = np.empty(0)
+
+    def __len__(self):
+        return len(self._ranking)
+
+    def _remove(self, symbol):
+        entry = (-self._values.pop(symbol), symbol)
+        del self._ranking[bisect_left(self._ranking, entry)]
+
+    def _move(self, symbol, change):
+        if symbol in self._values:
+            self._remove(symbol)
+        if change == change:  # les variations NaN ne sont pas classées
+            self._values[symbol] = change
+            insort(self._ranking, (-change, symbol))
+
+    def update(self, symbols, changes):
+        """Intègre les variations courantes ; renvoie le nombre de symboles repositionnés"""
+        symbols = list(symbols)
+        changes = np.asarray(changes, dtype='float64')
+        if symbols == self._symbols:
+            same = (changes == self._changes) | (np.isnan(changes) & np.isnan(self._changes))
+            moved = np.flatnonzero(~same)
+        else:
+            for symbol in set(self._values) - set(symbols):
+                self._remove(symbol)
+            moved = range(len(symbols))
+        for i in moved:
+            self._move(symbols[i], float(changes[i]))
+        self._symbols, self._changes = symbols, changes
+        return len(moved)
+
+    def top(self, n):
+        """Les ``n`` premiers symboles du classement"""
+        return [symbol for _, symbol in self._ranking[:n]]
+
+
+class RankedQuotes:
+    """Tableau de cotations et ses ``n`` premières lignes, recalculées seulement quand le tableau change.
+
+    Un nouvel objet DataFrame (instantané ou ticks superposés) met à jour le
+    classement ; les reruns sur le même tableau réutilisent les lignes déjà
+    extraites.
+    """
+
+    def __init__(self):
+        self.ranking = TopN()
+        self._data = None
+        self._n = None
+        self._rows = None
+        self._symbols = []
+        self._positions = {}
+
+    def top_rows(self, data, n=10):
+        """Lignes des ``n`` plus fortes hausses de ``data``, dans l'ordre du classement"""
+        if data is not self._data or n != self._n:
+            symbols = data['symbole'].tolist()
+            self.ranking.update(symbols, data['change_pct'].to_numpy(dtype='float64'))
+            if symbols != self._symbols:
+                self._symbols = symbols
+                self._positions = {symbol: i for i, symbol in enumerate(symbols)}
+            self._rows = data.iloc[[self._positions[symbol] for symbol in self.ranking.top(n)]]
+            self._data, self._n = data, n
+        return self._rows
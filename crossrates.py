@@ -0,0 +1,148 @@
+# crossrates.py
+"""Cours croisés de toutes les devises configurées, pour chaque date de l'historique.
+
+yfinance cote ``EURUSD=X`` en dollars pour une unité de devise et ``JPY=X`` en
+unités de devise pour un dollar. Les séries sont ramenées à une convention
+unique (dollars par unité, USD valant 1) : le cours croisé i/j, en unités de j
+pour une unité de i, vaut alors ``usd[i] / usd[j]`` et la matrice N×N de
+toutes les dates s'obtient d'un seul broadcast sur le tableau dates × devises.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from analytics import GrowingArray
+
+BASE_CURRENCY = 'USD'
+
+
+def usd_per_unit(ticker):
+    """True si le symbole yfinance est coté en dollars par unité (``EURUSD=X``)"""
+    return ticker.upper().endswith('USD=X')
+
+
+def to_usd_per_unit(prices, tickers):
+    """Cotations yfinance (dates × devises) converties en dollars par unité de devise"""
+    values = prices.to_numpy(dtype='float64')
+    inverted = np.array([not usd_per_unit(tickers[column]) for column in prices.columns])
+    with np.errstate(divide='ignore'):
+        return np.where(inverted, 1.0 / values, values)
+
+
+class CrossRates:
+    """Matrices des cours croisés et de leurs variations journalières, complétées barre par barre.
+
+    ``prices`` est un DataFrame large de clôtures (dates × symboles du
+    dashboard) et ``tickers`` associe chaque symbole à son symbole yfinance.
+    Les cotations manquantes sont prolongées (ffill) ; le dollar est ajouté
+    en première devise.
+    """
+
+    def __init__(self, prices, tickers):
+        prices = prices.sort_index().ffill()
+        self.tickers = dict(tickers)
+        self.symbols = list(prices.columns)
+        self.currencies = [BASE_CURRENCY] + [s for s in self.symbols if s != BASE_CURRENCY]
+        # Version de la source (instantané) des dernières barres intégrées
+        self.source_version = None
+        self._lock = threading.Lock()
+        self._dates = list(prices.index)
+        self._usd = GrowingArray(self._with_base(to_usd_per_unit(prices, self.tickers)))
+
+    def _with_base(self, usd):
+        usd = usd[:, [self.symbols.index(s) for s in self.currencies[1:]]]
+        return np.hstack([np.ones((len(usd), 1)), usd])
+
+    def update(self, prices, source_version=None):
+        """Intègre les nouvelles barres d'un DataFrame large (mêmes colonnes).
+
+        Comme pour l'analytique glissante, une barre à la dernière date connue
+        la remplace. Renvoie le nombre de barres intégrées.
+        """
+        prices = prices.reindex(columns=self.symbols).sort_index()
+        with self._lock:
+            if source_version is not None:
+                self.source_version = source_version
+            last_date = self._dates[-1]
+            prices = prices[prices.index >= last_date]
+            rows = self._with_base(to_usd_per_unit(prices, self.tickers))
+            applied = 0
+            for date, row in zip(prices.index, rows):
+                previous = self._usd.view()[-2 if date == last_date and len(self._usd) > 1 else -1]
+                row = np.where(np.isnan(row), previous, row)
+                if date == last_date:
+                    if np.allclose(row, self._usd.view()[-1], equal_nan=True):
+                        continue
+                    self._usd.pop()
+                    self._dates.pop()
+                self._dates.append(date)
+                self._usd.append(row)
+                last_date = date
+                applied += 1
+            return applied
+
+    def _window(self, start=None, end=None):
+        """Dates et valeurs en dollars de ``start`` à ``end``, plus la ligne précédente pour les variations"""
+        with self._lock:
+            dates = pd.DatetimeIndex(self._dates, name='date')
+            lo = 0 if start is None else dates.searchsorted(pd.Timestamp(start))
+            hi = len(dates) if end is None else dates.searchsorted(pd.Timestamp(end), 'right')
+            usd = self._usd.view()[max(lo - 1, 0):hi].copy()
+        return dates[lo:hi], usd, lo > 0
+
+    def tensors(self, start=None, end=None, dtype='float64'):
+        """``(dates, cours, variations)`` : tableaux dates × N × N (variations en %, NaN à la première date)"""
+        dates, usd, has_previous = self._window(start, end)
+        usd = usd.astype(dtype, copy=False)
+        current = usd[1:] if has_previous else usd
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cross = current[:, :, None] / current[:, None, :]
+            change = np.empty_like(cross)
+            ratio = usd[1:] / usd[:-1]
+            tail = change[len(change) - len(ratio):]
+            np.divide(ratio[:, :, None], ratio[:, None, :], out=tail)
+            tail -= 1
+            tail *= 100
+        change[:len(change) - len(ratio)] = np.nan
+        return dates, cross, change
+
+    def _rows(self, date=None):
+        """Valeurs en dollars à ``date`` (dernière date connue à cette date) et à la date précédente"""
+        with self._lock:
+            position = len(self._dates) - 1
+            if date is not None:
+                position = pd.DatetimeIndex(self._dates).searchsorted(pd.Timestamp(date), 'right') - 1
+            if position < 0:
+                raise KeyError(f"Aucun cours au {date}")
+            return self._usd.view()[max(position - 1, 0):position + 1].copy()
+
+    def matrix(self, date=None):
+        """Cours croisés à une date (la dernière par défaut) : unités de la colonne pour une unité de la ligne"""
+        usd = self._rows(date)[-1]
+        return pd.DataFrame(usd[:, None] / usd[None, :], index=self.currencies, columns=self.currencies)
+
+    def change_matrix(self, date=None):
+        """Variation journalière (%) des cours croisés à une date (la dernière par défaut)"""
+        rows = self._rows(date)
+        if len(rows) < 2:
+            change = np.full((len(self.currencies),) * 2, np.nan)
+        else:
+            ratio = rows[1] / rows[0]
+            change = (ratio[:, None] / ratio[None, :] - 1) * 100
+        return pd.DataFrame(change, index=self.currencies, columns=self.currencies)
+
+    def pair(self, base, quote, start=None):
+        """Historique du cours croisé ``base``/``quote`` (unités de ``quote`` pour une unité de ``base``)"""
+        dates, usd, has_previous = self._window(start)
+        usd = usd[1:] if has_previous else usd
+        i, j = self.currencies.index(base), self.currencies.index(quote)
+        return pd.Series(usd[:, i] / usd[:, j], index=dates, name=f'{base}/{quote}')
+
+    @property
+    def last_date(self):
+        return self._dates[-1]
+
+    @property
+    def nbytes(self):
+        return self._usd.view().nbytes
@@ -0,0 +1,220 @@
+# fetching.py
+"""Accès au fournisseur de données : normalisation OHLC, téléchargement groupé et concurrent."""
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+import pandas as pd
+
+from instrumentation import METRICS
+
+OHLC_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+logger = logging.getLogger('dashboard.fetching')
+
+# Délai maximal (s) d'un appel groupé au fournisseur (un paquet de symboles)
+BATCH_TIMEOUT = 30.0
+
+
+def call_with_timeout(function, timeout, *args):
+    """Appelle ``function(*args)`` et lève TimeoutError après ``timeout`` secondes.
+
+    L'appel tourne dans un thread démon : en retard, il est abandonné et le
+    thread appelant est libéré, quel que soit le comportement du fournisseur.
+    Sans ``timeout``, l'appel est direct.
+    """
+    if timeout is None:
+        return function(*args)
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(function(*args))
+        except BaseException as exc:
+            future.set_exception(exc)
+
+    threading.Thread(target=run, name='fetch-call', daemon=True).start()
+    try:
+        return future.result(timeout=timeout)
+    except TimeoutError:
+        raise TimeoutError(f"délai de {timeout}s dépassé") from None
+
+
+def yfinance_fetcher(symbol, start, end):
+    """Fetcher par défaut : télécharge les barres journalières via yfinance"""
+    import yfinance as yf
+    return yf.download(symbol, start=start, end=end, progress=False)
+
+
+def empty_ohlc():
+    """Renvoie un DataFrame OHLC vide indexé par date"""
+    return pd.DataFrame(columns=OHLC_COLUMNS, index=pd.DatetimeIndex([], name='Date'), dtype='float64')
+
+
+def normalize_ohlc(data):
+    """Normalise une réponse OHLC : colonnes à plat, dates sans fuseau, triées et sans doublon"""
+    if not isinstance(data, pd.DataFrame) or data.empty:
+        return empty_ohlc()
+    data = data.copy()
+    if isinstance(data.columns, pd.MultiIndex):
+        # yfinance renvoie des colonnes (Price, Ticker) même pour un seul symbole
+        data.columns = data.columns.get_level_values(0)
+    if 'Date' in data.columns:
+        data = data.set_index('Date')
+    index = pd.DatetimeIndex(pd.to_datetime(data.index))
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    data.index = index.normalize().rename('Date')
+    data = data.reindex(columns=OHLC_COLUMNS).astype('float64')
+    data = data[data['Close'].notna()]
+    data = data[~data.index.duplicated(keep='last')]
+    return data.sort_index()
+
+
+def yfinance_batch_fetcher(symbols, start, end, timeout=BATCH_TIMEOUT):
+    """Fetcher groupé par défaut : un seul yf.download pour tous les symboles"""
+    import yfinance as yf
+    return yf.download(list(symbols), start=start, end=end, progress=False, group_by='ticker', threads=True,
+                       timeout=timeout)
+
+
+def split_multi_ticker(data, symbols):
+    """Découpe un DataFrame large (colonnes MultiIndex), ou un dict par symbole, en DataFrames OHLC"""
+    frames = {}
+    if isinstance(data, dict):
+        # Fournisseur renvoyant déjà un DataFrame par symbole
+        return {symbol: normalize_ohlc(data[symbol]) for symbol in symbols if symbol in data}
+    if not isinstance(data, pd.DataFrame) or data.empty:
+        return frames
+    if not isinstance(data.columns, pd.MultiIndex):
+        # Un seul symbole demandé : colonnes déjà à plat
+        if len(symbols) == 1:
+            frames[symbols[0]] = normalize_ohlc(data)
+        return frames
+
+    # Selon group_by, le symbole est au niveau 0 (ticker) ou au niveau 1 (column)
+    level = 1 if set(data.columns.get_level_values(0)) & set(OHLC_COLUMNS) else 0
+    available = set(data.columns.get_level_values(level))
+    for symbol in symbols:
+        if symbol in available:
+            frames[symbol] = normalize_ohlc(data.xs(symbol, axis=1, level=level))
+    return frames
+
+
+def batch_download(symbols, start, end, batch_fetcher=None, fetcher=None, chunk_size=50, timeout=None):
+    """Télécharge les historiques par paquets de ``chunk_size`` symboles.
+
+    Sans ``batch_fetcher``, se replie sur ``fetcher`` appelé symbole par symbole.
+    Un appel plus long que ``timeout`` secondes est abandonné et compte comme un échec.
+    Renvoie ``(frames, failed_symbols)``, les symboles sans données étant listés
+    dans ``failed_symbols`` comme le faisaient les chargeurs historiques.
+    """
+    symbols = list(symbols)
+    frames = {}
+    if batch_fetcher is None and fetcher is not None:
+        for symbol in symbols:
+            try:
+                with METRICS.span('fetch_historique', symbol=symbol):
+                    frames[symbol] = normalize_ohlc(call_with_timeout(fetcher, timeout, symbol, start, end))
+            except Exception:
+                logger.exception("Échec du téléchargement de l'historique de %s", symbol)
+                METRICS.count('fetch_errors', source='historique')
+    else:
+        batch_fetcher = batch_fetcher or yfinance_batch_fetcher
+        for i in range(0, len(symbols), chunk_size):
+            chunk = symbols[i:i + chunk_size]
+            try:
+                with METRICS.span('fetch_historique_groupe'):
+                    frames.update(split_multi_ticker(call_with_timeout(batch_fetcher, timeout, chunk, start, end), chunk))
+            except Exception:
+                # Les symboles du paquet sont listés en échec ; l'appelant garde leur historique stocké
+                logger.exception("Échec du téléchargement groupé de %d symboles", len(chunk))
+                METRICS.count('fetch_errors', source='historique_groupe')
+
+    frames = {symbol: data for symbol, data in frames.items() if not data.empty}
+    failed_symbols = [symbol for symbol in symbols if symbol not in frames]
+    return frames, failed_symbols
+
+
+def yfinance_quote_fetcher(symbol, timeout):
+    """Cotation par symbole (5 dernières barres) : référence des benchmarks, le dashboard passe par l'appel groupé"""
+    import yfinance as yf
+    return yf.Ticker(symbol).history(period='5d', timeout=timeout)
+
+
+def yfinance_index_fetcher(symbol, timeout):
+    """Niveau courant d'un indice par ``.info`` : référence des benchmarks, remplacée par ``index_quotes``"""
+    import yfinance as yf
+    ticker = yf.Ticker(symbol)
+    price = ticker.info.get('regularMarketPrice')
+    if price is None:
+        price = ticker.history(period='1d', timeout=timeout)['Close'].iloc[-1]
+    return price
+
+
+class ConcurrentFetcher:
+    """Récupération concurrente par symbole avec timeout, retries et échéance globale.
+
+    ``fetch(symbol, timeout)`` est appelé dans un pool de ``max_workers`` threads.
+    Une tentative plus longue que ``timeout`` est abandonnée (le worker est
+    libéré même si le fournisseur ne rend pas la main) et compte comme un échec ; les échecs
+    sont retentés jusqu'à ``retries`` fois avec un backoff exponentiel à jitter
+    complet. À l'échéance ``deadline``, les résultats partiels sont renvoyés :
+    les symboles en retard ou en échec reprennent leur dernière valeur connue et
+    sont marqués périmés, ceux qui n'en ont pas sont listés en échec.
+
+    Le dashboard n'appelle plus le fournisseur symbole par symbole : cette
+    classe sert de référence aux benchmarks ``concurrent_quotes`` et
+    ``index_quotes`` face aux appels groupés.
+    """
+
+    def __init__(self, fetch=None, max_workers=8, timeout=5.0, deadline=10.0, retries=2, backoff=0.5, name=''):
+        self.fetch = fetch or yfinance_quote_fetcher
+        self.name = name
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff
+        self._last_good = {}
+        self._lock = threading.Lock()
+
+    def _fetch_with_retries(self, symbol, deadline_at):
+        for attempt in range(self.retries + 1):
+            started = time.monotonic()
+            try:
+                try:
+                    result = call_with_timeout(self.fetch, self.timeout, symbol, self.timeout)
+                finally:
+                    METRICS.observe('fetch_seconds', time.monotonic() - started, source=self.name, symbol=symbol)
+                if isinstance(result, pd.DataFrame) and result.empty:
+                    raise ValueError(f"{symbol} : réponse vide")
+                return result
+            except Exception:
+                delay = random.uniform(0, self.backoff * 2 ** attempt)
+                if attempt == self.retries or time.monotonic() + delay > deadline_at:
+                    raise
+                time.sleep(delay)
+
+    def fetch_all(self, symbols):
+        """Renvoie ``{'results': {...}, 'stale': [...], 'failed': [...]}``"""
+        symbols = list(symbols)
+        deadline_at = time.monotonic() + self.deadline
+        executor = ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(symbols))))
+        futures = {executor.submit(self._fetch_with_retries, symbol, deadline_at): symbol for symbol in symbols}
+        done, _ = wait(futures, timeout=self.deadline)
+        # Les symboles en retard ne bloquent pas la page : on n'attend pas leurs threads
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        results, stale, failed = {}, [], []
+        with self._lock:
+            for future, symbol in futures.items():
+                if future in done and future.exception() is None:
+                    results[symbol] = self._last_good[symbol] = future.result()
+                elif symbol in self._last_good:
+                    results[symbol] = self._last_good[symbol]
+                    stale.append(symbol)
+                else:
+                    failed.append(symbol)
+        return {'results': results, 'stale': stale, 'failed': failed}
@@ -0,0 +1,103 @@
+# frames.py
+"""Construction des DataFrames du dashboard (historique long, cotations courantes) depuis l'historique OHLC."""
+import numpy as np
+import pandas as pd
+
+
+def daily_volatility(close, high, low):
+    """Amplitude journalière (High - Low) / Close en %, 0 quand le prix est nul"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(close != 0, (high - low) / close * 100, 0.0)
+
+
+def build_history_frame(histories, instruments, value_column, meta_columns):
+    """Assemble l'historique long (une ligne par symbole et par jour) sans boucle par barre.
+
+    ``histories`` associe un symbole yfinance à son DataFrame OHLC et
+    ``instruments`` est le dictionnaire de ``define_currencies`` ou
+    ``define_commodities``. Les colonnes descriptives sont catégorielles ;
+    ``volatilite_jour`` est stockée en float32, le prix reste en float64.
+    Renvoie ``(frame, failed_symbols)``.
+    """
+    keys, dates, values, volatilities, lengths = [], [], [], [], []
+    failed_symbols = []
+    for key, info in instruments.items():
+        data = histories.get(info['yfinance_symbol'])
+        if data is None or data.empty:
+            failed_symbols.append(key)
+            continue
+        close = data['Close'].to_numpy(dtype='float64')
+        valid = ~np.isnan(close)
+        if not valid.any():
+            failed_symbols.append(key)
+            continue
+        close = close[valid]
+        high = data['High'].to_numpy(dtype='float64')[valid]
+        low = data['Low'].to_numpy(dtype='float64')[valid]
+        keys.append(key)
+        dates.append(data.index.to_numpy()[valid])
+        values.append(close)
+        volatilities.append(daily_volatility(close, high, low).astype('float32'))
+        lengths.append(len(close))
+
+    columns = ['date', 'symbole'] + list(meta_columns) + [value_column, 'volatilite_jour']
+    if not keys:
+        return pd.DataFrame(columns=columns), failed_symbols
+
+    # Les attributs sont répétés par codes catégoriels, pas par chaînes Python
+    codes = np.repeat(np.arange(len(keys)), lengths)
+    frame = {
+        'date': np.concatenate(dates),
+        'symbole': pd.Categorical.from_codes(codes, categories=keys),
+    }
+    for column in meta_columns:
+        labels = [instruments[key][column] for key in keys]
+        positions = {label: i for i, label in enumerate(dict.fromkeys(labels))}
+        label_codes = np.array([positions[label] for label in labels])
+        frame[column] = pd.Categorical.from_codes(label_codes[codes], categories=list(positions))
+    frame[value_column] = np.concatenate(values)
+    frame['volatilite_jour'] = np.concatenate(volatilities)
+    return pd.DataFrame(frame, columns=columns), failed_symbols
+
+
+def derive_quote(history, window=5):
+    """Champs de cotation courante calculés sur les ``window`` dernières barres.
+
+    Reproduit le calcul fait auparavant sur ``Ticker.history(period="5d")`` ;
+    renvoie None s'il y a moins de deux barres.
+    """
+    if history is None or len(history) < 2:
+        return None
+    recent = history.iloc[-window:]
+    last_close = recent['Close'].iloc[-1]
+    prev_close = recent['Close'].iloc[-2]
+    return {
+        'last_close': last_close,
+        'previous_close': prev_close,
+        'change_pct': ((last_close - prev_close) / prev_close) * 100 if prev_close != 0 else 0,
+        'volatilite': recent['Close'].pct_change().std() * 100,
+        'volume_jour': recent['Volume'].iloc[-1],
+    }
+
+
+def build_quote_frame(histories, instruments, value_column, meta_columns, stale=()):
+    """Tableau des cotations courantes, une ligne par instrument ayant au moins deux barres.
+
+    ``stale`` contient les symboles yfinance dont l'historique n'a pas pu être
+    complété : leur cotation est la dernière valeur connue.
+    """
+    current_data = []
+    for symbole, info in instruments.items():
+        quote = derive_quote(histories.get(info['yfinance_symbol']))
+        if quote:
+            current_data.append({
+                'symbole': symbole,
+                **{column: info[column] for column in meta_columns},
+                value_column: quote['last_close'],
+                'cloture_veille': quote['previous_close'],
+                'change_pct': quote['change_pct'],
+                'volatilite': quote['volatilite'],
+                'volume_jour': quote['volume_jour'],
+                'stale': info['yfinance_symbol'] in stale
+            })
+    return pd.DataFrame(current_data)
@@ -0,0 +1,246 @@
+# history_store.py
+"""Historique OHLC persistant sur disque, une partition Parquet par symbole.
+
+Au démarrage à chaud, les séries sont relues depuis le disque et seule la queue
+manquante (depuis la dernière date stockée) est demandée au fournisseur.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+from fetching import (BATCH_TIMEOUT, batch_download, call_with_timeout, empty_ohlc, normalize_ohlc,
+                      yfinance_batch_fetcher, yfinance_fetcher)
+
+DEFAULT_START = '2020-01-01'
+DEFAULT_ROOT = os.path.join(
+    os.environ.get('DASHBOARD_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data_cache')),
+    'historique')
+
+
+class HistoryStore:
+    """Stockage local des historiques avec mise à jour incrémentale.
+
+    Le fetcher est un appelable ``fetcher(symbol, start, end)`` renvoyant un
+    DataFrame OHLC ; il peut être remplacé par une fausse source pour les tests.
+    Le fetcher groupé ``batch_fetcher(symbols, start, end)`` sert à ``update_many`` ;
+    avec un fetcher personnalisé seul, ``update_many`` l'appelle symbole par symbole.
+    Un appel au fournisseur plus long que ``timeout`` secondes est abandonné :
+    le symbole garde alors son historique stocké.
+    """
+
+    MANIFEST = '_manifest.json'
+
+    def __init__(self, root=DEFAULT_ROOT, fetcher=None, batch_fetcher=None, start=DEFAULT_START,
+                 overlap_days=7, refresh_interval=3600, chunk_size=50, timeout=BATCH_TIMEOUT):
+        self.root = root
+        self.fetcher = fetcher or yfinance_fetcher
+        if batch_fetcher is None and fetcher is None:
+            batch_fetcher = yfinance_batch_fetcher
+        self.batch_fetcher = batch_fetcher
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.start = start
+        # Fenêtre re-téléchargée avant la dernière date stockée : corrige la dernière barre
+        # et comble les trous récents laissés par une réponse incomplète
+        self.overlap_days = overlap_days
+        # Délai en secondes pendant lequel une partition est considérée à jour
+        self.refresh_interval = refresh_interval
+        os.makedirs(self.root, exist_ok=True)
+        self._manifest = self._read_manifest()
+        # Symboles qui n'ont pas pu être complétés lors du dernier update_many
+        self.not_refreshed = []
+        # Vrai quand update_many doit réécrire le manifeste (partition écrite ou entrée reconstruite)
+        self._manifest_changed = False
+        self._lock = threading.RLock()
+
+    def _path(self, symbol):
+        return os.path.join(self.root, f"{quote(symbol, safe='')}.parquet")
+
+    def _manifest_path(self):
+        return os.path.join(self.root, self.MANIFEST)
+
+    def _read_manifest(self):
+        try:
+            with open(self._manifest_path(), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self):
+        tmp_path = self._manifest_path() + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self._manifest_path())
+
+    def last_date(self, symbol):
+        """Dernière date stockée pour un symbole, ou None"""
+        entry = self._manifest.get(symbol)
+        return pd.Timestamp(entry['last_date']) if entry else None
+
+    def load(self, symbol):
+        """Lit la partition d'un symbole sans accès réseau"""
+        path = self._path(symbol)
+        if not os.path.exists(path):
+            return empty_ohlc()
+        return pd.read_parquet(path)
+
+    def write(self, symbol, data, save_manifest=True):
+        """Écrit la partition d'un symbole et met à jour le manifeste"""
+        data = normalize_ohlc(data)
+        tmp_path = self._path(symbol) + '.tmp'
+        data.to_parquet(tmp_path)
+        os.replace(tmp_path, self._path(symbol))
+        self._manifest[symbol] = self._manifest_entry(data)
+        if save_manifest:
+            self._write_manifest()
+        return data
+
+    @staticmethod
+    def _manifest_entry(data):
+        """Entrée du manifeste d'une partition, vérifiée maintenant auprès du fournisseur"""
+        return {
+            'last_date': data.index[-1].strftime('%Y-%m-%d'),
+            'checked_at': datetime.now().isoformat(timespec='seconds'),
+            # Cotation le week-end (cryptos) : une nouvelle barre peut arriver chaque jour
+            'weekends': bool((data.index.dayofweek >= 5).any()),
+        }
+
+    def is_fresh(self, symbol, max_age=None):
+        """Indique si la partition a été vérifiée auprès du fournisseur depuis moins de ``max_age`` secondes"""
+        entry = self._manifest.get(symbol)
+        if not entry:
+            return False
+        max_age = self.refresh_interval if max_age is None else max_age
+        age = datetime.now() - datetime.fromisoformat(entry['checked_at'])
+        return age.total_seconds() < max_age
+
+    def is_settled(self, symbol, now=None):
+        """Indique qu'aucune nouvelle barre n'est attendue pour le symbole.
+
+        C'est le cas un jour sans séance (week-end, hors cryptos) quand la
+        dernière barre stockée est celle de la dernière séance et qu'elle a été
+        vérifiée un jour suivant, donc après sa clôture. Les jours de séance, la
+        barre du jour évolue et n'est jamais considérée comme close.
+        """
+        entry = self._manifest.get(symbol)
+        # Entrées antérieures sans indicateur week-end : on ne suppose rien
+        if not entry or entry.get('weekends', True):
+            return False
+        today = pd.Timestamp(now or datetime.now()).normalize()
+        if today.dayofweek < 5:
+            return False
+        last_date = pd.Timestamp(entry['last_date'])
+        checked = pd.Timestamp(entry['checked_at']).normalize()
+        return last_date >= today - pd.offsets.BDay(1) and checked > last_date
+
+    def update(self, symbol, end=None):
+        """Complète la partition avec la queue manquante et renvoie l'historique complet"""
+        with self._lock:
+            return self._update(symbol, end)
+
+    def _update(self, symbol, end):
+        stored = self.load(symbol)
+        if not stored.empty and self.is_fresh(symbol):
+            return stored
+
+        start = self._fetch_start(symbol, stored)
+        end = end or datetime.now().strftime('%Y-%m-%d')
+
+        try:
+            fresh = normalize_ohlc(call_with_timeout(self.fetcher, self.timeout, symbol, start, end))
+        except Exception:
+            if stored.empty:
+                raise
+            # Le fournisseur est indisponible : on sert l'historique déjà stocké
+            return stored
+        return self._merge(symbol, stored, fresh)
+
+    def update_many(self, symbols, end=None, max_age=None, overlap_days=None):
+        """Met à jour plusieurs symboles en appels groupés.
+
+        Les symboles à froid et à chaud forment deux groupes (dates de début
+        différentes), chacun téléchargé en un appel par paquet de symboles.
+        ``max_age`` remplace ``refresh_interval`` (0 force la vérification, sauf
+        pour les symboles dont la dernière barre est close, voir ``is_settled``)
+        et ``overlap_days`` la fenêtre re-téléchargée (0 : depuis la dernière
+        barre stockée). Seules les partitions modifiées sont réécrites.
+        Renvoie ``(frames, failed_symbols)``.
+        """
+        with self._lock:
+            return self._update_many(symbols, end, max_age, overlap_days)
+
+    def _update_many(self, symbols, end, max_age, overlap_days=None):
+        end = end or datetime.now().strftime('%Y-%m-%d')
+        frames = {}
+        groups = {}
+        fetched_symbols = set()
+        self._manifest_changed = False
+        for symbol in symbols:
+            stored = self.load(symbol)
+            frames[symbol] = stored
+            if stored.empty or not (self.is_fresh(symbol, max_age) or self.is_settled(symbol)):
+                cold = stored.empty or self.last_date(symbol) is None
+                groups.setdefault(cold, []).append(symbol)
+
+        for cold, group in groups.items():
+            # Pour le groupe à chaud, on part de la plus ancienne date stockée du groupe
+            start = self.start if cold else min(self._fetch_start(s, frames[s], overlap_days) for s in group)
+            fetched, _ = batch_download(group, start, end, batch_fetcher=self.batch_fetcher,
+                                        fetcher=self.fetcher, chunk_size=self.chunk_size, timeout=self.timeout)
+            fetched_symbols.update(fetched)
+            for symbol in group:
+                if symbol in fetched:
+                    stored = frames[symbol]
+                    frames[symbol] = self._merge(symbol, stored, fetched[symbol], save_manifest=False)
+                    self._manifest_changed = self._manifest_changed or frames[symbol] is not stored
+        self.not_refreshed = [symbol for group in groups.values() for symbol in group if symbol not in fetched_symbols]
+        if self._manifest_changed:
+            self._write_manifest()
+
+        failed_symbols = [symbol for symbol, data in frames.items() if data.empty]
+        return frames, failed_symbols
+
+    def _fetch_start(self, symbol, stored, overlap_days=None):
+        last_date = self.last_date(symbol)
+        if stored.empty or last_date is None:
+            return self.start
+        overlap_days = self.overlap_days if overlap_days is None else overlap_days
+        return (last_date - pd.Timedelta(days=overlap_days)).strftime('%Y-%m-%d')
+
+    def _merge(self, symbol, stored, fresh, save_manifest=True):
+        """Fusionne les barres re-téléchargées ; renvoie ``stored`` lui-même (sans écriture) si rien n'a changé"""
+        if fresh.empty:
+            return stored
+        if stored.empty:
+            return self.write(symbol, fresh, save_manifest)
+        known = stored.reindex(fresh.index)
+        if np.array_equal(known.to_numpy(), fresh.to_numpy(), equal_nan=True):
+            entry = self._manifest.get(symbol)
+            if entry is not None:
+                # Vérifiée auprès du fournisseur : seule l'heure de vérification change, en mémoire
+                entry['checked_at'] = datetime.now().isoformat(timespec='seconds')
+                return stored
+            # Partition sans entrée (manifeste supprimé ou illisible) : l'entrée est reconstruite et enregistrée
+            self._manifest[symbol] = self._manifest_entry(stored)
+            self._manifest_changed = True
+            if save_manifest:
+                self._write_manifest()
+            return stored
+        # Les barres re-téléchargées remplacent les barres stockées aux mêmes dates
+        merged = pd.concat([stored, fresh])
+        merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+        return self.write(symbol, merged, save_manifest)
+
+    def invalidate(self, symbol=None):
+        """Force la prochaine mise à jour à interroger le fournisseur"""
+        with self._lock:
+            symbols = [symbol] if symbol else list(self._manifest)
+            for sym in symbols:
+                if sym in self._manifest:
+                    self._manifest[sym]['checked_at'] = datetime.min.isoformat()
+            self._write_manifest()
@@ -0,0 +1,246 @@
+# instrumentation.py
+"""Mesures de performance du dashboard : spans chronométrés, histogrammes de latence et jauges.
+
+Désactivées par défaut : les fonctions décorées ne sont alors pas enveloppées
+et un span ne coûte qu'un test de booléen. ``DASHBOARD_METRICS=1`` active la collecte, ``DASHBOARD_METRICS=log``
+l'active et écrit en plus une ligne JSON par mesure sur le logger
+``dashboard.metrics``. Les mesures s'exportent au format texte de Prometheus.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import nullcontext
+from functools import wraps
+
+import numpy as np
+
+# Bornes supérieures (s) des seaux des histogrammes de latence
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+logger = logging.getLogger('dashboard.metrics')
+
+_DISABLED_SPAN = nullcontext()
+
+
+class Histogram:
+    """Histogramme cumulatif à seaux fixes, plus les dernières valeurs pour les quantiles"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS, recent=1024):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=recent)
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self.recent.append(value)
+
+    def quantile(self, q):
+        return float(np.quantile(self.recent, q)) if self.recent else 0.0
+
+
+class _Span:
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe('span_seconds', time.perf_counter() - self.started, span=self.name, **self.labels)
+        return False
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _metric_name(prefix, name):
+    # Prometheus n'accepte que [a-zA-Z0-9_:] dans les noms de mesures
+    return re.sub(r'[^a-zA-Z0-9_:]', '_', f'{prefix}_{name}')
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in pairs) + '}'
+
+
+class Metrics:
+    """Registre de mesures partagé par le processus serveur"""
+
+    def __init__(self, enabled=False, log=False, prefix='dashboard'):
+        self.enabled = enabled
+        self.log = log
+        self.prefix = prefix
+        self._histograms = {}  # (nom, labels) -> Histogram
+        self._gauges = {}  # (nom, labels) -> valeur
+        self._counters = {}  # (nom, labels) -> total
+        self._collectors = {}  # clé -> appelable renvoyant [(nom, labels, valeur)]
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        mode = os.environ.get('DASHBOARD_METRICS', '').lower()
+        metrics = cls(enabled=mode not in ('', '0', 'off'), log=mode == 'log')
+        if metrics.log and not logger.handlers:
+            logger.addHandler(logging.StreamHandler())
+            logger.setLevel(logging.INFO)
+        return metrics
+
+    def span(self, name, **labels):
+        """Contexte chronométré ; no-op partagé quand la collecte est désactivée"""
+        if not self.enabled:
+            return _DISABLED_SPAN
+        return _Span(self, name, labels)
+
+    def timed(self, name=None):
+        """Décorateur : un span autour de chaque appel de la fonction.
+
+        Collecte désactivée, la fonction est renvoyée telle quelle (aucun surcoût).
+        """
+        def decorator(function):
+            if not self.enabled:
+                return function
+            span_name = name or function.__name__
+
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                with _Span(self, span_name, {}):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def observe(self, name, value, **labels):
+        """Ajoute une observation à l'histogramme ``name``"""
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+        if self.log:
+            logger.info(json.dumps({'metric': name, **labels, 'value': round(value, 6), 'ts': time.time()},
+                                   ensure_ascii=False))
+
+    def gauge(self, name, value, **labels):
+        """Fixe la valeur courante de la jauge ``name``"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = float(value)
+
+    def count(self, name, value=1, **labels):
+        """Incrémente le compteur ``name`` (erreurs, événements)"""
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def add_collector(self, key, collector):
+        """Enregistre (ou remplace) un appelable lu à chaque export : ``collector() -> [(nom, labels, valeur)]``"""
+        with self._lock:
+            self._collectors[key] = collector
+
+    def _collected_gauges(self):
+        with self._lock:
+            gauges = dict(self._gauges)
+            collectors = list(self._collectors.values())
+        for collector in collectors:
+            try:
+                samples = collector()
+            except Exception:
+                continue
+            for name, labels, value in samples:
+                gauges[(name, _label_key(labels))] = float(value)
+        return gauges
+
+    def histograms(self):
+        """Résumé des histogrammes : une ligne par (mesure, labels)"""
+        with self._lock:
+            return [{'mesure': name, **dict(labels), 'appels': h.count, 'total_s': h.sum,
+                     'moyenne_ms': h.sum / h.count * 1000, 'p50_ms': h.quantile(0.5) * 1000,
+                     'p95_ms': h.quantile(0.95) * 1000, 'max_ms': h.max * 1000}
+                    for (name, labels), h in self._histograms.items()]
+
+    def counters(self):
+        """Valeurs des compteurs : une ligne par (mesure, labels)"""
+        with self._lock:
+            return [{'mesure': name, **dict(labels), 'total': value} for (name, labels), value in self._counters.items()]
+
+    def gauges(self):
+        """Valeurs courantes des jauges (y compris celles des collecteurs)"""
+        return [{'mesure': name, **dict(labels), 'valeur': value}
+                for (name, labels), value in self._collected_gauges().items()]
+
+    def prometheus(self):
+        """Export au format texte d'exposition de Prometheus"""
+        lines = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            snapshot = [(key, list(h.counts), h.count, h.sum) for key, h in histograms]
+            counters = sorted(self._counters.items())
+        typed = set()
+        for (name, labels), counts, count, total in snapshot:
+            metric = _metric_name(self.prefix, name)
+            if metric not in typed:
+                lines.append(f'# TYPE {metric} histogram')
+                typed.add(metric)
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{metric}_bucket{_format_labels(labels, [("le", le)])} {cumulative}')
+            lines.append(f'{metric}_sum{_format_labels(labels)} {total!r}')
+            lines.append(f'{metric}_count{_format_labels(labels)} {count}')
+        for (name, labels), value in counters:
+            metric = _metric_name(self.prefix, name)
+            if metric not in typed:
+                lines.append(f'# TYPE {metric} counter')
+                typed.add(metric)
+            lines.append(f'{metric}{_format_labels(labels)} {value!r}')
+        for (name, labels), value in sorted(self._collected_gauges().items()):
+            metric = _metric_name(self.prefix, name)
+            if metric not in typed:
+                lines.append(f'# TYPE {metric} gauge')
+                typed.add(metric)
+            lines.append(f'{metric}{_format_labels(labels)} {value!r}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._gauges.clear()
+            self._counters.clear()
+
+
+# Registre du processus, configuré par l'environnement
+METRICS = Metrics.from_env()
+timed = METRICS.timed
+span = METRICS.span
+
+
+def memory_bytes(value):
+    """Empreinte mémoire d'un DataFrame, d'une matrice (``nbytes``) ou d'un dict de ceux-ci"""
+    if isinstance(value, dict):
+        return sum(memory_bytes(item) for item in value.values())
+    if hasattr(value, 'memory_usage'):
+        return int(value.memory_usage(deep=True).sum())
+    return int(getattr(value, 'nbytes', 0))
@@ -0,0 +1,225 @@
+# portfolio.py
+"""Valorisation d'un portefeuille de positions sur devises et commodities, et P&L.
+
+Une position est un ``symbole`` du dashboard et une ``quantite`` en unités de
+l'instrument (montant dans la devise, unités de cotation pour une commodity ;
+``USD`` pour le cash en dollars). Comme pour les cours croisés, les prix sont
+ramenés en dollars par unité : une position vaut ``quantite × usd[i] / usd[b]``
+dans la devise de référence ``b``. Les positions sont agrégées en exposition
+par instrument, si bien que l'historique de valeur est un produit
+dates × instruments par instruments, quel que soit le nombre de positions ;
+seule la valorisation ligne à ligne dépend de ce nombre.
+"""
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from analytics import GrowingArray
+from crossrates import BASE_CURRENCY
+
+DEFAULT_PORTFOLIO = os.environ.get(
+    'DASHBOARD_PORTFOLIO', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'portefeuille.csv'))
+
+REQUIRED_COLUMNS = ('symbole', 'quantite')
+
+
+def load_positions(path, instruments):
+    """Positions d'un fichier CSV ou JSON (liste d'objets), validées contre les instruments configurés.
+
+    Les colonnes supplémentaires (compte, libellé...) sont conservées.
+    """
+    if path.endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            positions = pd.DataFrame(json.load(f))
+    else:
+        positions = pd.read_csv(path)
+    missing = [column for column in REQUIRED_COLUMNS if column not in positions.columns]
+    if missing:
+        raise ValueError(f"Colonnes manquantes dans {path} : {', '.join(missing)}")
+    quantities = pd.to_numeric(positions['quantite'], errors='coerce')
+    if quantities.isna().any():
+        rows = ', '.join(str(row + 1) for row in np.flatnonzero(quantities.isna())[:5])
+        raise ValueError(f"Quantités non numériques dans {path} (lignes {rows})")
+    symbols = positions['symbole'].astype(str)
+    unknown = sorted(set(symbols) - set(instruments) - {BASE_CURRENCY})
+    if unknown:
+        raise ValueError(f"Instruments inconnus dans {path} : {', '.join(unknown)}")
+    return positions.assign(symbole=symbols, quantite=quantities.astype('float64')).reset_index(drop=True)
+
+
+class PortfolioEngine:
+    """Valeur et P&L des positions, complétés barre par barre et revalorisés à chaque cotation.
+
+    ``prices`` est un DataFrame large de prix en dollars par unité (dates ×
+    symboles), prolongé (ffill) ; le dollar est ajouté en premier symbole. Les
+    positions sur des instruments absents de ``prices`` sont écartées
+    (``excluded``). ``mark`` remplace les cours du jour et de la veille par ceux
+    des cotations publiées ; sans cotation, les deux dernières barres servent.
+    """
+
+    def __init__(self, positions, prices):
+        prices = prices.sort_index().ffill()
+        self.symbols = [BASE_CURRENCY] + [symbol for symbol in prices.columns if symbol != BASE_CURRENCY]
+        known = positions['symbole'].isin(self.symbols)
+        self.positions = positions[known].reset_index(drop=True)
+        self.excluded = positions[~known].reset_index(drop=True)
+        self._index = pd.Index(self.symbols).get_indexer(self.positions['symbole'])
+        self._quantities = self.positions['quantite'].to_numpy(dtype='float64')
+        # Exposition nette par instrument : l'historique ne dépend pas du nombre de positions
+        self.exposure = np.bincount(self._index, weights=self._quantities, minlength=len(self.symbols))
+        # Version des cours : augmente à chaque barre ou cotation intégrée et invalide les résultats mémorisés
+        self.version = 0
+        self.source_version = None
+        self.quote_version = None
+        self._lock = threading.Lock()
+        self._results = {}
+
+        usd = self._with_base(prices.reindex(columns=self.symbols[1:]).to_numpy(dtype='float64'))
+        self._dates = list(prices.index)
+        self._usd = GrowingArray(usd)
+        self._values = GrowingArray(self._value(usd))
+        self._marks = usd[-2:].copy() if len(usd) > 1 else np.vstack([usd, usd])
+
+    @staticmethod
+    def _with_base(usd):
+        return np.hstack([np.ones((len(usd), 1)), usd])
+
+    def _value(self, usd):
+        """Valeur en dollars du portefeuille pour chaque ligne de prix (instruments sans cours : 0)"""
+        return (np.nan_to_num(usd) @ self.exposure)[:, None]
+
+    def update(self, prices, source_version=None):
+        """Intègre les nouvelles barres d'un DataFrame large (mêmes colonnes) ; renvoie le nombre de barres intégrées"""
+        prices = prices.reindex(columns=self.symbols[1:]).sort_index()
+        with self._lock:
+            if source_version is not None:
+                self.source_version = source_version
+            applied = 0
+            for date, row in zip(prices.index, self._with_base(prices.to_numpy(dtype='float64'))):
+                if date < self._dates[-1]:
+                    continue
+                if date == self._dates[-1]:
+                    previous = self._usd.view()[-2] if len(self._usd) > 1 else self._usd.view()[-1]
+                    row = np.where(np.isnan(row), previous, row)
+                    if np.allclose(row, self._usd.view()[-1], equal_nan=True):
+                        continue
+                    self._dates.pop()
+                    self._usd.pop()
+                    self._values.pop()
+                else:
+                    row = np.where(np.isnan(row), self._usd.view()[-1], row)
+                self._dates.append(date)
+                self._usd.append(row)
+                self._values.append(self._value(row[None, :])[0])
+                applied += 1
+            if applied:
+                # Les cotations seront réappliquées par-dessus les nouvelles barres
+                self._marks = self._usd.view()[-2:].copy()
+                self.quote_version = None
+                self.version += 1
+                self._results.clear()
+            return applied
+
+    def mark(self, current, previous, quote_version=None):
+        """Revalorise sur les cotations publiées : Series ``symbole → dollars par unité`` du jour et de la veille"""
+        with self._lock:
+            marks = self._marks.copy()
+            for row, quotes in enumerate((previous, current)):
+                quotes = quotes.reindex(self.symbols[1:]).to_numpy(dtype='float64')
+                marks[row, 1:] = np.where(np.isnan(quotes), marks[row, 1:], quotes)
+            self._marks = marks
+            self.quote_version = quote_version
+            self.version += 1
+            self._results.clear()
+
+    def _memoized(self, key, compute):
+        with self._lock:
+            key = (self.version,) + key
+            if key in self._results:
+                return self._results[key]
+            marks = self._marks.copy()
+        result = compute(marks)
+        with self._lock:
+            if key[0] == self.version:
+                self._results[key] = result
+        return result
+
+    def _base_index(self, base):
+        if base not in self.symbols:
+            raise KeyError(f"Devise de référence sans cours : {base}")
+        return self.symbols.index(base)
+
+    def positions_table(self, base=BASE_CURRENCY):
+        """Valeur, P&L du jour et poids (%) de chaque position, dans la devise ``base``"""
+        b = self._base_index(base)
+
+        def compute(marks):
+            previous, current = marks[:, self._index] / marks[:, [b]]
+            value = self._quantities * current
+            pnl = value - self._quantities * previous
+            total = np.nansum(value)
+            table = self.positions.copy()
+            table['cours_usd'] = marks[1, self._index]
+            table['valeur'] = value
+            table['pnl_jour'] = pnl
+            table['poids'] = value / total * 100 if total else np.nan
+            return table
+        return self._memoized(('positions', base), compute)
+
+    def by_instrument(self, base=BASE_CURRENCY):
+        """Exposition, valeur et P&L du jour par instrument détenu, dans la devise ``base``"""
+        b = self._base_index(base)
+
+        def compute(marks):
+            held = np.flatnonzero(self.exposure)
+            previous, current = marks[:, held] / marks[:, [b]]
+            value = self.exposure[held] * current
+            return pd.DataFrame({'exposition': self.exposure[held], 'valeur': value,
+                                 'pnl_jour': value - self.exposure[held] * previous},
+                                index=pd.Index([self.symbols[i] for i in held], name='symbole'))
+        return self._memoized(('instruments', base), compute)
+
+    def _marked_values(self, marks, b):
+        """Valeur du portefeuille à la clôture de la veille et au cours du jour, dans la devise d'indice ``b``"""
+        return (np.nan_to_num(marks) @ self.exposure) / marks[:, b]
+
+    def summary(self, base=BASE_CURRENCY):
+        """Valeur totale, P&L du jour (montant et %) dans la devise ``base``"""
+        b = self._base_index(base)
+
+        def compute(marks):
+            previous, current = self._marked_values(marks, b)
+            return {'valeur': current, 'pnl_jour': current - previous,
+                    'pnl_jour_pct': (current / previous - 1) * 100 if previous else np.nan}
+        return self._memoized(('resume', base), compute)
+
+    def history(self, base=BASE_CURRENCY, start=None):
+        """Valeur journalière, P&L du jour et P&L cumulé depuis ``start`` dans la devise ``base``"""
+        b = self._base_index(base)
+
+        def compute(marks):
+            with self._lock:
+                index = pd.DatetimeIndex(self._dates, name='date')
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    value = self._values.view()[:, 0] / self._usd.view()[:, b]
+            lo = 0 if start is None else index.searchsorted(pd.Timestamp(start))
+            # Les deux derniers points suivent les cotations publiées (veille et jour) : le P&L du
+            # dernier jour est celui de ``summary``
+            n = min(2, len(value))
+            value[-n:] = self._marked_values(marks, b)[-n:]
+            pnl = np.diff(value, prepend=np.nan)
+            window = value[lo:]
+            return pd.DataFrame({'valeur': window, 'pnl_jour': pnl[lo:],
+                                 'pnl_cumule': window - (window[0] if len(window) else np.nan)}, index=index[lo:])
+        return self._memoized(('historique', base, start), compute)
+
+    @property
+    def last_date(self):
+        return self._dates[-1]
+
+    @property
+    def nbytes(self):
+        return self._usd.view().nbytes + self._values.view().nbytes
@@ -0,0 +1,104 @@
+# price_matrix.py
+"""Représentation compacte de l'historique : matrice dense dates × symboles.
+
+Chaque champ (Close, High, Low...) est un tableau NumPy 2D, éventuellement
+projeté en mémoire depuis le disque. Les attributs descriptifs (pays, région,
+catégorie...) vivent dans une table de métadonnées séparée, une ligne par
+instrument, au lieu d'être répétés à chaque barre.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+def instrument_metadata(monnaies, commodities):
+    """Table statique des instruments, indexée par symbole du dashboard"""
+    rows = []
+    for classe, instruments in (('devise', monnaies), ('commodity', commodities)):
+        for symbole, info in instruments.items():
+            rows.append({'classe': classe, **info, 'symbole': symbole})
+    return pd.DataFrame(rows).set_index('symbole')
+
+
+class PriceMatrix:
+    """Historique dense : ``values[field][i, j]`` est la valeur du symbole j à la date i.
+
+    Les vues renvoyées par ``series`` et ``cross_section`` partagent la mémoire
+    de la matrice (aucune copie) ; elles sont en lecture seule.
+    """
+
+    def __init__(self, dates, symbols, values):
+        self.dates = pd.DatetimeIndex(dates, name='date')
+        self.symbols = list(symbols)
+        self.values = dict(values)
+        self._date_pos = {date: i for i, date in enumerate(self.dates)}
+        self._symbol_pos = {symbol: j for j, symbol in enumerate(self.symbols)}
+        for array in self.values.values():
+            if array.shape != (len(self.dates), len(self.symbols)):
+                raise ValueError("Dimensions de la matrice incohérentes avec les dates et symboles")
+            if array.flags.writeable:
+                array.flags.writeable = False
+
+    @classmethod
+    def from_histories(cls, histories, symbols, fields=('Close',), dtype='float64'):
+        """Aligne des historiques OHLC sur l'union de leurs dates (NaN quand un symbole ne cote pas).
+
+        ``symbols`` associe le nom de colonne voulu (symbole du dashboard) au
+        symbole yfinance servant de clé dans ``histories``.
+        """
+        frames = {name: histories[ticker] for name, ticker in symbols.items()
+                  if ticker in histories and not histories[ticker].empty}
+        if not frames:
+            return cls([], [], {field: np.empty((0, 0), dtype=dtype) for field in fields})
+        dates = frames[next(iter(frames))].index
+        for data in frames.values():
+            dates = dates.union(data.index)
+        names = list(frames)
+        values = {}
+        for field in fields:
+            array = np.full((len(dates), len(names)), np.nan, dtype=dtype)
+            for j, name in enumerate(names):
+                data = frames[name]
+                array[dates.get_indexer(data.index), j] = data[field].to_numpy()
+            values[field] = array
+        return cls(dates, names, values)
+
+    @property
+    def fields(self):
+        return list(self.values)
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self.values.values())
+
+    def series(self, symbol, field='Close'):
+        """Vue (sans copie) de la série d'un symbole"""
+        return self.values[field][:, self._symbol_pos[symbol]]
+
+    def cross_section(self, date, field='Close'):
+        """Vue (sans copie) des valeurs de tous les symboles à une date"""
+        return self.values[field][self._date_pos[pd.Timestamp(date)]]
+
+    def to_frame(self, field='Close'):
+        """DataFrame large adossé à la matrice"""
+        return pd.DataFrame(self.values[field], index=self.dates, columns=self.symbols, copy=False)
+
+    def save(self, directory):
+        """Écrit un fichier .npy par champ et l'index (dates, symboles) en JSON"""
+        os.makedirs(directory, exist_ok=True)
+        for field, array in self.values.items():
+            np.save(os.path.join(directory, f'{field}.npy'), array)
+        with open(os.path.join(directory, 'index.json'), 'w', encoding='utf-8') as f:
+            json.dump({'dates': [d.strftime('%Y-%m-%d') for d in self.dates],
+                       'symbols': self.symbols, 'fields': self.fields}, f)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """Relit une matrice sauvegardée, projetée en mémoire par défaut"""
+        with open(os.path.join(directory, 'index.json'), encoding='utf-8') as f:
+            index = json.load(f)
+        values = {field: np.load(os.path.join(directory, f'{field}.npy'), mmap_mode=mmap_mode)
+                  for field in index['fields']}
+        return cls(pd.to_datetime(index['dates']), index['symbols'], values)
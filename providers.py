@@ -0,0 +1,206 @@
+# providers.py
+"""Fournisseurs de données interchangeables : yfinance, enregistrement et rejeu.
+
+Un fournisseur expose quatre opérations :
+
+- ``history(symbols, start, end, timeout)`` : barres journalières OHLC, un DataFrame par symbole ;
+- ``index_quotes(symbols)`` : dernier niveau et clôture précédente de plusieurs
+  indices, en un seul appel groupé sur les barres récentes ;
+- ``quote_history(symbol, timeout)`` : les 5 dernières barres d'un symbole ;
+- ``index_level(symbol, timeout)`` : niveau courant d'un indice.
+
+Le dashboard n'utilise que ``history`` et ``index_quotes`` ; les deux appels
+par symbole restent comme références des benchmarks (``concurrent_quotes``,
+``index_quotes``), qui mesurent le gain des appels groupés.
+
+Le mode enregistrement capture sur disque les réponses d'un autre fournisseur ;
+le rejeu les resert sans réseau, avec latence et taux d'erreur synthétiques.
+Le fournisseur du dashboard se choisit via ``DASHBOARD_PROVIDER`` :
+``yfinance`` (défaut), ``record:<répertoire>`` ou ``replay:<répertoire>``.
+"""
+import json
+import os
+import random
+import threading
+import time
+
+import pandas as pd
+
+from fetching import (BATCH_TIMEOUT, call_with_timeout, normalize_ohlc, split_multi_ticker, yfinance_batch_fetcher, yfinance_index_fetcher,
+                      yfinance_quote_fetcher)
+from history_store import HistoryStore
+
+
+class DataProvider:
+    """Interface commune des fournisseurs de données"""
+
+    def history(self, symbols, start, end, timeout=BATCH_TIMEOUT):
+        raise NotImplementedError
+
+    def quote_history(self, symbol, timeout):
+        """Référence des benchmarks : cotation par symbole, remplacée par ``history`` en appel groupé"""
+        raise NotImplementedError
+
+    def index_level(self, symbol, timeout):
+        """Référence des benchmarks : niveau par indice, remplacé par ``index_quotes``"""
+        raise NotImplementedError
+
+    def history_one(self, symbol, start, end):
+        """Historique d'un seul symbole (fetcher symbole par symbole de HistoryStore)"""
+        return self.history([symbol], start, end).get(symbol)
+
+    def index_quotes(self, symbols, days=10, timeout=10.0):
+        """``{symbole: {'last': ..., 'previous_close': ...}}`` depuis les barres des ``days`` derniers jours.
+
+        Pendant la séance, la dernière barre est celle du jour en cours : ``last``
+        est alors le niveau courant. ``previous_close`` vaut None s'il n'y a qu'une barre.
+        Lève TimeoutError si l'appel groupé dépasse ``timeout`` secondes.
+        """
+        today = pd.Timestamp.today().normalize()
+        frames = call_with_timeout(self.history, timeout, list(symbols),
+                                   (today - pd.Timedelta(days=days)).strftime('%Y-%m-%d'),
+                                   (today + pd.Timedelta(days=1)).strftime('%Y-%m-%d'), timeout)
+        quotes = {}
+        for symbol, data in frames.items():
+            closes = data['Close'].dropna()
+            if not closes.empty:
+                quotes[symbol] = {'last': float(closes.iloc[-1]),
+                                  'previous_close': float(closes.iloc[-2]) if len(closes) > 1 else None}
+        return quotes
+
+
+class YFinanceProvider(DataProvider):
+    """Fournisseur Yahoo Finance via yfinance"""
+
+    def history(self, symbols, start, end, timeout=BATCH_TIMEOUT):
+        symbols = list(symbols)
+        return split_multi_ticker(yfinance_batch_fetcher(symbols, start, end, timeout), symbols)
+
+    def quote_history(self, symbol, timeout):
+        return yfinance_quote_fetcher(symbol, timeout)
+
+    def index_level(self, symbol, timeout):
+        return yfinance_index_fetcher(symbol, timeout)
+
+
+class RecordingProvider(DataProvider):
+    """Enregistre sur disque les réponses d'un fournisseur tout en les renvoyant.
+
+    Les barres sont fusionnées dans un HistoryStore (``<root>/historique``) et
+    les niveaux d'indices dans ``<root>/indices.json``.
+    """
+
+    def __init__(self, inner, root):
+        self.inner = inner
+        self.root = root
+        self.store = HistoryStore(os.path.join(root, 'historique'), fetcher=lambda *args: None)
+        self._lock = threading.Lock()
+
+    def _record_bars(self, symbol, data):
+        data = normalize_ohlc(data)
+        if data.empty:
+            return
+        with self._lock:
+            stored = self.store.load(symbol)
+            merged = pd.concat([stored, data]) if not stored.empty else data
+            self.store.write(symbol, merged[~merged.index.duplicated(keep='last')].sort_index())
+
+    def history(self, symbols, start, end, timeout=BATCH_TIMEOUT):
+        frames = self.inner.history(symbols, start, end, timeout)
+        for symbol, data in frames.items():
+            self._record_bars(symbol, data)
+        return frames
+
+    def quote_history(self, symbol, timeout):
+        data = self.inner.quote_history(symbol, timeout)
+        self._record_bars(symbol, data)
+        return data
+
+    def index_level(self, symbol, timeout):
+        level = self.inner.index_level(symbol, timeout)
+        with self._lock:
+            path = os.path.join(self.root, 'indices.json')
+            try:
+                with open(path, encoding='utf-8') as f:
+                    levels = json.load(f)
+            except (OSError, ValueError):
+                levels = {}
+            levels[symbol] = float(level)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(levels, f, indent=1, sort_keys=True)
+        return level
+
+
+class ReplayProvider(DataProvider):
+    """Ressert un enregistrement sans réseau.
+
+    Chaque appel attend ``latency`` secondes (plus un jitter exponentiel de
+    moyenne ``jitter``) et échoue avec une probabilité ``error_rate`` ; la graine
+    ``seed`` rend les scénarios reproductibles.
+    """
+
+    def __init__(self, root, latency=0.0, jitter=0.0, error_rate=0.0, seed=0):
+        self.store = HistoryStore(os.path.join(root, 'historique'), fetcher=lambda *args: None)
+        try:
+            with open(os.path.join(root, 'indices.json'), encoding='utf-8') as f:
+                self.levels = json.load(f)
+        except (OSError, ValueError):
+            self.levels = {}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.calls = 0
+        self._frames = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _simulate(self, what):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + (self._rng.expovariate(1 / self.jitter) if self.jitter else 0.0)
+            failing = self._rng.random() < self.error_rate
+        time.sleep(delay)
+        if failing:
+            raise ConnectionError(f"{what} : erreur simulée")
+
+    def _frame(self, symbol):
+        if symbol not in self._frames:
+            self._frames[symbol] = self.store.load(symbol)
+        return self._frames[symbol]
+
+    def history(self, symbols, start, end, timeout=BATCH_TIMEOUT):
+        symbols = list(symbols)
+        self._simulate(f"historique de {len(symbols)} symboles")
+        frames = {}
+        for symbol in symbols:
+            data = self._frame(symbol)
+            data = data[(data.index >= pd.Timestamp(start)) & (data.index < pd.Timestamp(end))]
+            if not data.empty:
+                frames[symbol] = data
+        return frames
+
+    def quote_history(self, symbol, timeout):
+        self._simulate(symbol)
+        return self._frame(symbol).iloc[-5:]
+
+    def index_level(self, symbol, timeout):
+        self._simulate(symbol)
+        if symbol in self.levels:
+            return self.levels[symbol]
+        return self._frame(symbol)['Close'].iloc[-1]
+
+
+def provider_from_env(spec=None):
+    """Construit le fournisseur décrit par ``spec`` ou par la variable DASHBOARD_PROVIDER"""
+    spec = spec or os.environ.get('DASHBOARD_PROVIDER', 'yfinance')
+    kind, _, root = spec.partition(':')
+    if kind == 'yfinance':
+        return YFinanceProvider()
+    if kind == 'record' and root:
+        return RecordingProvider(YFinanceProvider(), root)
+    if kind == 'replay' and root:
+        return ReplayProvider(root,
+                              latency=float(os.environ.get('DASHBOARD_REPLAY_LATENCY', 0)),
+                              jitter=float(os.environ.get('DASHBOARD_REPLAY_JITTER', 0)),
+                              error_rate=float(os.environ.get('DASHBOARD_REPLAY_ERROR_RATE', 0)))
+    raise ValueError(f"Fournisseur de données inconnu : {spec}")
@@ -0,0 +1,173 @@
+# refresh.py
+"""Rafraîchissement des cotations en arrière-plan, indépendant des sessions."""
+import logging
+import threading
+import time
+
+import pandas as pd
+
+from instrumentation import METRICS
+
+logger = logging.getLogger('dashboard.refresh')
+
+# Résultat d'une étape en échec (la valeur None est un résultat valide)
+_FAILED = object()
+
+
+def same_data(old, new):
+    """Compare deux résultats de chargeur (DataFrame, dict ou scalaire)"""
+    if isinstance(old, pd.DataFrame) and isinstance(new, pd.DataFrame):
+        return old.equals(new)
+    if isinstance(old, dict) and isinstance(new, dict):
+        return old.keys() == new.keys() and all(same_data(old[key], new[key]) for key in old)
+    try:
+        return bool(old == new)
+    except (TypeError, ValueError):
+        return False
+
+
+class Snapshot:
+    """Instantané immuable des sections publiées par le planificateur.
+
+    ``version`` augmente à chaque publication ; ``section_versions`` n'augmente
+    que pour les sections dont les valeurs ont changé, ce qui permet aux sessions
+    de ne redessiner que ces sections. ``preliminary`` marque un instantané
+    reconstitué depuis le cache local, avant le premier cycle complet.
+    """
+
+    def __init__(self, version, sections, section_versions, updated_at, preliminary=False):
+        self.version = version
+        self.sections = sections
+        self.section_versions = section_versions
+        self.updated_at = updated_at
+        self.preliminary = preliminary
+
+    def get(self, name, default=None):
+        return self.sections.get(name, default)
+
+
+class RefreshScheduler:
+    """Interroge les chargeurs toutes les ``interval`` secondes dans un thread démon.
+
+    ``loaders`` associe un nom de section à un appelable sans argument. Un
+    chargeur en échec conserve la dernière valeur publiée de sa section.
+    ``prepare``, s'il est fourni, est appelé une fois par cycle avant les
+    chargeurs, par exemple pour un téléchargement commun à plusieurs sections.
+    ``preload``, s'il est fourni, renvoie des sections lues sans réseau : elles
+    sont publiées en instantané préliminaire avant le premier cycle, pour que
+    les sessions affichent quelque chose sans attendre les téléchargements.
+    ``on_publish``, s'il est fourni, reçoit chaque nouvel instantané publié.
+    Les échecs sont journalisés, comptés (``refresh_errors``) et gardés dans
+    ``errors`` (étape → message et heure) jusqu'au prochain succès de l'étape.
+    """
+
+    def __init__(self, loaders, interval=60.0, prepare=None, preload=None, on_publish=None):
+        self.loaders = dict(loaders)
+        self.prepare = prepare
+        self.preload = preload
+        self.on_publish = on_publish
+        self.interval = interval
+        self._snapshot = Snapshot(0, {}, {}, None)
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._poll_lock = threading.Lock()
+        self._thread = None
+        self.errors = {}
+
+    def start(self):
+        """Démarre le thread de rafraîchissement (premier chargement immédiat)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name='refresh-scheduler', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def wake(self):
+        """Demande un cycle immédiat au thread de rafraîchissement, sans attendre son résultat"""
+        self._wake.set()
+
+    def run(self):
+        """Boucle de rafraîchissement dans le thread appelant, jusqu'à ``stop`` (thread de ``start`` ou mode service)"""
+        if self.preload is not None:
+            self._publish_preload()
+        while not self._stop.is_set():
+            self.poll()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _publish_preload(self):
+        sections = self._run_stage('preload', self.preload)
+        if sections is _FAILED:
+            sections = {}
+        with self._poll_lock:
+            if sections and self._snapshot.version == 0:
+                self._snapshot = Snapshot(1, dict(sections), dict.fromkeys(sections, 1), time.time(), preliminary=True)
+                self._notify(self._snapshot)
+        # Les sessions n'attendent plus : le premier cycle complet sera publié dès qu'il aboutit
+        self._ready.set()
+
+    def poll(self):
+        """Exécute tous les chargeurs et publie un nouvel instantané si des valeurs ont changé"""
+        with self._poll_lock, METRICS.span('cycle_rafraichissement'):
+            current = self._snapshot
+            sections = dict(current.sections)
+            section_versions = dict(current.section_versions)
+            changed = False
+            if self.prepare is not None:
+                self._run_stage('prepare', self.prepare)
+            for name, loader in self.loaders.items():
+                data = self._run_stage(name, loader)
+                if data is _FAILED:
+                    # La section garde sa dernière valeur publiée, signalée par ``errors``
+                    continue
+                if name in sections and same_data(sections[name], data):
+                    continue
+                sections[name] = data
+                section_versions[name] = section_versions.get(name, 0) + 1
+                changed = True
+            if changed or current.updated_at is None or current.preliminary:
+                self._snapshot = Snapshot(current.version + 1, sections, section_versions, time.time())
+                self._notify(self._snapshot)
+            self._ready.set()
+            return self._snapshot
+
+    def _run_stage(self, stage, function, *args):
+        """Exécute une étape du cycle ; un échec est journalisé, compté et gardé dans ``errors``, et renvoie ``_FAILED``"""
+        try:
+            result = function(*args)
+        except Exception as exc:
+            logger.exception("Échec de l'étape %s du rafraîchissement", stage)
+            METRICS.count('refresh_errors', stage=stage)
+            self.errors[stage] = {'message': f'{type(exc).__name__}: {exc}', 'at': time.time()}
+            return _FAILED
+        self.errors.pop(stage, None)
+        return result
+
+    @property
+    def last_error(self):
+        """Dernier échec non résolu ``{'stage', 'message', 'at'}``, ou None"""
+        errors = dict(self.errors)
+        if not errors:
+            return None
+        stage = max(errors, key=lambda name: errors[name]['at'])
+        return {'stage': stage, **errors[stage]}
+
+    def _notify(self, snapshot):
+        if self.on_publish is not None:
+            # Un abonné en échec n'arrête pas le cycle : il recevra l'instantané suivant
+            self._run_stage('on_publish', self.on_publish, snapshot)
+
+    def refresh_now(self):
+        """Force un rafraîchissement immédiat dans le thread appelant"""
+        return self.poll()
+
+    def snapshot(self, timeout=None):
+        """Dernier instantané publié ; attend le premier chargement au plus ``timeout`` secondes"""
+        if timeout:
+            self._ready.wait(timeout)
+        return self._snapshot
@@ -0,0 +1,263 @@
+# resampling.py
+"""Données de graphiques allégées : pyramides OHLC et sous-échantillonnage visuel LTTB.
+
+Chaque symbole garde son historique agrégé par jour, semaine et mois ; un
+graphique lit le niveau le plus fin qui tient dans ``max_points`` barres sur la
+plage demandée. Les nouvelles barres ne recalculent que la dernière période
+de chaque niveau. Les courbes (analytique) sont réduites par LTTB
+(Largest-Triangle-Three-Buckets), qui garde la forme visuelle de la série.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from analytics import GrowingArray
+
+# Niveaux de la pyramide, du plus fin au plus grossier (étiquette = fin de période)
+LEVELS = ('jour', 'semaine', 'mois')
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+MAX_POINTS = 500
+
+
+def _lttb(x, y, threshold):
+    """LTTB sur des colonnes sans NaN partageant ``x`` : indices ``(threshold, colonnes)``"""
+    n, columns = y.shape
+    # Bornes des seaux intermédiaires (le premier et le dernier point forment chacun un seau)
+    edges = (np.arange(threshold - 1) * (n - 2) / (threshold - 2)).astype(np.int64) + 1
+    edges[-1] = n - 1
+    keep = np.empty((threshold, columns), dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = np.zeros(columns, dtype=np.int64)
+    column_index = np.arange(columns)
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Sommet suivant : moyenne du seau suivant (le dernier point pour le dernier seau)
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean(axis=0)
+        xa, ya = x[a], y[a, column_index]
+        areas = np.abs((xa - avg_x) * (y[start:end] - ya) - (xa - x[start:end, None]) * (avg_y - ya))
+        a = start + np.argmax(areas, axis=0)
+        keep[i + 1] = a
+    return keep
+
+
+def lttb(x, y, threshold):
+    """Indices des ``threshold`` points gardés par Largest-Triangle-Three-Buckets.
+
+    Les points NaN sont écartés ; le premier et le dernier point valides sont
+    toujours gardés. ``x`` doit être croissant (dates converties en nombres).
+    """
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    valid = np.flatnonzero(~np.isnan(y))
+    if threshold >= len(valid) or threshold < 3:
+        return valid
+    return valid[_lttb(x[valid], y[valid, None], threshold)[:, 0]]
+
+
+def downsample_series(series, max_points=MAX_POINTS):
+    """Série réduite à ``max_points`` points par LTTB (index de dates)"""
+    if len(series) <= max_points:
+        return series.dropna()
+    keep = lttb(series.index.asi8, series.to_numpy(dtype='float64'), max_points)
+    return series.iloc[keep]
+
+
+def downsample_frame(frame, max_points=MAX_POINTS):
+    """Colonnes d'un DataFrame large réduites séparément : ``{colonne: série}``.
+
+    Quand les NaN n'occupent que des lignes entières (début des fenêtres
+    glissantes), toutes les colonnes sont réduites en une passe.
+    """
+    complete = frame.dropna()
+    if len(complete) <= max_points or len(complete) != len(frame.dropna(how='all')):
+        return {column: downsample_series(frame[column], max_points) for column in frame.columns}
+    keep = _lttb(complete.index.asi8.astype('float64'), complete.to_numpy(dtype='float64'), max_points)
+    return {column: complete[column].iloc[keep[:, j]] for j, column in enumerate(complete.columns)}
+
+
+def line_figure(frame, max_points=MAX_POINTS, y_title='%', legend_title='Instrument'):
+    """Courbes d'un DataFrame large, chaque colonne réduite à ``max_points`` points"""
+    import plotly.graph_objects as go
+    traces = [go.Scatter(x=series.index.to_numpy(), y=series.to_numpy(), mode='lines', name=str(column))
+              for column, series in downsample_frame(frame, max_points).items()]
+    return go.Figure(traces, layout={'yaxis_title': y_title, 'legend_title_text': legend_title})
+
+
+def candlestick_figure(bars, name=None):
+    """Chandeliers d'un tableau de barres OHLC"""
+    import plotly.graph_objects as go
+    fig = go.Figure(go.Candlestick(x=bars.index.to_numpy(), open=bars['Open'], high=bars['High'], low=bars['Low'],
+                                   close=bars['Close'], name=name))
+    fig.update_layout(xaxis_rangeslider_visible=False)
+    return fig
+
+
+def period_labels(dates, level):
+    """Date de fin de période (vendredi, fin de mois) de chaque date ``datetime64[D]``"""
+    if level == 'jour':
+        return dates
+    if level == 'semaine':
+        days = dates.astype('int64')
+        # Le 1er janvier 1970 était un jeudi : (jours + 3) % 7 donne le jour de la semaine
+        return (days + (4 - (days + 3) % 7) % 7).astype('datetime64[D]')
+    return ((dates.astype('datetime64[M]') + 1).astype('datetime64[D]') - 1)
+
+
+def aggregate(dates, values, level):
+    """Barres OHLCV journalières regroupées par période : ``(étiquettes, valeurs)``"""
+    labels = period_labels(dates, level)
+    if level == 'jour' or not len(labels):
+        return labels, values
+    starts = np.concatenate([[0], np.flatnonzero(labels[1:] != labels[:-1]) + 1])
+    ends = np.concatenate([starts[1:], [len(labels)]]) - 1
+    out = np.empty((len(starts), values.shape[1]))
+    out[:, 0] = values[starts, 0]
+    out[:, 1] = np.fmax.reduceat(values[:, 1], starts)
+    out[:, 2] = np.fmin.reduceat(values[:, 2], starts)
+    out[:, 3] = values[ends, 3]
+    out[:, 4] = np.add.reduceat(np.nan_to_num(values[:, 4]), starts)
+    return labels[starts], out
+
+
+class OHLCPyramid:
+    """Historique OHLCV d'un symbole aux niveaux de ``LEVELS``, en tableaux NumPy.
+
+    Chaque niveau est un ``GrowingArray`` de lignes (jour, Open, High, Low,
+    Close, Volume), le jour étant compté depuis 1970 : une nouvelle barre
+    remplace la queue sur place au lieu de recopier tout l'historique.
+    ``dates[niveau]`` porte les étiquettes (jour de cotation ou fin de période),
+    ``values[niveau]`` une ligne Open, High, Low, Close, Volume par étiquette.
+    """
+
+    def __init__(self, daily):
+        dates, values = self._arrays(daily)
+        self._levels = {level: GrowingArray(self._rows(*aggregate(dates, values, level))) for level in LEVELS}
+
+    @staticmethod
+    def _arrays(data):
+        if not data.index.is_monotonic_increasing:
+            data = data.sort_index()
+        if list(data.columns) != COLUMNS:
+            data = data.reindex(columns=COLUMNS)
+        values = data.to_numpy(dtype='float64')
+        valid = ~np.isnan(values[:, 3])
+        return data.index.to_numpy().astype('datetime64[D]')[valid], values[valid]
+
+    @staticmethod
+    def _rows(dates, values):
+        return np.column_stack([dates.astype('datetime64[D]').astype('int64'), values])
+
+    def _dates(self, level):
+        return self._levels[level].view()[:, 0].astype('int64').astype('datetime64[D]')
+
+    @property
+    def dates(self):
+        return {level: self._dates(level) for level in LEVELS}
+
+    @property
+    def values(self):
+        return {level: self._levels[level].view()[:, 1:] for level in LEVELS}
+
+    @property
+    def last_date(self):
+        daily = self._levels['jour']
+        return np.datetime64(int(daily.view()[-1, 0]), 'D') if len(daily) else None
+
+    def update(self, bars):
+        """Intègre de nouvelles barres journalières ; renvoie le nombre de barres intégrées.
+
+        Une barre à une date déjà connue remplace l'ancienne. Aux niveaux
+        agrégés, seules les périodes à partir de celle de la première nouvelle
+        barre sont recalculées.
+        """
+        dates, values = self._arrays(bars)
+        days = dates.astype('int64')
+        daily = self._levels['jour']
+        if len(daily):
+            recent = days >= daily.view()[-1, 0]
+            days, values = days[recent], values[recent]
+            cut = np.searchsorted(daily.view()[:, 0], days[0]) if len(days) else 0
+            known = daily.view()[cut:, 1:]
+            if len(known) == len(values) and np.array_equal(known, values, equal_nan=True):
+                return 0
+        if not len(days):
+            return 0
+        first = days[0]
+        daily.truncate(np.searchsorted(daily.view()[:, 0], first))
+        daily.extend(np.column_stack([days, values]))
+        rows = daily.view()
+        for level in LEVELS:
+            if level == 'jour':
+                continue
+            # Les étiquettes sont des fins de période : les périodes closes avant ``first`` sont intactes
+            periods = self._levels[level]
+            labels = periods.view()[:, 0]
+            kept = np.searchsorted(labels, first)
+            since = np.searchsorted(rows[:, 0], labels[kept - 1], 'right') if kept else 0
+            # Seules les périodes ouvertes (dernière semaine, dernier mois) sont réagrégées
+            tail = rows[since:]
+            periods.truncate(kept)
+            periods.extend(self._rows(*aggregate(tail[:, 0].astype('int64').astype('datetime64[D]'), tail[:, 1:], level)))
+        return len(days)
+
+    def frame(self, level='jour', start=None, end=None):
+        """Barres d'un niveau entre ``start`` et ``end`` inclus, en DataFrame"""
+        rows = self._levels[level].view()
+        days = rows[:, 0]
+        lo = 0 if start is None else np.searchsorted(days, np.datetime64(pd.Timestamp(start), 'D').astype('int64'))
+        hi = len(days) if end is None else np.searchsorted(
+            days, np.datetime64(pd.Timestamp(end), 'D').astype('int64'), 'right')
+        dates = days[lo:hi].astype('int64').astype('datetime64[D]')
+        return pd.DataFrame(rows[lo:hi, 1:].copy(), index=pd.DatetimeIndex(dates, name='date'), columns=COLUMNS)
+
+    def bars(self, start=None, end=None, max_points=MAX_POINTS):
+        """``(niveau, barres)`` : le niveau le plus fin qui tient en ``max_points`` barres sur la plage"""
+        for level in LEVELS:
+            frame = self.frame(level, start, end)
+            if len(frame) <= max_points:
+                return level, frame
+        return level, frame.iloc[-max_points:]
+
+    @property
+    def nbytes(self):
+        return sum(rows.view().nbytes for rows in self._levels.values())
+
+
+class ChartData:
+    """Pyramides OHLC de tous les symboles, partagées entre sessions et complétées par l'instantané"""
+
+    def __init__(self, histories):
+        self.pyramids = {symbol: OHLCPyramid(data) for symbol, data in histories.items()
+                         if data is not None and not data.empty}
+        # Version de la source (instantané) des dernières barres intégrées
+        self.source_version = None
+        self._lock = threading.Lock()
+
+    def update(self, bars, source_version=None):
+        """Intègre ``{symbole: barres récentes}`` ; renvoie le nombre de barres intégrées"""
+        with self._lock:
+            if source_version is not None:
+                self.source_version = source_version
+            applied = 0
+            for symbol, data in bars.items():
+                if data is None or data.empty:
+                    continue
+                pyramid = self.pyramids.get(symbol)
+                if pyramid is None:
+                    self.pyramids[symbol] = OHLCPyramid(data)
+                    applied += len(data)
+                else:
+                    applied += pyramid.update(data)
+            return applied
+
+    def bars(self, symbol, start=None, end=None, max_points=MAX_POINTS):
+        with self._lock:
+            return self.pyramids[symbol].bars(start, end, max_points)
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return sum(pyramid.nbytes for pyramid in self.pyramids.values())
@@ -0,0 +1,230 @@
+# risk.py
+"""Moteur de risque sur l'historique : VaR / CVaR historiques et paramétriques, stress tests Monte Carlo.
+
+Les prix sont exprimés en dollars par unité (devises converties avec
+``crossrates.to_usd_per_unit``) : une perte est une baisse de la valeur en
+dollars de la position. Les pertes sont données en % positifs sur l'horizon
+demandé. Les résultats sont mémorisés par version des données : une nouvelle
+barre les invalide, les sessions suivantes relisent le même calcul.
+"""
+import threading
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from analytics import GrowingArray
+
+# Chocs cumulés (%) sur l'horizon par région ou catégorie, puis par symbole, et multiplicateur de volatilité
+SCENARIOS = {
+    'Récession': {
+        'volatilite': 1.8,
+        'groupes': {'Énergie': -30, 'Métal Industriel': -20, 'Agricole': -5, 'Crypto': -40, 'Métal Précieux': 8,
+                    'Europe': -4, 'Asie': -4, 'Amérique': -6, 'Océanie': -8, 'Afrique': -12, 'Moyen-Orient': -3},
+        'symboles': {'JPY': 5, 'CHF': 3},
+    },
+    'Reprise': {
+        'volatilite': 0.9,
+        'groupes': {'Énergie': 20, 'Métal Industriel': 15, 'Agricole': 5, 'Crypto': 30, 'Métal Précieux': -5,
+                    'Europe': 3, 'Asie': 3, 'Amérique': 4, 'Océanie': 6, 'Afrique': 8, 'Moyen-Orient': 2},
+        'symboles': {'JPY': -3, 'CHF': -2},
+    },
+}
+PORTFOLIO = 'Portefeuille'
+
+
+def horizon_returns(returns, horizon):
+    """Rendements logarithmiques cumulés sur ``horizon`` jours glissants (fenêtres chevauchantes)"""
+    if horizon == 1:
+        return returns
+    cumsum = np.vstack([np.zeros((1, returns.shape[1])), np.cumsum(returns, axis=0)])
+    return cumsum[horizon:] - cumsum[:-horizon]
+
+
+def historical_var(returns, level=0.95):
+    """``(VaR, CVaR)`` historiques (%) par colonne d'un tableau de rendements logarithmiques"""
+    cutoff = np.quantile(returns, 1 - level, axis=0)
+    tail = np.where(returns <= cutoff, returns, np.nan)
+    with np.errstate(invalid='ignore'):
+        expected = np.nanmean(tail, axis=0)
+    return -np.expm1(cutoff) * 100, -np.expm1(expected) * 100
+
+
+def parametric_var(mean, std, level=0.95):
+    """``(VaR, CVaR)`` gaussiens (%) pour des rendements logarithmiques de moyenne et d'écart-type donnés"""
+    z = NormalDist().inv_cdf(1 - level)
+    tail_mean = mean - std * NormalDist().pdf(z) / (1 - level)
+    return -np.expm1(mean + z * std) * 100, -np.expm1(tail_mean) * 100
+
+
+def covariance_factor(cov):
+    """Facteur ``L`` tel que ``L @ L.T == cov`` ; tolère les matrices semi-définies (valeurs propres ≥ 0)"""
+    values, vectors = np.linalg.eigh(cov)
+    return vectors * np.sqrt(np.clip(values, 0, None))
+
+
+class RiskEngine:
+    """Rendements journaliers d'un ensemble d'instruments et mesures de risque mémorisées.
+
+    ``prices`` est un DataFrame large (dates × symboles) de prix en dollars,
+    ``groups`` associe chaque symbole à sa région ou catégorie. Les prix
+    manquants sont prolongés (ffill), ce qui donne un rendement nul ce jour-là.
+    """
+
+    def __init__(self, prices, groups, lookback=500, scenarios=SCENARIOS):
+        if len(prices) < 30:
+            raise ValueError("Historique trop court pour les mesures de risque")
+        self.symbols = list(prices.columns)
+        self.groups = {symbol: groups.get(symbol, 'Autre') for symbol in self.symbols}
+        self.lookback = lookback
+        self.scenarios = dict(scenarios)
+        # Version des données : augmente à chaque barre intégrée et invalide les résultats mémorisés
+        self.version = 0
+        self.source_version = None
+        self._lock = threading.Lock()
+        self._results = {}
+
+        prices = prices.sort_index().ffill()
+        values = prices.to_numpy(dtype='float64')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.diff(np.log(values), axis=0, prepend=np.nan)
+        self._dates = list(prices.index)
+        self._prices = GrowingArray(values)
+        self._returns = GrowingArray(np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0))
+
+    def update(self, prices, source_version=None):
+        """Intègre les nouvelles barres d'un DataFrame large (mêmes colonnes) ; renvoie le nombre de barres intégrées"""
+        prices = prices.reindex(columns=self.symbols).sort_index()
+        with self._lock:
+            if source_version is not None:
+                self.source_version = source_version
+            applied = 0
+            for date, row in zip(prices.index, prices.to_numpy(dtype='float64')):
+                if date < self._dates[-1]:
+                    continue
+                if date == self._dates[-1]:
+                    if np.allclose(row, self._prices.view()[-1], equal_nan=True):
+                        continue
+                    self._dates.pop()
+                    self._prices.pop()
+                    self._returns.pop()
+                last = self._prices.view()[-1]
+                row = np.where(np.isnan(row), last, row)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    r = np.nan_to_num(np.log(row / last), nan=0.0, posinf=0.0, neginf=0.0)
+                self._dates.append(date)
+                self._prices.append(row)
+                self._returns.append(r)
+                applied += 1
+            if applied:
+                self.version += 1
+                self._results.clear()
+            return applied
+
+    def _memoized(self, key, compute):
+        with self._lock:
+            key = (self.version,) + key
+            if key in self._results:
+                return self._results[key]
+            returns = self._returns.view()[-self.lookback:].copy()
+        result = compute(returns)
+        with self._lock:
+            if key[0] == self.version:
+                self._results[key] = result
+        return result
+
+    def _group_weights(self):
+        """Matrice symboles × groupes de poids égaux dans chaque groupe"""
+        names = list(dict.fromkeys(self.groups.values()))
+        weights = np.zeros((len(self.symbols), len(names)))
+        for i, symbol in enumerate(self.symbols):
+            weights[i, names.index(self.groups[symbol])] = 1
+        return names, weights / weights.sum(axis=0)
+
+    def _var_table(self, returns, index, level, horizon):
+        hist_var, hist_cvar = historical_var(horizon_returns(returns, horizon), level)
+        param_var, param_cvar = parametric_var(returns.mean(axis=0) * horizon, returns.std(axis=0, ddof=1) * np.sqrt(horizon),
+                                               level)
+        return pd.DataFrame({'var_historique': hist_var, 'cvar_historique': hist_cvar,
+                             'var_parametrique': param_var, 'cvar_parametrique': param_cvar}, index=index)
+
+    def var_table(self, level=0.95, horizon=1):
+        """VaR / CVaR (%) par instrument : historiques (fenêtres chevauchantes) et gaussiennes"""
+        def compute(returns):
+            table = self._var_table(returns, pd.Index(self.symbols, name='symbole'), level, horizon)
+            table.insert(0, 'groupe', [self.groups[symbol] for symbol in self.symbols])
+            return table
+        return self._memoized(('var', level, horizon), compute)
+
+    def group_var_table(self, level=0.95, horizon=1):
+        """VaR / CVaR (%) par région ou catégorie, pour un panier équipondéré, et pour tout l'univers"""
+        def compute(returns):
+            names, weights = self._group_weights()
+            simple = np.expm1(returns)
+            baskets = np.log1p(np.column_stack([simple @ weights, simple.mean(axis=1)]))
+            return self._var_table(baskets, pd.Index(names + [PORTFOLIO], name='groupe'), level, horizon)
+        return self._memoized(('var_groupes', level, horizon), compute)
+
+    def scenario_drift(self, scenario, horizon):
+        """Dérive journalière (log) de chaque instrument pour atteindre les chocs du scénario sur l'horizon"""
+        shocks = np.array([scenario['symboles'].get(symbol, scenario['groupes'].get(self.groups[symbol], 0.0))
+                           for symbol in self.symbols], dtype='float64')
+        return np.log1p(shocks / 100) / horizon
+
+    def monte_carlo(self, scenario_name=None, paths=10_000, horizon=20, level=0.95, seed=0):
+        """Simulation de ``paths`` trajectoires journalières corrélées sur ``horizon`` jours.
+
+        Les rendements suivent une loi normale multivariée de covariance
+        historique (multipliée par la volatilité du scénario ``scenario_name``
+        au carré), centrée sur la moyenne historique plus la dérive de ses
+        chocs ; sans scénario, la loi historique seule. Les tirages sont
+        antithétiques et toutes les trajectoires avancent d'un jour à la fois,
+        la mémoire restant en O(paths × instruments). Renvoie par instrument
+        (et pour le portefeuille équipondéré) le rendement moyen, la VaR, la
+        CVaR, la probabilité de perte et le drawdown maximal moyen, en %.
+        """
+        scenario = None if scenario_name is None else self.scenarios[scenario_name]
+
+        def compute(returns):
+            n = len(self.symbols)
+            drift = returns.mean(axis=0)
+            if scenario is not None:
+                drift = drift + self.scenario_drift(scenario, horizon)
+            volatility = 1.0 if scenario is None else scenario['volatilite']
+            factor = (covariance_factor(np.cov(returns, rowvar=False)) * volatility).T.astype('float32')
+            drift = drift.astype('float32')
+            rng = np.random.default_rng(seed)
+            half = (paths + 1) // 2
+            # Valeur logarithmique (base 0) des positions puis du portefeuille équipondéré
+            values = np.zeros((paths, n + 1), dtype='float32')
+            peaks = np.zeros_like(values)
+            worst = np.zeros_like(values)
+            for _ in range(horizon):
+                shocks = rng.standard_normal((half, n), dtype=np.float32)
+                shocks = np.concatenate([shocks, -shocks])[:paths]
+                values[:, :n] += shocks @ factor + drift
+                values[:, n] = np.log(np.exp(values[:, :n]).mean(axis=1))
+                np.maximum(peaks, values, out=peaks)
+                np.minimum(worst, values - peaks, out=worst)
+            totals = np.expm1(values.astype('float64'))
+            cutoff = np.quantile(totals, 1 - level, axis=0)
+            tail = np.where(totals <= cutoff, totals, np.nan)
+            return pd.DataFrame({
+                'rendement_moyen': totals.mean(axis=0) * 100,
+                'var': -cutoff * 100,
+                'cvar': -np.nanmean(tail, axis=0) * 100,
+                'proba_perte': (totals < 0).mean(axis=0) * 100,
+                'drawdown_moyen': -np.expm1(worst.astype('float64')).mean(axis=0) * 100,
+            }, index=pd.Index(self.symbols + [PORTFOLIO], name='symbole'))
+        return self._memoized(('monte_carlo', scenario_name, paths, horizon, level, seed), compute)
+
+    def stress_tests(self, paths=10_000, horizon=20, level=0.95, seed=0):
+        """Résultats Monte Carlo de chaque scénario, précédés du scénario de base (loi historique)"""
+        results = {'Base': self.monte_carlo(None, paths, horizon, level, seed)}
+        for name in self.scenarios:
+            results[name] = self.monte_carlo(name, paths, horizon, level, seed)
+        return results
+
+    @property
+    def last_date(self):
+        return self._dates[-1]
@@ -0,0 +1,223 @@
+# snapshot_service.py
+"""Instantanés de marché publiés par un processus service et relus par les répliques du dashboard.
+
+Le service possède tous les téléchargements : son planificateur écrit chaque
+section modifiée dans un fichier Arrow IPC (``<section>-<version>.arrow``),
+puis remplace atomiquement le manifeste JSON ``instantane.json``. Les
+répliques relisent le manifeste quand il a changé (un ``stat`` par appel) et
+n'ouvrent que les sections dont la version a changé, en mémoire mappée : la
+lecture Arrow ne copie pas les données, seule la conversion en DataFrame le
+fait. Les petites sections (niveaux d'indices) sont gardées dans le manifeste.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+import pandas as pd
+import pyarrow as pa
+
+from refresh import Snapshot
+
+MANIFEST = 'instantane.json'
+
+
+def frame_table(frame):
+    """Table Arrow d'un DataFrame (index compris)"""
+    return pa.Table.from_pandas(frame, preserve_index=True)
+
+
+def bars_table(bars):
+    """Table Arrow unique de ``{symbole: barres}`` ; les bornes de chaque symbole vont dans les métadonnées"""
+    symbols = [symbol for symbol, data in bars.items() if data is not None]
+    frames = [bars[symbol] for symbol in symbols]
+    offsets = [0]
+    for data in frames:
+        offsets.append(offsets[-1] + len(data))
+    table = frame_table(pd.concat(frames) if frames else pd.DataFrame())
+    metadata = dict(table.schema.metadata or {})
+    metadata[b'barres'] = json.dumps({'symbols': symbols, 'offsets': offsets}).encode()
+    return table.replace_schema_metadata(metadata)
+
+
+def table_bars(table):
+    """Inverse de ``bars_table`` : ``{symbole: barres}``, chaque DataFrame étant une tranche du même bloc"""
+    layout = json.loads(table.schema.metadata[b'barres'])
+    frame = table.to_pandas(split_blocks=True)
+    offsets = layout['offsets']
+    return {symbol: frame.iloc[offsets[i]:offsets[i + 1]] for i, symbol in enumerate(layout['symbols'])}
+
+
+def section_kind(value):
+    """Format de stockage d'une section : 'frame', 'barres' (dict de DataFrames) ou 'json'"""
+    if isinstance(value, pd.DataFrame):
+        return 'frame'
+    if isinstance(value, dict) and value and all(isinstance(data, pd.DataFrame) for data in value.values()):
+        return 'barres'
+    return 'json'
+
+
+def write_table(path, table):
+    """Écrit une table au format Arrow IPC (fichier), de façon atomique"""
+    tmp_path = path + '.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def read_table(path):
+    """Table Arrow d'un fichier IPC en mémoire mappée (sans copie des tampons)"""
+    with pa.memory_map(path) as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+class SnapshotPublisher:
+    """Écrit les instantanés du planificateur dans ``root`` (à passer en ``on_publish``).
+
+    Seules les sections dont la version a changé sont réécrites ; les ``keep``
+    derniers fichiers de chaque section sont conservés pour les lecteurs qui
+    ouvrent un fichier juste après une nouvelle publication.
+    """
+
+    def __init__(self, root, keep=2):
+        self.root = root
+        self.keep = keep
+        # Identifie ce processus service : un lecteur qui le voit changer relit toutes les sections
+        self.token = uuid.uuid4().hex
+        self.publications = 0
+        self._files = {}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def publish(self, snapshot):
+        """Écrit les sections modifiées puis remplace le manifeste"""
+        with self._lock:
+            sections = {}
+            for name, value in snapshot.sections.items():
+                version = snapshot.section_versions.get(name, 0)
+                kind = section_kind(value)
+                entry = {'kind': kind, 'version': version}
+                if kind == 'json':
+                    entry['value'] = value
+                else:
+                    entry['file'] = f'{name}-{version}.arrow'
+                    self._write_section(name, entry['file'], value, kind)
+                sections[name] = entry
+            manifest = {'token': self.token, 'version': snapshot.version, 'updated_at': snapshot.updated_at,
+                        'preliminary': snapshot.preliminary, 'sections': sections}
+            tmp_path = os.path.join(self.root, MANIFEST + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, default=float)
+            os.replace(tmp_path, os.path.join(self.root, MANIFEST))
+            self.publications += 1
+
+    def _write_section(self, name, filename, value, kind):
+        files = self._files.setdefault(name, deque())
+        if files and files[-1] == filename:
+            return
+        write_table(os.path.join(self.root, filename), frame_table(value) if kind == 'frame' else bars_table(value))
+        files.append(filename)
+        while len(files) > self.keep:
+            try:
+                os.remove(os.path.join(self.root, files.popleft()))
+            except FileNotFoundError:
+                pass
+
+
+class SnapshotReader:
+    """Lecteur des instantanés publiés, avec l'interface du planificateur pour le dashboard.
+
+    Les sections inchangées gardent le même objet d'un instantané à l'autre,
+    comme avec ``RefreshScheduler``. Le service possède le cycle de
+    rafraîchissement : ``wake`` est sans effet et ``refresh_now`` relit
+    seulement le dernier instantané publié.
+
+    Les versions (de l'instantané et des sections) sont des couples
+    ``(époque, version publiée)`` ; l'époque augmente à chaque changement de
+    jeton du service. Un service redémarré repart à la version 1 : sans
+    l'époque, les moteurs et les résultats mémorisés par version des barres
+    prendraient ses données pour celles de l'ancien service.
+    """
+
+    def __init__(self, root, retries=3):
+        self.root = root
+        self.retries = retries
+        # Nombre de sections relues depuis le disque (les autres sont resservies)
+        self.loads = 0
+        self._path = os.path.join(root, MANIFEST)
+        self._stamp = None
+        self._token = None
+        self.epoch = 0
+        self._entries = {}
+        self._snapshot = Snapshot(0, {}, {}, None)
+        self._lock = threading.Lock()
+        # Les échecs de téléchargement sont journalisés par le service, pas par les répliques
+        self.errors = {}
+        self.last_error = None
+
+    def start(self):
+        return self
+
+    def stop(self):
+        pass
+
+    def wake(self):
+        pass
+
+    def refresh_now(self):
+        return self.snapshot()
+
+    def snapshot(self, timeout=None):
+        """Dernier instantané publié ; attend la première publication au plus ``timeout`` secondes"""
+        deadline = time.monotonic() + (timeout or 0)
+        while True:
+            snapshot = self._refresh()
+            if snapshot.version or time.monotonic() >= deadline:
+                return snapshot
+            time.sleep(0.05)
+
+    def _refresh(self):
+        try:
+            stat = os.stat(self._path)
+        except FileNotFoundError:
+            return self._snapshot
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if stamp == self._stamp:
+                return self._snapshot
+            for attempt in range(self.retries):
+                try:
+                    with open(self._path, encoding='utf-8') as f:
+                        manifest = json.load(f)
+                    self._snapshot = self._load(manifest)
+                    break
+                except FileNotFoundError:
+                    # Fichier de section supprimé entre la lecture du manifeste et son ouverture
+                    if attempt == self.retries - 1:
+                        raise
+            self._stamp = stamp
+            return self._snapshot
+
+    def _load(self, manifest):
+        if manifest['token'] != self._token:
+            self._token, self._entries = manifest['token'], {}
+            self.epoch += 1
+        current = self._snapshot.sections
+        sections, entries = {}, {}
+        for name, entry in manifest['sections'].items():
+            previous = self._entries.get(name)
+            if previous is not None and previous['version'] == entry['version'] and name in current:
+                sections[name] = current[name]
+            elif entry['kind'] == 'json':
+                sections[name] = entry['value']
+            else:
+                table = read_table(os.path.join(self.root, entry['file']))
+                sections[name] = table.to_pandas(split_blocks=True) if entry['kind'] == 'frame' else table_bars(table)
+                self.loads += 1
+            entries[name] = entry
+        self._entries = entries
+        return Snapshot((self.epoch, manifest['version']), sections,
+                        {name: (self.epoch, entry['version']) for name, entry in entries.items()},
+                        manifest['updated_at'], preliminary=manifest['preliminary'])
@@ -0,0 +1,198 @@
+# streaming.py
+"""Ingestion en continu : un producteur unique alimente un tampon circulaire par symbole.
+
+Le producteur interroge une source de ticks (générateur simulé ou barres récentes
+du fournisseur) et publie les lots dans un ``TickStore``. Les sections affichées
+relisent les derniers prix du store à chaque relance de leur fragment ; la
+mémoire reste bornée par ``capacity`` ticks par symbole, quelle que soit la
+durée de fonctionnement.
+"""
+import threading
+import time
+
+import numpy as np
+
+
+class RingBuffer:
+    """Les ``capacity`` derniers ticks (horodatage, prix, volume) d'un symbole"""
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self._times = np.zeros(capacity)
+        self._prices = np.full(capacity, np.nan)
+        self._volumes = np.zeros(capacity)
+        self.count = 0  # nombre total de ticks reçus
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, timestamp, price, volume=0.0):
+        i = self.count % self.capacity
+        self._times[i] = timestamp
+        self._prices[i] = price
+        self._volumes[i] = volume
+        self.count += 1
+
+    def last(self):
+        if not self.count:
+            return None
+        i = (self.count - 1) % self.capacity
+        return self._times[i], self._prices[i], self._volumes[i]
+
+    def values(self):
+        """Copie chronologique ``(horodatages, prix, volumes)`` du contenu"""
+        order = np.arange(self.count - len(self), self.count) % self.capacity
+        return self._times[order], self._prices[order], self._volumes[order]
+
+    @property
+    def nbytes(self):
+        return self._times.nbytes + self._prices.nbytes + self._volumes.nbytes
+
+
+class TickStore:
+    """Tampons circulaires par symbole yfinance ; ``version`` augmente à chaque lot publié"""
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.version = 0
+        self._buffers = {}
+        self._latest = {}  # symbole -> (horodatage, prix, volume)
+        self._condition = threading.Condition()
+
+    def publish(self, ticks):
+        """Ajoute un lot de ticks ``(symbole, horodatage, prix, volume)`` et réveille les abonnés"""
+        with self._condition:
+            for symbol, timestamp, price, volume in ticks:
+                buffer = self._buffers.get(symbol)
+                if buffer is None:
+                    buffer = self._buffers[symbol] = RingBuffer(self.capacity)
+                buffer.append(timestamp, price, volume)
+                self._latest[symbol] = (timestamp, price, volume)
+            self.version += 1
+            self._condition.notify_all()
+        return self.version
+
+    def wait(self, version, timeout=None):
+        """Attend une version postérieure à ``version`` ; renvoie la version courante"""
+        with self._condition:
+            self._condition.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+    def latest(self):
+        """Dernier tick de chaque symbole (copie, lisible sans verrou par l'appelant)"""
+        with self._condition:
+            return dict(self._latest)
+
+    def ticks(self, symbol):
+        """Contenu chronologique du tampon d'un symbole"""
+        with self._condition:
+            buffer = self._buffers.get(symbol)
+            return buffer.values() if buffer is not None else (np.array([]), np.array([]), np.array([]))
+
+    @property
+    def nbytes(self):
+        with self._condition:
+            return sum(buffer.nbytes for buffer in self._buffers.values())
+
+
+class SimulatedTickSource:
+    """Générateur local de ticks : marche aléatoire géométrique autour d'un prix de référence.
+
+    ``references()`` renvoie ``{symbole: prix de référence}`` pour les symboles à
+    simuler ; à chaque appel, une fraction ``activity`` d'entre eux reçoit un tick.
+    """
+
+    def __init__(self, references, volatility=0.0005, activity=0.5, seed=0):
+        self.references = references
+        self.volatility = volatility
+        self.activity = activity
+        self._prices = {}
+        self._rng = np.random.default_rng(seed)
+
+    def __call__(self):
+        references = self.references()
+        symbols = [symbol for symbol, price in references.items() if price and np.isfinite(price)]
+        if not symbols:
+            return []
+        moving = self._rng.random(len(symbols)) < self.activity
+        steps = np.exp(self._rng.normal(0, self.volatility, len(symbols)))
+        volumes = self._rng.integers(1, 1000, len(symbols))
+        now = time.time()
+        ticks = []
+        for symbol, move, step, volume in zip(symbols, moving, steps, volumes):
+            if move:
+                price = self._prices[symbol] = self._prices.get(symbol, references[symbol]) * step
+                ticks.append((symbol, now, price, float(volume)))
+        return ticks
+
+
+class PollingTickSource:
+    """Ticks tirés des barres récentes du fournisseur (dernier prix de chaque symbole).
+
+    Chaque interrogation ne demande que les ``days`` derniers jours : la barre
+    du jour suffit au dernier prix, l'historique reste au planificateur.
+    """
+
+    def __init__(self, provider, symbols, days=1):
+        self.provider = provider
+        self.symbols = symbols
+        self.days = days
+
+    def __call__(self):
+        now = time.time()
+        quotes = self.provider.index_quotes(self.symbols(), days=self.days)
+        return [(symbol, now, quote['last'], 0.0) for symbol, quote in quotes.items()]
+
+
+class StreamProducer:
+    """Thread démon unique qui interroge la source toutes les ``interval`` secondes"""
+
+    def __init__(self, source, store, interval=0.25):
+        self.source = source
+        self.store = store
+        self.interval = interval
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='tick-producer', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                ticks = self.source()
+            except Exception:
+                self.errors += 1
+                ticks = []
+            if ticks:
+                self.store.publish(ticks)
+            self._stop.wait(self.interval)
+
+
+def overlay_ticks(data, instruments, value_column, latest):
+    """Remplace prix et variation des lignes de cotation par les derniers ticks reçus.
+
+    La variation est recalculée contre ``cloture_veille`` ; les lignes sans tick
+    sont laissées telles quelles.
+    """
+    if data.empty or not latest:
+        return data
+    tickers = data['symbole'].map(lambda symbole: instruments.get(symbole, {}).get('yfinance_symbol'))
+    prices = tickers.map(lambda ticker: latest[ticker][1] if ticker in latest else np.nan).astype('float64')
+    live = prices.notna()
+    if not live.any():
+        return data
+    data = data.copy()
+    data.loc[live, value_column] = prices[live]
+    previous = data.loc[live, 'cloture_veille']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        data.loc[live, 'change_pct'] = np.where(previous != 0, (prices[live] - previous) / previous * 100, 0.0)
+    return data
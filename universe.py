@@ -0,0 +1,105 @@
+# universe.py
+"""Univers d'instruments chargé depuis un fichier de configuration JSON.
+
+Le fichier contient trois sections : ``devises`` et ``commodities`` (symbole ->
+attributs, au format de define_currencies/define_commodities) et ``indices``
+(nom -> symbole yfinance). Une section optionnelle ``defauts`` restreint les
+régions et catégories visibles au premier affichage.
+"""
+import json
+import os
+import threading
+import time
+
+DEFAULT_UNIVERSE = os.environ.get(
+    'DASHBOARD_UNIVERSE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'universe.json'))
+
+REQUIRED_FIELDS = {
+    'devises': ('pays', 'drapeau', 'yfinance_symbol', 'region'),
+    'commodities': ('nom', 'categorie', 'unite', 'yfinance_symbol'),
+}
+
+
+def validate_universe(config):
+    """Vérifie la structure de la configuration ; lève ValueError avec la liste des problèmes"""
+    errors = []
+    seen = {}
+    for section, fields in REQUIRED_FIELDS.items():
+        instruments = config.get(section)
+        if not isinstance(instruments, dict) or not instruments:
+            errors.append(f"section '{section}' absente ou vide")
+            continue
+        for symbole, info in instruments.items():
+            missing = [field for field in fields if not info.get(field)]
+            if missing:
+                errors.append(f"{section}.{symbole} : champs manquants {', '.join(missing)}")
+            ticker = info.get('yfinance_symbol')
+            if ticker in seen:
+                errors.append(f"{section}.{symbole} : symbole yfinance {ticker} déjà utilisé par {seen[ticker]}")
+            seen[ticker] = symbole
+    duplicated = set(config.get('devises', {})) & set(config.get('commodities', {}))
+    if duplicated:
+        errors.append(f"symboles présents dans les deux sections : {', '.join(sorted(duplicated))}")
+    if not isinstance(config.get('indices', {}), dict):
+        errors.append("section 'indices' : dictionnaire nom -> symbole attendu")
+    if errors:
+        raise ValueError("Univers invalide : " + " ; ".join(errors))
+
+
+class Universe:
+    """Instruments configurés, groupés par région (devises) et par catégorie (commodities).
+
+    Les sessions déclarent les instruments qu'elles affichent avec ``touch`` ;
+    le planificateur ne rafraîchit que les instruments demandés récemment
+    (``active``), si bien que le coût ne dépend pas de la taille de l'univers.
+    """
+
+    def __init__(self, config, demand_ttl=3600):
+        validate_universe(config)
+        self.currencies = {symbole: {**info, 'symbole': symbole} for symbole, info in config['devises'].items()}
+        self.commodities = {symbole: {**info, 'symbole': symbole} for symbole, info in config['commodities'].items()}
+        self.indices = dict(config.get('indices', {}))
+        defaults = config.get('defauts', {})
+        self.default_regions = defaults.get('regions') or self.regions()
+        self.default_categories = defaults.get('categories') or self.categories()
+        self.demand_ttl = demand_ttl
+        self._demand = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path=DEFAULT_UNIVERSE, **kwargs):
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f), **kwargs)
+
+    def __len__(self):
+        return len(self.currencies) + len(self.commodities)
+
+    def regions(self):
+        return list(dict.fromkeys(info['region'] for info in self.currencies.values()))
+
+    def categories(self):
+        return list(dict.fromkeys(info['categorie'] for info in self.commodities.values()))
+
+    def select_currencies(self, regions=None):
+        """Devises des régions demandées (toutes si None)"""
+        return {s: info for s, info in self.currencies.items() if regions is None or info['region'] in regions}
+
+    def select_commodities(self, categories=None):
+        """Commodities des catégories demandées (toutes si None)"""
+        return {s: info for s, info in self.commodities.items() if categories is None or info['categorie'] in categories}
+
+    def touch(self, symbols):
+        """Enregistre que des instruments sont affichés par une session ; renvoie ceux qui ne l'étaient pas"""
+        now = time.time()
+        with self._lock:
+            new = [s for s in symbols if now - self._demand.get(s, 0) > self.demand_ttl]
+            self._demand.update(dict.fromkeys(symbols, now))
+        return new
+
+    def active(self):
+        """Devises et commodities demandées par une session durant les ``demand_ttl`` dernières secondes"""
+        now = time.time()
+        with self._lock:
+            demanded = {s for s, seen in self._demand.items() if now - seen <= self.demand_ttl}
+        return ({s: info for s, info in self.currencies.items() if s in demanded},
+                {s: info for s, info in self.commodities.items() if s in demanded})